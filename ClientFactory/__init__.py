@@ -0,0 +1 @@
+from .client_factory import *
@@ -1 +1,209 @@
 from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import inspect
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+ClientT = TypeVar("ClientT")
+Builder = Callable[[], Union[ClientT, Awaitable[ClientT]]]
+
+
+class ClientKey(NamedTuple):
+    service: str
+    project: str
+    location: str = ""
+    resource: str = ""
+    """Topic, queue, instance... whatever the client is bound to."""
+
+
+class ClientCloseError(Exception):
+    """Several clients failed to close, their errors are in `exceptions`."""
+    def __init__(self, exceptions: List[Exception]) -> None:
+        super().__init__(f"{len(exceptions)} clients failed to close")
+        self.exceptions = exceptions
+
+
+class _Entry:
+    __slots__ = ("client", "last_used", "leases", "retired")
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.last_used = time.monotonic()
+        self.leases = 0
+        self.retired = False
+        """Evicted while leased, closed when the last lease ends."""
+
+
+class ClientFactory:
+    """
+    Registry of warm service clients keyed by (service, project, location, resource).
+    Clients are built once with their `__aenter__` run, handed back on every
+    later `lease` or `get`, and `__aexit__`-ed when evicted or when the factory closes.
+    Least recently used clients are evicted past `max_size`, and clients
+    unused for `idle_ttl` seconds are evicted on the next build or `evict_idle`.
+    A leased client is never closed under its holder: eviction skips it, or
+    for `evict` and `aclose` defers closing it to the end of its last lease.
+    A client from `get` isn't leased, only use it where nothing is evicted meanwhile.
+    """
+    def __init__(self, max_size: int = 64, idle_ttl: Optional[float] = 300.0) -> None:
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._clients: OrderedDict[ClientKey, _Entry] = OrderedDict()
+        self._pending: Dict[ClientKey, asyncio.Task] = {}
+        self._waiting: Dict[ClientKey, int] = {}
+        """Leases taken on pending builds, handed to the entry once it's built."""
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def get(self, key: ClientKey, builder: Builder[ClientT]) -> ClientT:
+        """
+        Returns the client for `key`, building it with `builder` on a miss.
+        Concurrent misses for the same key share one build.
+        """
+        return (await self._entry(key, builder)).client
+
+    @asynccontextmanager
+    async def lease(self, key: ClientKey, builder: Builder[ClientT]) -> AsyncIterator[ClientT]:
+        """Same as `get`, with the client kept open until the block exits."""
+        entry = await self._entry(key, builder, lease=True)
+        try:
+            yield entry.client
+        finally:
+            await self._release(entry)
+
+    async def _release(self, entry: _Entry) -> None:
+        entry.leases -= 1
+        entry.last_used = time.monotonic()
+        if entry.retired and not entry.leases:
+            await self._close_all([entry.client])
+
+    async def _entry(self, key: ClientKey, builder: Builder[ClientT], lease: bool = False) -> _Entry:
+        """
+        Leases are taken in the same step the entry is found or published,
+        so no other build can evict it before the caller resumes.
+        """
+        entry = self._clients.get(key)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._clients.move_to_end(key)
+            if lease:
+                entry.leases += 1
+            return entry
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._build(key, builder))
+            self._pending[key] = task
+        if lease:
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if lease:
+                if not task.done():
+                    self._waiting[key] -= 1
+                elif not task.cancelled() and task.exception() is None:
+                    # The build finished and leased the entry for us.
+                    await self._release(task.result())
+            raise
+
+    async def _build(self, key: ClientKey, builder: Builder[ClientT]) -> _Entry:
+        try:
+            client = builder()
+            if inspect.isawaitable(client):
+                client = await client
+            if hasattr(client, "__aenter__"):
+                try:
+                    await client.__aenter__()
+                except BaseException as exc:
+                    # Whatever it opened before failing still needs closing.
+                    if hasattr(client, "__aexit__"):
+                        try:
+                            await client.__aexit__(type(exc), exc, exc.__traceback__)
+                        except Exception:
+                            pass
+                    raise
+            entry = self._clients[key] = _Entry(client)
+            entry.leases = self._waiting.get(key, 0)
+        finally:
+            del self._pending[key]
+            self._waiting.pop(key, None)
+        try:
+            await self._close_all(self._evictions(keep=key))
+        except Exception:
+            # Not this build's failure, its callers still get their client and release their leases.
+            logger.exception("Failed to close clients evicted for %s", key)
+        return entry
+
+    def _evictions(self, keep: Optional[ClientKey] = None) -> List[Any]:
+        """
+        Unleased clients past `max_size`, least recently used first, and unleased idle ones.
+        :param keep: A client just built for a `get` caller that hasn't used it yet.
+        """
+        evicted = []
+        excess = len(self._clients) - self.max_size
+        cutoff = time.monotonic() - self.idle_ttl if self.idle_ttl is not None else None
+        for key, entry in list(self._clients.items()):
+            if entry.leases or key == keep:
+                continue
+            if excess > 0 or (cutoff is not None and entry.last_used <= cutoff):
+                del self._clients[key]
+                evicted.append(entry.client)
+                excess -= 1
+        return evicted
+
+    async def evict_idle(self) -> int:
+        """Closes clients past their idle ttl, returns how many were closed."""
+        evicted = self._evictions()
+        await self._close_all(evicted)
+        return len(evicted)
+
+    def _retire(self, entries: List[_Entry]) -> List[Any]:
+        """Unleased clients to close now, leased ones are closed by their last lease."""
+        closing = []
+        for entry in entries:
+            if entry.leases:
+                entry.retired = True
+            else:
+                closing.append(entry.client)
+        return closing
+
+    async def evict(self, key: ClientKey) -> None:
+        entry = self._clients.pop(key, None)
+        if entry is not None:
+            await self._close_all(self._retire([entry]))
+
+    async def aclose(self) -> None:
+        entries = list(self._clients.values())
+        self._clients.clear()
+        await self._close_all(self._retire(entries))
+
+    @staticmethod
+    async def _close_all(clients: List[Any]) -> None:
+        """Closes every client even when some fail, then raises what failed."""
+        errors: List[Exception] = []
+        for client in clients:
+            if hasattr(client, "__aexit__"):
+                try:
+                    await client.__aexit__(None, None, None)
+                except Exception as exc:
+                    errors.append(exc)
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise ClientCloseError(errors)
+
+    async def __aenter__(self) -> ClientFactory:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.aclose()
+
+
+client_factory = ClientFactory()
@@ -1,2 +1,16 @@
 from .clients import *
 from .models import *
+
+__all__ = [
+    "ColnDevCloudSQL",
+    "ICloudSQLClient",
+    "IpMapping",
+    "SqlAuth",
+    "SqlBackendType",
+    "SqlConnection",
+    "SQLConnectionInfo",
+    "SqlDatabaseVersion",
+    "SqlIpAddressType",
+    "SslCert",
+    "SupportsAuthFlow",
+]
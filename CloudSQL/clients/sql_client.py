@@ -6,13 +6,14 @@ import json
 import os
 
 import httpx
-from httpx import AsyncClient, Request, Response
+from httpx import Request, Response
 from google.cloud import secretmanager
 from psycopg import Connection
 from psycopg.conninfo import make_conninfo
 
-from ...auth import get_sql_oauth_token
+from ...auth import BearerAuth
 from ...base_types import zulu_encode, JsonBase, GCloudSettings
+from ...transport import coalesce_key, make_client, raise_for_status, request_coalescer
 from ..models import SqlConnection
 
 
@@ -21,6 +22,10 @@ class SupportsAuthFlow(Protocol):
         ...
 
 
+class SqlAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/sqlservice.admin',)
+
+
 class SQLConnectionInfo(JsonBase):
     db_user: str
     db_password: str
@@ -30,11 +35,10 @@ class SQLConnectionInfo(JsonBase):
 class _ICloudSqlClient(ABC):
     def __init__(self, instance: str) -> None:
         self.instance = instance
-        token = get_sql_oauth_token()
-        self.client = AsyncClient(
+        self.client = make_client(
             base_url=f"https://sqladmin.googleapis.com/v1/"
             f"projects/{self.project_id}/instances/{self.instance}",
-            auth=SqlAuth(token)  # type: ignore
+            auth=SqlAuth()
         )
 
     def make_psyco_connection(self) -> Coroutine[None, None, Connection]:
@@ -68,7 +72,7 @@ class ColnDevCloudSQL(_ICloudSqlClient):
 
 class ICloudSQLClient(ABC):
     def __init__(self) -> None:
-        self.client = AsyncClient(
+        self.client = make_client(
             base_url=f"https://sqladmin.googleapis.com/v1/"
             f"projects/{self.project_id}/instances/{self.instance}",
             auth=self.auth_class  # type: ignore
@@ -121,12 +125,17 @@ class ICloudSQLClient(ABC):
         :return: SqlConnection
         """
         params = {"readTime": zulu_encode(read_time)} if read_time else None
-        res = await self.client.get(
-            url="/connectSettings",
-            params=params
-        )
-        assert res.status_code == 200
-        sql_conn = SqlConnection(**res.json())
+
+        async def fetch() -> SqlConnection:
+            res = await self.client.get(
+                url="/connectSettings",
+                params=params
+            )
+            raise_for_status(res, "Error getting connection settings")
+            return SqlConnection.parse_response(res.json())
+
+        key = coalesce_key(self.client, "GET", "/connectSettings", params)
+        sql_conn = await request_coalescer.run(key, fetch)
         await self.connect_unix_socket()
         return sql_conn
 
@@ -1 +1,18 @@
 from .cloud_scheduler_client import *
+
+__all__ = [
+    "AppEngineHttpTarget",
+    "AppEngineRouting",
+    "CronJobBase",
+    "CronJobCreate",
+    "CronJobRead",
+    "ExampleAuth",
+    "ExampleRequest",
+    "ExampleScheduler",
+    "HttpMethod",
+    "ICloudSchedulerAuth",
+    "ICloudSchedulerClient",
+    "MinimalCreateJob",
+    "RetryConfig",
+    "SupportsCreateJob",
+]
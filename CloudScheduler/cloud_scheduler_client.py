@@ -1,38 +1,19 @@
 from __future__ import annotations
-from abc import ABC, abstractmethod
+from abc import ABC
 from enum import Enum
 from base64 import b64encode
 import json
 
-from typing import Any, Dict, Optional, Protocol, Union, List, Generator
+from typing import Any, AsyncIterator, Dict, Optional, Protocol, Union, List
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel, validator
-from pydantic.utils import to_lower_camel
-from google.protobuf.timestamp_pb2 import Timestamp
-from httpx import Auth, AsyncClient, Response, Request
+from httpx import Auth
 
-from google_http.auth import get_scheduler_oauth_token
-
-
-def zulu_encode(dt: datetime) -> str:
-    temp_stamp = Timestamp()
-    temp_stamp.FromDatetime(dt)
-    return temp_stamp.ToJsonString()
-
-
-class JsonBase(BaseModel):
-    class Config:
-        allow_population_by_field_name = True
-
-        @classmethod
-        def alias_generator(cls, string: str) -> str:
-            return to_lower_camel(string)
-
-        json_encoders = {
-            datetime: zulu_encode
-        }
+from ..auth import BearerAuth
+from ..base_types import JsonBase, stream_list
+from ..transport import make_client, raise_for_status
 
 
 class RetryConfig(JsonBase):
@@ -98,20 +79,8 @@ class CronJobRead(CronJobBase):
     last_attempt_time: Optional[datetime]
 
 
-class ICloudSchedulerAuth(Auth):
-    def __init__(self) -> None:
-        super().__init__()
-
-    def auth_flow(self, request: Request) -> Generator[Request, Response, None]:
-        request.headers['Authorization'] = f"Bearer {self.token}"
-        yield request
-
-    @property
-    @abstractmethod
-    def token(self) -> str:
-        raise NotImplementedError(
-            "Token property must be implemented by subclass."
-        )
+class ICloudSchedulerAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/cloud-scheduler',)
 
 
 class SupportsCreateJob(Protocol):
@@ -131,7 +100,7 @@ class ICloudSchedulerClient(ABC):
     auth: Auth
 
     def __init__(self) -> None:
-        self.client = AsyncClient(
+        self.client = make_client(
             base_url="https://cloudscheduler.googleapis.com/v1beta1/"
             f"projects/{self.project_id}/locations/{self.location_id}/jobs",
             auth=self.auth
@@ -160,10 +129,15 @@ class ICloudSchedulerClient(ABC):
         cron_job = self._build_request(create_job)
         res = await self.client.post(
             url="",
-            content=cron_job.json(by_alias=True, exclude_none=True)
+            content=cron_job.json_bytes(exclude_none=True)
         )
-        print(res.text)
-        return CronJobRead(**res.json())
+        raise_for_status(res, "Error creating job")
+        return CronJobRead.parse_response(res.json())
+
+    async def list_jobs(self, page_size: Optional[int] = None) -> AsyncIterator[CronJobRead]:
+        params = {"pageSize": page_size} if page_size else None
+        async for job in stream_list(self.client, "", "jobs", CronJobRead, params):
+            yield job
 
     async def __aenter__(self) -> ICloudSchedulerClient:
         return self
@@ -173,9 +147,7 @@ class ICloudSchedulerClient(ABC):
 
 
 class ExampleAuth(ICloudSchedulerAuth):
-    @property
-    def token(self) -> str:
-        return get_scheduler_oauth_token()
+    ...
 
 
 class ExampleScheduler(ICloudSchedulerClient):
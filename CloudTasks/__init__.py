@@ -1,2 +1,49 @@
 from .models import *
-from .clients import *
\ No newline at end of file
+from .clients import *
+
+__all__ = [
+    "AppEngineTask",
+    "Attempt",
+    "create_default_http_target",
+    "create_default_http_task",
+    "create_default_oidc_token",
+    "create_default_push_queue_request",
+    "create_default_task_base",
+    "create_default_uri_override",
+    "create_push_queue_url",
+    "CreateHTTPTaskRequest",
+    "HttpRequest",
+    "HTTPTask",
+    "InputStats",
+    "JsonAppEngineHttpQueue",
+    "JsonAppEngineRouting",
+    "JsonHeader",
+    "JsonHeaderOverride",
+    "JsonHTTPMethod",
+    "JsonHTTPTarget",
+    "JsonPathOverride",
+    "JsonPushQueueBase",
+    "JsonPushQueueInput",
+    "JsonPushQueueOutput",
+    "JsonQueryOverride",
+    "JsonRateLimits",
+    "JsonRetryConfig",
+    "JsonUriOverride",
+    "OidcToken",
+    "PullMessageTask",
+    "PushQueue",
+    "QueueDoesNotExistException",
+    "QueueStats",
+    "Scheme",
+    "StackdriverLoggingConfig",
+    "State",
+    "Status",
+    "SupportsCreateQueue",
+    "SupportsPushTask",
+    "TaskBase",
+    "TasksAuth",
+    "TasksException",
+    "TypeEnum",
+    "UriOverrideEnforceMode",
+    "View",
+]
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import typing
-from typing import Protocol
+from typing import AsyncIterator, Optional, Protocol
 
-import httpx
-from httpx import AsyncClient, Request, Response
-
-from ..models import CreateHTTPTaskRequest, JsonPushQueueOutput, create_default_push_queue_request
+from ...auth import BearerAuth
+from ...base_types import GCloudSettings, stream_list
+from ...transport import GoogleApiError, coalesce_key, make_client, request_coalescer
+from ..models import CreateHTTPTaskRequest, JsonPushQueueOutput, TaskBase, create_default_push_queue_request
 
 
 class SupportsCreateQueue(Protocol):
@@ -18,31 +17,27 @@ class SupportsPushTask(Protocol):
     def push_task(self) -> SupportsPushTask:
         ...
 
-class TasksAuth(httpx.Auth):
-    def __init__(self, token: str):
-        self.token = token
-
-    def auth_flow(self, request: Request) -> typing.Generator[Request, Response, None]:
-        request.headers['Authorization'] = f"Bearer {self.token}"
-        yield request
+class TasksAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/cloud-tasks',)
 
-class TasksException(Exception):
+class TasksException(GoogleApiError):
     ...
 
 class QueueDoesNotExistException(Exception):
     ...
 
 class PushQueue:
-    def __init__(self, queue_id: str) -> None:
+    def __init__(self, queue_id: str, project_id: Optional[str] = None, location_id: str = "us-central1") -> None:
+        """
+        :param project_id: Defaults to the PROJECT_ID environment variable.
+        """
         self.queue_id = queue_id
-        settings = get_project_settings(base_settings=True)
-        project_id = settings.current_service # type: ignore
-        location_id = "us-central1"
-        token = get_oauth_token(scopes=['https://www.googleapis.com/auth/cloud-tasks'])
-        self.client = AsyncClient(
+        if project_id is None:
+            project_id = GCloudSettings().project_id
+        self.client = make_client(
             base_url="https://cloudtasks.googleapis.com/v2beta3/"
                      f"projects/{project_id}/locations/{location_id}/queues",
-            auth=TasksAuth(token),
+            auth=TasksAuth(),
         )
 
     async def __aenter__(self):
@@ -82,45 +77,65 @@ class PushQueue:
 
     async def create_queue(self) -> PushQueue:
         push_queue_request = await create_default_push_queue_request(self.queue_id)
-        data = push_queue_request.json(by_alias=True)
+        data = push_queue_request.json_bytes()
         res = await self.client.post(
             url="",
             content=data
         )
-        if res.status_code != 200:
-            raise TasksException(f"Error creating queue: {res.text}")
-        self.json_queue = JsonPushQueueOutput(**res.json())
+        if not res.is_success:
+            raise TasksException(f"Error creating queue: {res.text}", status_code=res.status_code, response=res)
+        self.json_queue = JsonPushQueueOutput.parse_response(res.json())
         return self
 
     async def get_queue(self) -> PushQueue:
-        res = await self.client.get(
-            url=f"{self.queue_id}"
-        )
-        if res.status_code == 404:
-            raise QueueDoesNotExistException()
-        if res.status_code != 200:
-            raise TasksException(f"Error getting queue: {res.text}")
-        self.json_queue = JsonPushQueueOutput(**res.json())
+        async def fetch() -> JsonPushQueueOutput:
+            res = await self.client.get(
+                url=f"{self.queue_id}"
+            )
+            if res.status_code == 404:
+                raise QueueDoesNotExistException()
+            if not res.is_success:
+                raise TasksException(f"Error getting queue: {res.text}", status_code=res.status_code, response=res)
+            return JsonPushQueueOutput.parse_response(res.json())
+
+        key = coalesce_key(self.client, "GET", self.queue_id)
+        self.json_queue = await request_coalescer.run(key, fetch)
         return self
 
+    async def list_queues(self, page_size: Optional[int] = None) -> AsyncIterator[JsonPushQueueOutput]:
+        """
+        Streams every queue in the location, one model at a time.
+        :param page_size: Optional number of queues per page request.
+        """
+        params = {"pageSize": page_size} if page_size else None
+        async for queue in stream_list(self.client, "", "queues", JsonPushQueueOutput, params):
+            yield queue
+
+    async def list_tasks(self, page_size: Optional[int] = None) -> AsyncIterator[TaskBase]:
+        """
+        Streams every task in the queue, one model at a time.
+        :param page_size: Optional number of tasks per page request.
+        """
+        params = {"pageSize": page_size} if page_size else None
+        async for task in stream_list(self.client, f"{self.queue_id}/tasks", "tasks", TaskBase, params):
+            yield task
+
     async def delete_queue(self) -> bool:
         res = await self.client.delete(
             url=f"{self.queue_id}"
         )
-        if res.status_code != 200:
-            raise TasksException(f"Error deleting queue: {res.text}")
+        if not res.is_success:
+            raise TasksException(f"Error deleting queue: {res.text}", status_code=res.status_code, response=res)
         return True
 
     async def create_task(self, task: CreateHTTPTaskRequest):
-        data = task.json(by_alias=True)
+        data = task.json_bytes()
         res = await self.client.post(
             url=f"{self.queue_id}",
             content=data
         )
-        if res.status_code != 200:
-            raise TasksException(f"Error creating task: {res.text}")
-        res_task = res.json()
-        print(res_task)
+        if not res.is_success:
+            raise TasksException(f"Error creating task: {res.text}", status_code=res.status_code, response=res)
         return "Hey"
 
 async def main():
@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime
 
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from pydantic import validator
 
@@ -17,10 +17,11 @@ class TaskBase(JsonBase):
     name: str
     schedule_time: str
     dispatch_deadline: str
-    dispatch_count: int
-    response_count: int
-    first_attempt: Attempt
-    last_attempt: Attempt
+    # Zero counts and the attempts of tasks not dispatched yet are left out of api responses.
+    dispatch_count: int = 0
+    response_count: int = 0
+    first_attempt: Optional[Attempt] = None
+    last_attempt: Optional[Attempt] = None
     view: View = View.view_unspecified
 
     @validator('schedule_time')
@@ -60,3 +61,11 @@ class AppEngineTask(TaskBase):
 
 class PullMessageTask(TaskBase):
     ...
+
+
+TaskBase.update_forward_refs()
+Attempt.update_forward_refs()
+HTTPTask.update_forward_refs()
+CreateHTTPTaskRequest.update_forward_refs()
+AppEngineTask.update_forward_refs()
+PullMessageTask.update_forward_refs()
@@ -1 +1,7 @@
 from .client import *
+
+__all__ = [
+    "DriveAuth",
+    "DriveClient",
+    "IDriveClient",
+]
@@ -1,38 +1,38 @@
 from __future__ import annotations
 import json
 
-from typing import Any, BinaryIO, Dict, Generator, Tuple, IO
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple, IO
 from abc import ABC
 import asyncio
 import tempfile
 
-import httpx
-from httpx import Request, Response, AsyncClient
+from httpx import Response
 
-from ...auth import get_drive_oauth_token
+from ...auth import BearerAuth
+from ...base_types import stream_list
+from ...transport import coalesce_key, make_client, raise_for_status, request_coalescer
 
-class DriveAuth(httpx.Auth):
-    def __init__(self, token: str):
-        self.token = token
-
-    def auth_flow(self, request: Request) -> Generator[Request, Response, None]:
-        request.headers['Authorization'] = f"Bearer {self.token}"
-        yield request
+class DriveAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/drive',)
 
 class IDriveClient(ABC):
     def __init__(self) -> None:
-        token = get_drive_oauth_token()
-        self.client = AsyncClient(
+        self.client = make_client(
             base_url=f"https://www.googleapis.com/drive/v3",
-            auth=DriveAuth(token) # type: ignore
+            auth=DriveAuth()
         )
 
+    async def __aenter__(self) -> IDriveClient:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.client.aclose()
+
 class DriveClient(IDriveClient):
     def __init__(self) -> None:
-        token = get_drive_oauth_token()
-        self.client = AsyncClient(
+        self.client = make_client(
             base_url="https://www.googleapis.com/drive/v3",
-            auth=DriveAuth(token) # type: ignore
+            auth=DriveAuth()
         )
 
     async def get_about(self) -> Response:
@@ -59,23 +59,42 @@ class DriveClient(IDriveClient):
             url=url,
             params=file_req_params
         )
-        assert file_res.status_code == 200
+        raise_for_status(file_res, "Error downloading file")
         xlsx_file = tempfile.NamedTemporaryFile(mode='w+b', suffix='.xlsx', delete=False)
         xlsx_file.write(file_res.content)
         xlsx_file.seek(0)
         return xlsx_file.file
 
     async def get_file_metadata(self, file_id: str) -> Dict[str, Any]:
+        """
+        Concurrent calls for the same file share one request, each gets its own copy of the dict.
+        """
         url = f"/files/{file_id}"
         data_req_params = {
             "fields": "*"
         }
-        data_req = await self.client.get(
-            url=url,
-            params=data_req_params
-        )
-        assert data_req.status_code == 200
-        return data_req.json()
+
+        async def fetch() -> Dict[str, Any]:
+            data_req = await self.client.get(
+                url=url,
+                params=data_req_params
+            )
+            raise_for_status(data_req, "Error getting file metadata")
+            return data_req.json()
+
+        key = coalesce_key(self.client, "GET", url, data_req_params)
+        return await request_coalescer.run(key, fetch)
+
+    async def list_files(self, query: Optional[str] = None, page_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams file metadata for every file matching `query`, across pages.
+        :param query: Optional Drive search query, e.g. "mimeType='text/csv'".
+        """
+        params: Dict[str, Any] = {"pageSize": page_size, "fields": "nextPageToken, files"}
+        if query:
+            params["q"] = query
+        async for file in stream_list(self.client, "/files", "files", params=params):
+            yield file
 
     async def get_xlsx_file(self, file_id: str) -> Tuple[IO, Dict[str, Any]]:
         """Creates a file as first return arg that must be deleted sorry.
@@ -5,3 +5,36 @@
 # from .models.pub_sub_subscriptions import *
 # from .models.pub_sub_subscription_functions import *
 from .clients import *
+
+__all__ = [
+    "AckDispatcher",
+    "AckError",
+    "acknowledge",
+    "AcknowledgeConfirmation",
+    "AckRequest",
+    "BatchPublisher",
+    "BatchSettings",
+    "chunk_ack_ids",
+    "confirmation_from_error",
+    "encode_message",
+    "FlowControl",
+    "IPublisherClient",
+    "ISubscriberClient",
+    "LeaseManager",
+    "MessageBatch",
+    "modify_ack_deadline",
+    "ModifyAckDeadlineRequest",
+    "OrderedBatchPublisher",
+    "OrderingKeyPaused",
+    "PbSafeProtocol",
+    "PublishMessageBody",
+    "PublishToTopicResponse",
+    "PubSubAuth",
+    "PubSubMessageRequest",
+    "pull",
+    "PullRequest",
+    "ReceivedMessageRecord",
+    "StreamingPullRequest",
+    "SupportsPublishMessage",
+    "wrap_message",
+]
@@ -1 +1,5 @@
 from .pub_sub_client import *
+from .pub_sub_batching import *
+from .pub_sub_subscriber import *
+from .pub_sub_acks import *
+from .pub_sub_leases import *
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Coroutine, Dict, Iterable, Iterator, List, Optional, Set
+
+from httpx import AsyncClient
+
+from ..models.pub_sub_subscription_functions import acknowledge, modify_ack_deadline
+from ..models.pub_sub_subscriptions import AckRequest, ModifyAckDeadlineRequest
+from ..models.pub_sub_types import AcknowledgeConfirmation
+from ...transport import GoogleApiError, default_retry_policy
+
+MAX_ACK_IDS = 2500
+"""Most ack ids sent in one acknowledge or modifyAckDeadline request."""
+
+MAX_ACK_REQUEST_BYTES = 512 * 1000
+"""Request size limit of acknowledge and modifyAckDeadline, with some headroom."""
+
+_REQUEST_OVERHEAD = 64
+_ID_OVERHEAD = 3  # quotes and comma
+
+
+class AckError(Exception):
+    """Ack ids that could not be acked or have their deadline modified."""
+    def __init__(self, ack_ids: List[str], cause: BaseException) -> None:
+        super().__init__(f"{len(ack_ids)} ack ids failed: {cause}")
+        self.ack_ids = ack_ids
+        self.cause = cause
+
+
+def confirmation_from_error(ack_ids: List[str], exc: GoogleApiError) -> Optional[AcknowledgeConfirmation]:
+    """
+    Reads per ack id failures from the google.rpc.ErrorInfo detail of a failed
+    request, as sent for exactly once delivery subscriptions.
+    TRANSIENT_ failures end up in `temporary_failed_ack_ids`, PERMANENT_ ones in
+    `invalid_ack_ids` and ids the error doesn't mention in `ack_ids`.
+    None when the error has no per id metadata, then the whole request failed.
+    """
+    if exc.response is None:
+        return None
+    try:
+        details = json.loads(exc.response.content)["error"]["details"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    metadata: Dict[str, str] = {}
+    for detail in details if isinstance(details, list) else []:
+        if isinstance(detail, dict) and detail.get("@type", "").endswith("google.rpc.ErrorInfo"):
+            metadata.update(detail.get("metadata") or {})
+    if not metadata:
+        return None
+    succeeded, temporary, invalid = [], [], []
+    for ack_id in ack_ids:
+        status = metadata.get(ack_id)
+        if status is None:
+            succeeded.append(ack_id)
+        elif status.startswith("TRANSIENT_"):
+            temporary.append(ack_id)
+        else:
+            invalid.append(ack_id)
+    return AcknowledgeConfirmation(ack_ids=succeeded, invalid_ack_ids=invalid, temporary_failed_ack_ids=temporary)
+
+
+def chunk_ack_ids(ack_ids: List[str]) -> Iterator[List[str]]:
+    """Splits `ack_ids` into requests under MAX_ACK_IDS ids and MAX_ACK_REQUEST_BYTES."""
+    chunk: List[str] = []
+    size = _REQUEST_OVERHEAD
+    for ack_id in ack_ids:
+        id_size = len(ack_id) + _ID_OVERHEAD
+        if chunk and (len(chunk) >= MAX_ACK_IDS or size + id_size > MAX_ACK_REQUEST_BYTES):
+            yield chunk
+            chunk = []
+            size = _REQUEST_OVERHEAD
+        chunk.append(ack_id)
+        size += id_size
+    if chunk:
+        yield chunk
+
+
+class AckDispatcher:
+    """
+    Coalesces acks and ack deadline changes made within `max_delay` seconds
+    into bulk `:acknowledge` and `:modifyAckDeadline` requests, one per deadline
+    value, split to stay under the request limits.
+    Ids reported as temporarily failed are retried with backoff up to
+    `max_attempts` times, anything that still fails, or fails with any other
+    error, is passed to `on_error` as an AckError.
+    """
+    def __init__(
+            self,
+            client: AsyncClient,
+            subscription: str,
+            max_delay: float = 0.01,
+            max_attempts: int = 5,
+            on_error: Optional[Callable[[BaseException], None]] = None
+        ) -> None:
+        self.client = client
+        self.subscription = subscription
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.on_error = on_error
+        self._acks: List[str] = []
+        self._modacks: Dict[int, List[str]] = {}
+        self._pending = 0
+        self._attempts: Dict[str, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()
+
+    def ack(self, ack_id: str) -> None:
+        self._acks.append(ack_id)
+        self._added(1)
+
+    def nack(self, ack_id: str) -> None:
+        """Makes the message available for redelivery right away."""
+        self.modify_ack_deadline(ack_id, 0)
+
+    def modify_ack_deadline(self, ack_id: str, seconds: int) -> None:
+        self._modacks.setdefault(seconds, []).append(ack_id)
+        self._added(1)
+
+    def modify_ack_deadlines(self, ack_ids: Iterable[str], seconds: int) -> None:
+        ids = self._modacks.setdefault(seconds, [])
+        before = len(ids)
+        ids.extend(ack_ids)
+        self._added(len(ids) - before)
+
+    def _added(self, count: int) -> None:
+        self._pending += count
+        if self._pending >= MAX_ACK_IDS:
+            self._dispatch()
+        elif self._timer is None and count:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        acks, self._acks = self._acks, []
+        modacks, self._modacks = self._modacks, {}
+        self._pending = 0
+        for chunk in chunk_ack_ids(acks):
+            self._start(chunk, None)
+        for seconds, ack_ids in modacks.items():
+            for chunk in chunk_ack_ids(ack_ids):
+                self._start(chunk, seconds)
+
+    def _start(self, ack_ids: List[str], seconds: Optional[int]) -> None:
+        self._track(self._send(ack_ids, seconds))
+
+    def _track(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, ack_ids: List[str], seconds: Optional[int]) -> None:
+        """Sends acks when `seconds` is None, deadline changes otherwise."""
+        try:
+            if seconds is None:
+                await acknowledge(self.client, self.subscription, AckRequest(ack_ids=ack_ids))
+            else:
+                request = ModifyAckDeadlineRequest(ack_ids=ack_ids, ack_deadline_seconds=seconds)
+                await modify_ack_deadline(self.client, self.subscription, request)
+        except GoogleApiError as exc:
+            confirmation = confirmation_from_error(ack_ids, exc)
+            if confirmation is None:
+                self._fail(ack_ids, exc)
+                return
+            self._forget(confirmation.ack_ids or [])
+            if confirmation.invalid_ack_ids:
+                self._fail(confirmation.invalid_ack_ids, exc)
+            if confirmation.temporary_failed_ack_ids:
+                self._retry(confirmation.temporary_failed_ack_ids, seconds, exc)
+        except Exception as exc:
+            self._fail(ack_ids, exc)
+        else:
+            self._forget(ack_ids)
+
+    def _forget(self, ack_ids: List[str]) -> None:
+        if self._attempts:
+            for ack_id in ack_ids:
+                self._attempts.pop(ack_id, None)
+
+    def _fail(self, ack_ids: List[str], exc: BaseException) -> None:
+        self._forget(ack_ids)
+        if self.on_error is not None:
+            self.on_error(AckError(ack_ids, exc))
+
+    def _retry(self, ack_ids: List[str], seconds: Optional[int], exc: BaseException) -> None:
+        retry, exhausted = [], []
+        attempt = 0
+        for ack_id in ack_ids:
+            attempts = self._attempts.get(ack_id, 1) + 1
+            if attempts > self.max_attempts:
+                exhausted.append(ack_id)
+            else:
+                self._attempts[ack_id] = attempts
+                attempt = max(attempt, attempts)
+                retry.append(ack_id)
+        if exhausted:
+            self._fail(exhausted, exc)
+        if retry:
+            delay = default_retry_policy.backoff(attempt - 1)
+            self._track(self._requeue_later(delay, retry, seconds))
+
+    async def _requeue_later(self, delay: float, ack_ids: List[str], seconds: Optional[int]) -> None:
+        await asyncio.sleep(delay)
+        if seconds is None:
+            self._acks.extend(ack_ids)
+        else:
+            self._modacks.setdefault(seconds, []).extend(ack_ids)
+        self._added(len(ack_ids))
+
+    async def flush(self) -> None:
+        """Sends everything pending now and waits for it, retries included."""
+        self._dispatch()
+        while self._sending:
+            await asyncio.wait(set(self._sending))
+            self._dispatch()
@@ -2,15 +2,15 @@ from __future__ import annotations
 from abc import abstractmethod
 from collections.abc import Callable
 
-import typing
-from typing import Any, List, Optional, Protocol, Union
-
-import httpx
-from httpx import AsyncClient, Request, Response
+from typing import Any, AsyncIterator, List, Optional, Protocol, Union
 
+from ...auth import BearerAuth
+from ...base_types import stream_list
+from ...transport import coalesce_key, make_client, raise_for_status, request_coalescer
 from ..models.pub_sub_types import SchemaView
 from ..models.pub_sub_topics import TopicBase
 from ..models.pub_sub_schemas import SchemaInput, SchemaOutput
+from ..models.pub_sub_subscriptions import SubscriptionBase
 
 class PbSafeProtocol(Protocol):
     def json(
@@ -29,60 +29,68 @@ class PbSafeProtocol(Protocol):
         ) -> str:
         ...
 
-class PubSubAuth(httpx.Auth):
-    def __init__(self, token: str):
-        self.token = token
-
-    def auth_flow(self, request: Request) -> typing.Generator[Request, Response, None]:
-        request.headers['Authorization'] = f"Bearer {self.token}"
-        yield request
+class PubSubAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/pubsub',)
 
 class IPubSubAdmin:
     def __init__(self) -> None:
         settings = self.get_project_settings(base_settings=True)
         project_id = settings.current_service # type: ignore
-        location_id = "us-central1"
-        token = self.get_oauth_token(scopes=['https://www.googleapis.com/auth/pubsub'])
-        self.client = AsyncClient(
-            base_url="https://pubsub.googleapis.com/v1/"
-                     f"projects/{project_id}/locations/{location_id}/",
-            auth=PubSubAuth(token),
+        self.client = make_client(
+            base_url=f"https://pubsub.googleapis.com/v1/projects/{project_id}/",
+            auth=PubSubAuth(self.get_oauth_token(scopes=list(PubSubAuth.scopes))),
         )
 
-    @abstractmethod
-    def get_oauth_token(self, scopes: List[str]) -> str:
-        ...
+    def get_oauth_token(self, scopes: List[str]) -> Optional[str]:
+        """Override to supply the token yourself, None takes it from the shared token cache."""
+        return None
 
     @abstractmethod
     def get_project_settings(self, base_settings: bool) -> Any:
         ...
 
     async def create_schema(self, schema: SchemaInput, schema_id: str) -> SchemaOutput:
-        content = schema.json(by_alias=True)
+        content = schema.json_bytes()
         res = await self.client.post(
             url="schemas",
             content=content,
             params={"schema_id": schema_id}
         )
-        assert res.status_code == 200
-        return SchemaOutput(**res.json())
+        raise_for_status(res, "Error creating schema")
+        return SchemaOutput.parse_response(res.json())
 
     async def get_schema(self, schema_name: str, schema_view: SchemaView) -> SchemaOutput:
-        res = await self.client.get(
-            url=f"schemas/{schema_name}",
-            params={"view": schema_view.value}
-        )
-        assert res.status_code == 200
-        return SchemaOutput(**res.json())
+        url = f"schemas/{schema_name}"
+        params = {"view": schema_view.value}
+
+        async def fetch() -> SchemaOutput:
+            res = await self.client.get(
+                url=url,
+                params=params
+            )
+            raise_for_status(res, "Error getting schema")
+            return SchemaOutput.parse_response(res.json())
+
+        return await request_coalescer.run(coalesce_key(self.client, "GET", url, params), fetch)
 
     async def create_topic(self, topic: TopicBase) -> TopicBase:
-        content = topic.json(exclude={"name"}, by_alias=True, exclude_unset=True)
+        content = topic.json_bytes(exclude={"name"}, exclude_unset=True)
         res = await self.client.put(
             url=f"topics/{topic.name}",
             content=content
         )
-        assert res.status_code == 200
-        return TopicBase(**res.json())
+        raise_for_status(res, "Error creating topic")
+        return TopicBase.parse_response(res.json())
+
+    async def list_topics(self, page_size: Optional[int] = None) -> AsyncIterator[TopicBase]:
+        params = {"pageSize": page_size} if page_size else None
+        async for topic in stream_list(self.client, "topics", "topics", TopicBase, params):
+            yield topic
+
+    async def list_subscriptions(self, page_size: Optional[int] = None) -> AsyncIterator[SubscriptionBase]:
+        params = {"pageSize": page_size} if page_size else None
+        async for subscription in stream_list(self.client, "subscriptions", "subscriptions", SubscriptionBase, params):
+            yield subscription
 
     async def __aenter__(self):
         return self
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from ..models.pub_sub_topics import PubSubMessageRequest, PublishToTopicResponse
+from ...base_types import JsonBase
+from .pub_sub_client import IPublisherClient
+
+MAX_MESSAGES = 1000
+"""Most messages a single publish request may carry."""
+
+MAX_BYTES = 10 * 1000 * 1000
+"""Largest publish request body accepted by the api."""
+
+_PREFIX = b'{"messages":['
+_SUFFIX = b']}'
+_EMPTY_SIZE = len(_PREFIX) + len(_SUFFIX)
+
+
+class BatchSettings:
+    """
+    A batch is sent as soon as it holds `max_messages` messages or `max_bytes`
+    of request body, or `max_latency` seconds after its first message.
+    """
+    def __init__(
+            self,
+            max_messages: int = 100,
+            max_bytes: int = 1000 * 1000,
+            max_latency: float = 0.01
+        ) -> None:
+        if not 0 < max_messages <= MAX_MESSAGES:
+            raise ValueError(f"max_messages must be between 1 and {MAX_MESSAGES}")
+        if not 0 < max_bytes <= MAX_BYTES:
+            raise ValueError(f"max_bytes must be between 1 and {MAX_BYTES}")
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+
+
+def encode_message(
+        message: JsonBase,
+        attributes: Optional[Dict[str, str]] = None,
+        ordering_key: Optional[str] = None
+    ) -> bytes:
+    """One element of a `PublishMessageBody.messages` list, as JSON bytes."""
+    encoded = PubSubMessageRequest.from_json_base(message, attributes, ordering_key).json_bytes(exclude_none=True)
+    if len(encoded) + _EMPTY_SIZE > MAX_BYTES:
+        raise ValueError(f"Message of {len(encoded)} bytes is over the {MAX_BYTES} bytes publish limit")
+    return encoded
+
+
+class MessageBatch:
+    """Encoded messages of one publish request and the futures of their ids."""
+    __slots__ = ("parts", "futures", "size")
+
+    def __init__(self) -> None:
+        self.parts: List[bytes] = []
+        self.futures: List[asyncio.Future] = []
+        self.size = _EMPTY_SIZE
+
+    def __len__(self) -> int:
+        return len(self.parts)
+
+    def fits(self, part: bytes, settings: BatchSettings) -> bool:
+        """An empty batch takes any message, a single message is never split."""
+        return not self.parts or (
+            len(self.parts) < settings.max_messages
+            and self.size + len(part) + 1 <= settings.max_bytes
+        )
+
+    def is_full(self, settings: BatchSettings) -> bool:
+        return len(self.parts) >= settings.max_messages or self.size >= settings.max_bytes
+
+    def add(self, part: bytes, future: asyncio.Future) -> None:
+        self.size += len(part) + (1 if self.parts else 0)
+        self.parts.append(part)
+        self.futures.append(future)
+
+    def body(self) -> bytes:
+        return _PREFIX + b",".join(self.parts) + _SUFFIX
+
+    def resolve(self, response: PublishToTopicResponse) -> None:
+        message_ids = response.message_ids or []
+        for future, message_id in zip(self.futures, message_ids):
+            if not future.done():
+                future.set_result(message_id)
+        if len(message_ids) < len(self.futures):
+            self.fail(ValueError(f"Publish response has {len(message_ids)} ids for {len(self.futures)} messages"))
+
+    def fail(self, exc: BaseException) -> None:
+        for future in self.futures:
+            if not future.done():
+                future.set_exception(exc)
+
+
+class BatchPublisher:
+    """
+    Buffers messages for `publisher` and publishes them in batches.
+    `publish` hands back a future of the message id right away, batches are
+    sent concurrently and failures are set on the futures of their messages.
+    Use as an async context manager, or call `aclose`, to send what is left.
+    """
+    def __init__(self, publisher: IPublisherClient, settings: Optional[BatchSettings] = None) -> None:
+        self.publisher = publisher
+        self.settings = settings or BatchSettings()
+        self._batch = MessageBatch()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()
+        self._closed = False
+
+    def publish(
+            self,
+            message: JsonBase,
+            attributes: Optional[Dict[str, str]] = None,
+            ordering_key: Optional[str] = None
+        ) -> asyncio.Future:
+        """Queues `message`, returns a future of its message id."""
+        if self._closed:
+            raise RuntimeError("BatchPublisher is closed")
+        part = encode_message(message, attributes, ordering_key)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._batch.fits(part, self.settings):
+            self._flush()
+        self._batch.add(part, future)
+        if self._batch.is_full(self.settings):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.settings.max_latency, self._flush)
+        return future
+
+    async def publish_message(self, message: JsonBase) -> PublishToTopicResponse:
+        """Same as `IPublisherClient.publish_message`, but sent as part of a batch."""
+        return PublishToTopicResponse(message_ids=[await self.publish(message)])
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, MessageBatch()
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: MessageBatch) -> None:
+        try:
+            response = await self.publisher.publish_body(batch.body())
+        except BaseException as exc:
+            batch.fail(exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+        else:
+            batch.resolve(response)
+
+    async def flush(self) -> None:
+        """Sends the pending batch and waits for every batch in flight."""
+        self._flush()
+        while self._sending:
+            await asyncio.wait(set(self._sending))
+
+    async def aclose(self) -> None:
+        self._closed = True
+        await self.flush()
+
+    async def __aenter__(self) -> BatchPublisher:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.aclose()
+
+
+class OrderingKeyPaused(RuntimeError):
+    """Publishing to an ordering key whose earlier publish failed, see `resume_publish`."""
+    def __init__(self, ordering_key: str, cause: BaseException) -> None:
+        super().__init__(f"Publishing to ordering key {ordering_key!r} is paused after: {cause!r}")
+        self.ordering_key = ordering_key
+        self.cause = cause
+
+
+class _KeyPipeline:
+    """Batches of one ordering key, sent strictly one after the other."""
+    __slots__ = ("open", "sealed", "timer", "sender", "paused")
+
+    def __init__(self) -> None:
+        self.open = MessageBatch()
+        self.sealed: Deque[MessageBatch] = deque()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.sender: Optional[asyncio.Task] = None
+        self.paused: Optional[BaseException] = None
+
+    @property
+    def idle(self) -> bool:
+        return self.sender is None and not self.sealed and not self.open and self.paused is None
+
+    def fail_all(self, exc: BaseException) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        for batch in self.sealed:
+            batch.fail(exc)
+        self.sealed.clear()
+        self.open.fail(exc)
+        self.open = MessageBatch()
+
+
+class OrderedBatchPublisher(BatchPublisher):
+    """
+    BatchPublisher keeping the order of messages sharing an ordering key.
+    Each key has its own pipeline with at most one publish in flight, while
+    different keys and messages without a key are published in parallel.
+    When a publish fails, that batch and everything queued after it for the
+    same key fail, and the key is paused: publishing to it raises
+    OrderingKeyPaused until `resume_publish` is called. Other keys carry on.
+    The subscription needs `enable_message_ordering` for the order to hold on delivery.
+    """
+    def __init__(self, publisher: IPublisherClient, settings: Optional[BatchSettings] = None) -> None:
+        super().__init__(publisher, settings)
+        self._pipelines: Dict[str, _KeyPipeline] = {}
+
+    def publish(
+            self,
+            message: JsonBase,
+            attributes: Optional[Dict[str, str]] = None,
+            ordering_key: Optional[str] = None
+        ) -> asyncio.Future:
+        if not ordering_key:
+            return super().publish(message, attributes)
+        if self._closed:
+            raise RuntimeError("BatchPublisher is closed")
+        pipeline = self._pipelines.get(ordering_key)
+        if pipeline is None:
+            pipeline = self._pipelines[ordering_key] = _KeyPipeline()
+        elif pipeline.paused is not None:
+            raise OrderingKeyPaused(ordering_key, pipeline.paused)
+        part = encode_message(message, attributes, ordering_key)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not pipeline.open.fits(part, self.settings):
+            self._seal(ordering_key)
+        pipeline.open.add(part, future)
+        if pipeline.open.is_full(self.settings):
+            self._seal(ordering_key)
+        elif pipeline.timer is None:
+            pipeline.timer = loop.call_later(self.settings.max_latency, self._seal, ordering_key)
+        return future
+
+    def resume_publish(self, ordering_key: str) -> None:
+        """Accepts messages for a paused `ordering_key` again."""
+        pipeline = self._pipelines.get(ordering_key)
+        if pipeline is not None and pipeline.paused is not None:
+            del self._pipelines[ordering_key]
+
+    def _seal(self, ordering_key: str) -> None:
+        pipeline = self._pipelines[ordering_key]
+        if pipeline.timer is not None:
+            pipeline.timer.cancel()
+            pipeline.timer = None
+        if not pipeline.open:
+            return
+        pipeline.sealed.append(pipeline.open)
+        pipeline.open = MessageBatch()
+        if pipeline.sender is None:
+            task = asyncio.get_running_loop().create_task(self._send_key(ordering_key, pipeline))
+            pipeline.sender = task
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send_key(self, ordering_key: str, pipeline: _KeyPipeline) -> None:
+        try:
+            while pipeline.sealed:
+                batch = pipeline.sealed[0]
+                try:
+                    response = await self.publisher.publish_body(batch.body())
+                except BaseException as exc:
+                    pipeline.paused = exc
+                    pipeline.fail_all(exc)
+                    if isinstance(exc, asyncio.CancelledError):
+                        raise
+                    return
+                pipeline.sealed.popleft()
+                batch.resolve(response)
+        finally:
+            pipeline.sender = None
+            if pipeline.idle and self._pipelines.get(ordering_key) is pipeline:
+                del self._pipelines[ordering_key]
+
+    async def flush(self) -> None:
+        """Sends the pending batches of every key and waits for every batch in flight."""
+        for ordering_key in list(self._pipelines):
+            self._seal(ordering_key)
+        await super().flush()
@@ -1,13 +1,11 @@
 from __future__ import annotations
 from collections.abc import Callable
 
-import typing
 from typing import Any, Optional, Protocol, Union, List
 
-import httpx
-from httpx import AsyncClient, Request, Response
-
 from ..models.pub_sub_topics import PubSubMessageRequest, PublishMessageBody, PublishToTopicResponse
+from ...auth import BearerAuth
+from ...transport import make_client, raise_for_status
 from ...base_types import JsonBase
 
 class PbSafeProtocol(Protocol):
@@ -35,13 +33,8 @@ def wrap_message(dev_topic_msg: DevTopicMessage) -> PublishMessageMonad:
     return pmm
 
 
-class PubSubAuth(httpx.Auth):
-    def __init__(self, token: str):
-        self.token = token
-
-    def auth_flow(self, request: Request) -> typing.Generator[Request, Response, None]:
-        request.headers['Authorization'] = f"Bearer {self.token}"
-        yield request
+class PubSubAuth(BearerAuth):
+    scopes = ('https://www.googleapis.com/auth/pubsub',)
 
 class SupportsPublishMessage(Protocol):
     async def publish_message(self, message: PbSafeProtocol) -> PublishToTopicResponse:
@@ -52,26 +45,31 @@ class IPublisherClient:
     project_id: str
     location_id: str
     def __init__(self) -> None:
-        token: str = "abstract_token"
-        self.client = AsyncClient(
-            base_url="https://pubsub.googleapis.com/v1/"
-                     f"projects/{self.project_id}/locations/{self.location_id}/topics/{self.topic_id}",
-            auth=PubSubAuth(token),
+        self.client = make_client(
+            base_url=f"https://pubsub.googleapis.com/v1/projects/{self.project_id}/topics",
+            auth=PubSubAuth(),
         )
 
-    def _wrap_message(self, message: JsonBase) -> str:
+    def _wrap_message(self, message: JsonBase) -> bytes:
         b64_message = PubSubMessageRequest.from_json_base(message)
         req_body = PublishMessageBody(messages=[b64_message])
-        return req_body.json(by_alias=True)
+        return req_body.json_bytes(exclude_none=True)
 
     async def publish_message(self, message: JsonBase) -> PublishToTopicResponse:
+        return await self.publish_body(self._wrap_message(message))
+
+    async def publish_body(self, body: bytes) -> PublishToTopicResponse:
+        """Publishes an already encoded `PublishMessageBody`."""
         res = await self.client.post(
-            url=":publish",
-            content=self._wrap_message(message)
+            # A leading slash, httpx would read "name:publish" as a url scheme.
+            url=f"/{self.topic_id}:publish",
+            content=body,
+            # Publishing again at worst duplicates a message, same as Google's client libraries.
+            extensions={"idempotent": True}
         )
-        assert res.status_code == 200
+        raise_for_status(res, "Error publishing message")
         message_ids_res = res.json()
-        return PublishToTopicResponse(**message_ids_res)
+        return PublishToTopicResponse.parse_response(message_ids_res)
 
     async def __aenter__(self):
         return self
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ...transport import Histogram
+from .pub_sub_acks import AckDispatcher
+
+MIN_ACK_DEADLINE = 10
+MAX_ACK_DEADLINE = 600
+
+
+class LeaseManager:
+    """
+    Keeps the ack deadline of outstanding messages ahead of their handlers.
+    Leases sit in a timer wheel of `resolution` second slots, adding and
+    removing one is O(1) whatever the number outstanding. Every tick the
+    leases due within `lead` seconds are extended in bulk through the
+    AckDispatcher, by the p99 of past handler times clamped to
+    [min_deadline, 600] seconds.
+    A message held for `max_lease_duration` seconds is no longer extended
+    and will be redelivered once its current deadline passes.
+    """
+    def __init__(
+            self,
+            acks: AckDispatcher,
+            max_lease_duration: float = 3600.0,
+            min_deadline: int = MIN_ACK_DEADLINE,
+            lead: float = 5.0,
+            resolution: float = 1.0
+        ) -> None:
+        self.acks = acks
+        self.max_lease_duration = max_lease_duration
+        self.min_deadline = min_deadline
+        self.lead = lead
+        self.resolution = resolution
+        self.handler_times = Histogram(tuple(range(MIN_ACK_DEADLINE, MAX_ACK_DEADLINE + 1)))
+        # No lease is scheduled further than MAX_ACK_DEADLINE ahead, so one turn of the wheel is enough.
+        self._slots: List[Dict[str, None]] = [{} for _ in range(math.ceil(MAX_ACK_DEADLINE / resolution) + 2)]
+        self._leases: Dict[str, Tuple[float, int]] = {}
+        """ack id -> (received at, wheel tick of its next extension)"""
+        self._tick = self._now_tick()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def _now_tick(self) -> int:
+        return int(time.monotonic() / self.resolution)
+
+    @property
+    def deadline(self) -> int:
+        """Seconds each extension is for, from the p99 handler time."""
+        p99 = self.handler_times.percentile(0.99)
+        if p99 is None:
+            return self.min_deadline
+        return int(min(MAX_ACK_DEADLINE, max(self.min_deadline, p99)))
+
+    def _schedule(self, ack_id: str, received: float, expires: float) -> None:
+        tick = max(int((expires - self.lead) / self.resolution), self._tick + 1)
+        self._slots[tick % len(self._slots)][ack_id] = None
+        self._leases[ack_id] = (received, tick)
+
+    def add(self, ack_id: str, ack_deadline: float = MIN_ACK_DEADLINE) -> None:
+        """Starts leasing a message just received with `ack_deadline` seconds to go."""
+        now = time.monotonic()
+        self._schedule(ack_id, now, now + ack_deadline)
+
+    def remove(self, ack_id: str, handled: bool = True) -> None:
+        """
+        Stops leasing `ack_id` once acked or nacked.
+        :param handled: Records the time since receipt as a handler time.
+        """
+        lease = self._leases.pop(ack_id, None)
+        if lease is None:
+            return
+        received, tick = lease
+        self._slots[tick % len(self._slots)].pop(ack_id, None)
+        if handled:
+            self.handler_times.observe(time.monotonic() - received)
+
+    def extend_due(self) -> int:
+        """Extends every lease due by now, returns how many were extended."""
+        now_tick = self._now_tick()
+        due: List[str] = []
+        # A stalled loop can't fall behind by more than one turn of the wheel.
+        start = max(self._tick + 1, now_tick - len(self._slots) + 1)
+        for tick in range(start, now_tick + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if slot:
+                due.extend(slot)
+                slot.clear()
+        self._tick = now_tick
+        if not due:
+            return 0
+        now = time.monotonic()
+        deadline = self.deadline
+        extended: List[str] = []
+        for ack_id in due:
+            received = self._leases[ack_id][0]
+            if now - received >= self.max_lease_duration:
+                del self._leases[ack_id]
+                continue
+            self._schedule(ack_id, received, now + deadline)
+            extended.append(ack_id)
+        if extended:
+            self.acks.modify_ack_deadlines(extended, deadline)
+        return len(extended)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.resolution)
+            self.extend_due()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
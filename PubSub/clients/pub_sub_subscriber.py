@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from ..models.pub_sub_records import ReceivedMessageRecord
+from ..models.pub_sub_subscription_functions import pull
+from ..models.pub_sub_subscriptions import PullRequest
+from ..models.pub_sub_types import StreamingPullRequest
+from ...transport import default_retry_policy, make_client
+from .pub_sub_acks import AckDispatcher
+from .pub_sub_client import PubSubAuth
+from .pub_sub_leases import MIN_ACK_DEADLINE, LeaseManager
+
+logger = logging.getLogger(__name__)
+
+MessageCallback = Callable[[ReceivedMessageRecord], Awaitable[None]]
+ErrorCallback = Callable[[BaseException], None]
+
+MAX_PULL_MESSAGES = 1000
+
+
+class FlowControl:
+    """
+    Caps on messages handed to the callback and not yet acked or nacked.
+    The message cap is exact, the bytes cap can be overshot by one pull response
+    since sizes are only known once messages arrive.
+    """
+    def __init__(
+            self,
+            max_outstanding_messages: int = 1000,
+            max_outstanding_bytes: int = 100 * 1024 * 1024
+        ) -> None:
+        self.max_outstanding_messages = max_outstanding_messages
+        self.max_outstanding_bytes = max_outstanding_bytes
+
+    @classmethod
+    def from_streaming_pull(cls, request: StreamingPullRequest) -> FlowControl:
+        flow_control = cls()
+        if request.max_outstanding_messages:
+            flow_control.max_outstanding_messages = int(request.max_outstanding_messages)
+        if request.max_outstanding_bytes:
+            flow_control.max_outstanding_bytes = int(request.max_outstanding_bytes)
+        return flow_control
+
+
+class ISubscriberClient:
+    """
+    Pulls `subscription_id` with `pull_loops` concurrent pull requests and
+    runs `callback` for every message on at most `workers` tasks.
+    A message is acked when the callback returns and nacked when it raises,
+    acks and nacks are sent in bulk by an AckDispatcher. Ack deadlines of
+    messages being handled are extended by a LeaseManager for up to
+    `max_lease_duration` seconds.
+    Pulling pauses while the outstanding messages or bytes are at the
+    `flow_control` limits.
+    StreamingPull is gRPC only, the REST `:pull` call is used instead.
+    :param ack_deadline: Ack deadline set on the subscription, in seconds.
+    :param on_error: Called with callback, pull and ack errors, which are logged when it isn't given.
+        A failing pull never stops its loop, it is retried with backoff.
+    """
+    project_id: str
+    subscription_id: str
+
+    def __init__(
+            self,
+            callback: MessageCallback,
+            flow_control: Optional[FlowControl] = None,
+            pull_loops: int = 2,
+            workers: int = 16,
+            max_messages: int = 100,
+            pull_timeout: float = 60.0,
+            ack_deadline: int = MIN_ACK_DEADLINE,
+            max_lease_duration: float = 3600.0,
+            on_error: Optional[ErrorCallback] = None
+        ) -> None:
+        self.client = make_client(
+            base_url=f"https://pubsub.googleapis.com/v1/projects/{self.project_id}/subscriptions",
+            auth=PubSubAuth(),
+        )
+        self.callback = callback
+        self.flow_control = flow_control or FlowControl()
+        self.pull_loops = pull_loops
+        self.workers = workers
+        self.max_messages = min(max_messages, MAX_PULL_MESSAGES)
+        self.pull_timeout = pull_timeout
+        self.ack_deadline = ack_deadline
+        self.on_error = on_error
+        self.acks = AckDispatcher(self.client, self.subscription_id, on_error=self._report)
+        self.leases = LeaseManager(self.acks, max_lease_duration)
+        self.outstanding_messages = 0
+        self.outstanding_bytes = 0
+        self._reserved = 0
+        self._capacity = asyncio.Event()
+        self._queue: asyncio.Queue[ReceivedMessageRecord] = asyncio.Queue()
+        self._pullers: List[asyncio.Task] = []
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._pullers:
+            return
+        loop = asyncio.get_running_loop()
+        self.leases.start()
+        self._workers = [loop.create_task(self._work()) for _ in range(self.workers)]
+        self._pullers = [loop.create_task(self._pull_loop()) for _ in range(self.pull_loops)]
+
+    async def stop(self) -> None:
+        """Stops pulling and returns once every message already pulled has been handled and acked."""
+        pullers, self._pullers = self._pullers, []
+        for task in pullers:
+            task.cancel()
+        await asyncio.gather(*pullers, return_exceptions=True)
+        await self._queue.join()
+        await self.leases.stop()
+        await self.acks.flush()
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def _report(self, exc: BaseException) -> None:
+        if self.on_error is not None:
+            self.on_error(exc)
+        else:
+            logger.error("Subscriber %s: %r", self.subscription_id, exc, exc_info=exc)
+
+    def _free_slots(self) -> int:
+        if self.outstanding_bytes >= self.flow_control.max_outstanding_bytes:
+            return 0
+        return self.flow_control.max_outstanding_messages - self.outstanding_messages - self._reserved
+
+    async def _reserve(self) -> int:
+        """Waits for room under the flow control limits, returns how many messages to pull."""
+        while True:
+            free = min(self._free_slots(), self.max_messages)
+            if free > 0:
+                self._reserved += free
+                return free
+            self._capacity.clear()
+            await self._capacity.wait()
+
+    def _release(self, record: ReceivedMessageRecord) -> None:
+        self.outstanding_messages -= 1
+        self.outstanding_bytes -= record.message.size
+        self._capacity.set()
+
+    async def _pull_loop(self) -> None:
+        failures = 0
+        while True:
+            reserved = await self._reserve()
+            try:
+                records = await pull(self.client, self.subscription_id, PullRequest(max_messages=reserved), self.pull_timeout)
+            except Exception as exc:
+                # Api, transport and malformed response errors alike, the loop must keep pulling.
+                self._report(exc)
+                failures += 1
+                await asyncio.sleep(default_retry_policy.backoff(failures))
+                continue
+            finally:
+                self._reserved -= reserved
+                self._capacity.set()
+            failures = 0
+            for record in records:
+                self.leases.add(record.ack_id, self.ack_deadline)
+                self.outstanding_messages += 1
+                self.outstanding_bytes += record.message.size
+                self._queue.put_nowait(record)
+
+    async def _work(self) -> None:
+        while True:
+            record = await self._queue.get()
+            try:
+                try:
+                    await self.callback(record)
+                except Exception as exc:
+                    self._report(exc)
+                    self.leases.remove(record.ack_id, handled=False)
+                    self.acks.nack(record.ack_id)
+                else:
+                    self.leases.remove(record.ack_id)
+                    self.acks.ack(record.ack_id)
+            finally:
+                self._release(record)
+                self._queue.task_done()
+
+    async def __aenter__(self) -> ISubscriberClient:
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.stop()
+        await self.client.aclose()
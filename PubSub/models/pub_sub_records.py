@@ -0,0 +1,134 @@
+"""
+Lightweight records for the receive path.
+Pulling subscribers hold thousands of messages in flight, so these use
+`__slots__` instead of pydantic models, keep attributes as a tuple of pairs
+and only decode `data` / `publish_time` when they are read.
+"""
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...base_types import zulu_decode, zulu_encode
+from .pub_sub_types import PubsubMessage, ReceivedMessage
+
+Attributes = Tuple[Tuple[str, str], ...]
+
+
+class MessageRecord:
+    __slots__ = ("data", "_attributes", "message_id", "_publish_time", "ordering_key", "_decoded")
+
+    def __init__(
+            self,
+            data: Optional[str] = None,
+            attributes: Optional[Attributes] = None,
+            message_id: Optional[str] = None,
+            publish_time: Optional[str] = None,
+            ordering_key: Optional[str] = None
+        ) -> None:
+        # Still base64 encoded, as sent by the API.
+        self.data = data
+        self._attributes = attributes
+        self.message_id = message_id
+        self._publish_time = publish_time
+        self.ordering_key = ordering_key
+        self._decoded: Optional[bytes] = None
+
+    @property
+    def decoded_data(self) -> bytes:
+        if self._decoded is None:
+            self._decoded = base64.b64decode(self.data) if self.data else b""
+        return self._decoded
+
+    @property
+    def attributes(self) -> Optional[Dict[str, str]]:
+        return dict(self._attributes) if self._attributes is not None else None
+
+    @property
+    def publish_time(self) -> Optional[datetime]:
+        return zulu_decode(self._publish_time) if self._publish_time else None
+
+    def _precise_publish_time(self) -> Optional[datetime]:
+        """`publish_time` keeping the nanoseconds a plain datetime would truncate."""
+        return zulu_decode(self._publish_time, keep_nanos=True) if self._publish_time else None
+
+    @property
+    def size(self) -> int:
+        """Approximate payload size in bytes, used for flow control."""
+        return len(self.data) * 3 // 4 if self.data else 0
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> MessageRecord:
+        attributes = data.get("attributes")
+        return cls(
+            data.get("data"),
+            tuple(attributes.items()) if attributes is not None else None,
+            data.get("messageId"),
+            data.get("publishTime"),
+            data.get("orderingKey"),
+        )
+
+    @classmethod
+    def from_model(cls, message: PubsubMessage) -> MessageRecord:
+        return cls(
+            message.data,
+            tuple(message.attributes.items()) if message.attributes is not None else None,
+            message.message_id,
+            zulu_encode(message.publish_time) if message.publish_time else None,
+            message.ordering_key,
+        )
+
+    def to_model(self) -> PubsubMessage:
+        return PubsubMessage(
+            data=self.data,
+            attributes=self.attributes,
+            message_id=self.message_id,
+            publish_time=self._precise_publish_time(),
+            ordering_key=self.ordering_key,
+        )
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(message_id={self.message_id!r}, ordering_key={self.ordering_key!r})"
+
+
+class ReceivedMessageRecord:
+    __slots__ = ("ack_id", "message", "delivery_attempt")
+
+    def __init__(self, ack_id: Optional[str], message: MessageRecord, delivery_attempt: int = 0) -> None:
+        self.ack_id = ack_id
+        self.message = message
+        self.delivery_attempt = delivery_attempt
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> ReceivedMessageRecord:
+        return cls(
+            data.get("ackId"),
+            MessageRecord.from_json(data.get("message") or {}),
+            data.get("deliveryAttempt", 0),
+        )
+
+    @classmethod
+    def from_model(cls, received: ReceivedMessage) -> ReceivedMessageRecord:
+        return cls(received.ack_id, MessageRecord.from_model(received.message), received.delivery_attempt)
+
+    def to_model(self) -> ReceivedMessage:
+        return ReceivedMessage(
+            ack_id=self.ack_id,
+            message=self.message.to_model(),
+            delivery_attempt=self.delivery_attempt,
+        )
+
+    def __repr__(self) -> str:
+        return f"ReceivedMessageRecord(ack_id={self.ack_id!r}, message={self.message!r})"
+
+
+def parse_received_messages(data: Dict[str, Any]) -> List[ReceivedMessageRecord]:
+    """
+    Reads the received messages of a pull or streaming pull response body.
+    Pull responses use `receivedMessages`, the StreamingPullResponse model `receivedMessage`.
+    """
+    received = data.get("receivedMessages")
+    if received is None:
+        received = data.get("receivedMessage") or []
+    return [ReceivedMessageRecord.from_json(item) for item in received]
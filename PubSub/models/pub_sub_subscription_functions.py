@@ -1,6 +1,10 @@
+from typing import List
+
 from httpx import AsyncClient
 
-from .pub_sub_subscriptions import AckRequest
+from ...transport import raise_for_status
+from .pub_sub_records import ReceivedMessageRecord, parse_received_messages
+from .pub_sub_subscriptions import AckRequest, ModifyAckDeadlineRequest, PullRequest
 
 async def acknowledge(
         client: AsyncClient,
@@ -8,9 +12,44 @@ async def acknowledge(
         ack_request: AckRequest
     ) -> None:
     res = await client.post(
-        url=f"{subscription}:acknowledge",
-        content=ack_request.json(by_alias=True)
+        # A leading slash, httpx would read "name:acknowledge" as a url scheme.
+        url=f"/{subscription.lstrip('/')}:acknowledge",
+        content=ack_request.json_bytes(),
+        extensions={"idempotent": True}
     )
-    if res.status_code != 200:
-        raise Exception()
+    raise_for_status(res, "Error acknowledging messages")
     return
+
+async def modify_ack_deadline(
+        client: AsyncClient,
+        subscription: str,
+        request: ModifyAckDeadlineRequest
+    ) -> None:
+    """A deadline of 0 seconds nacks the messages, making them available for redelivery."""
+    res = await client.post(
+        url=f"/{subscription.lstrip('/')}:modifyAckDeadline",
+        content=request.json_bytes(),
+        extensions={"idempotent": True}
+    )
+    raise_for_status(res, "Error modifying ack deadlines")
+    return
+
+async def pull(
+        client: AsyncClient,
+        subscription: str,
+        request: PullRequest,
+        timeout: float = 60.0
+    ) -> List[ReceivedMessageRecord]:
+    """
+    Waits up to `timeout` seconds for messages, an empty list means none arrived.
+    Safe to retry, messages of a lost response are redelivered after their ack deadline.
+    Sent as a long poll, outside the api's concurrency limiter and retry deadline.
+    """
+    res = await client.post(
+        url=f"/{subscription.lstrip('/')}:pull",
+        content=request.json_bytes(),
+        timeout=timeout,
+        extensions={"idempotent": True, "long_poll": True}
+    )
+    raise_for_status(res, "Error pulling messages")
+    return parse_received_messages(res.json())
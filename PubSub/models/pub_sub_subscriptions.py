@@ -103,3 +103,20 @@ class APIConfigSubscription(SubscriptionBase):
 
 class AckRequest(JsonBase):
     ack_ids: List[str]
+
+class ModifyAckDeadlineRequest(JsonBase):
+    ack_ids: List[str]
+    ack_deadline_seconds: int
+
+class PullRequest(JsonBase):
+    max_messages: int
+
+
+SubscriptionBase.update_forward_refs()
+PushConfigSubscription.update_forward_refs()
+PushConfig.update_forward_refs()
+BigqueryConfigSubscription.update_forward_refs()
+BigQueryConfig.update_forward_refs()
+CloudStorageConfigSubscription.update_forward_refs()
+CloudStorageConfig.update_forward_refs()
+APIConfigSubscription.update_forward_refs()
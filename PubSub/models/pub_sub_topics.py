@@ -36,13 +36,17 @@ class PublishToTopicResponse(JsonBase):
 
 class PubSubMessageRequest(JsonBase):
     data: bytes
+    attributes: Optional[Dict[str, str]] = None
+    ordering_key: Optional[str] = None
     @classmethod
-    def from_json_base(cls, instance: JsonBase) -> PubSubMessageRequest:
-        as_bytes = bytes(
-            instance.json(by_alias=True), encoding="utf-8"
-        )
-        as_b64 = base64.b64encode(as_bytes)
-        return PubSubMessageRequest(data=as_b64)
+    def from_json_base(
+            cls,
+            instance: JsonBase,
+            attributes: Optional[Dict[str, str]] = None,
+            ordering_key: Optional[str] = None
+        ) -> PubSubMessageRequest:
+        as_b64 = base64.b64encode(instance.json_bytes())
+        return PubSubMessageRequest(data=as_b64, attributes=attributes, ordering_key=ordering_key)
 
 class PublishMessageBody(JsonBase):
     messages: List[PubSubMessageRequest]
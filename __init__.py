@@ -1,6 +1,60 @@
-from .auth import *
-from .CloudTasks import *
-from .PubSub import *
-from .CloudSQL import *
-from .DriveClient import *
-from .CloudScheduler import *
+"""
+Services are imported lazily on first attribute access, so importing the
+package (or only PubSub) doesn't pull in every SDK, psycopg and all models.
+"""
+import ast
+import functools
+import importlib
+import importlib.util
+import sys
+import types
+from typing import Dict
+
+_SUBMODULES = ("auth", "CloudTasks", "PubSub", "CloudSQL", "DriveClient", "CloudScheduler")
+
+
+@functools.lru_cache(maxsize=None)
+def _exports() -> Dict[str, str]:
+    """
+    Public names and the service they come from, a later service winning a clash.
+    Read from the `__all__` each service declares, parsed from its source so
+    nothing is imported until a name is actually used.
+    """
+    exports: Dict[str, str] = {}
+    for submodule in _SUBMODULES:
+        origin = importlib.util.find_spec(f".{submodule}", __name__).origin
+        with open(origin, encoding="utf-8") as file:
+            tree = ast.parse(file.read(), origin)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "__all__" for target in node.targets):
+                exports.update(dict.fromkeys(ast.literal_eval(node.value), submodule))
+    return exports
+
+
+def __getattr__(name: str):
+    # Anything else, dunder probes included, fails without importing a service.
+    if name == "__all__":
+        return list(_exports())
+    submodule = _exports().get(name)
+    if submodule is not None:
+        value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_exports()))
+
+
+class _Package(types.ModuleType):
+    """Keeps `DriveClient` the class rather than the subpackage the import system binds over it."""
+    def __setattr__(self, name: str, value) -> None:
+        if name in _SUBMODULES and name in _exports() and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
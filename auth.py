@@ -1,56 +1,408 @@
 from __future__ import annotations
 
-from google.cloud.iam_credentials import IAMCredentialsClient
-import google.auth
+import asyncio
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import (
+    TYPE_CHECKING, AsyncGenerator, Dict, FrozenSet, Generator, Iterable, Iterator, NamedTuple, Optional, Sequence,
+    Tuple, Union
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on windows
+    fcntl = None
+
+import httpx
+from httpx import Request, Response
+
+from .transport.coalesce import Coalescer
+from .transport.instrumentation import metrics
+
+if TYPE_CHECKING:
+    # The google SDKs are slow to import, they are loaded on first use instead.
+    from google.cloud.iam_credentials import IAMCredentialsClient
+
+
+__all__ = [
+    "async_get_oauth_token",
+    "async_token_provider",
+    "AsyncTokenProvider",
+    "BearerAuth",
+    "CachedToken",
+    "FileTokenStore",
+    "get_creds",
+    "get_drive_oauth_token",
+    "get_oauth_token",
+    "get_pubsub_oath_token",
+    "get_scheduler_oauth_token",
+    "get_sql_oauth_token",
+    "token_cache",
+    "TokenCache",
+]
+
+
+DEFAULT_SERVICE_ACCOUNT = 'colndev-405100@appspot.gserviceaccount.com'
+
+TokenKey = Tuple[str, FrozenSet[str]]
+
+
+class CachedToken(NamedTuple):
+    access_token: str
+    expires_at: float
+    """Expiry of the token as a unix timestamp."""
+
+
+class FileTokenStore:
+    """
+    Token store shared by every process on a host.
+    Tokens live in one JSON file that is only ever replaced atomically, so
+    readers never take a lock. Refreshes are serialised across processes with
+    an exclusive flock on a sidecar `.lock` file.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    @staticmethod
+    def key_to_str(key: TokenKey) -> str:
+        service_account, scopes = key
+        return f"{service_account} {' '.join(sorted(scopes))}"
+
+    def load(self, key: TokenKey) -> Optional[CachedToken]:
+        entry = self._read().get(self.key_to_str(key))
+        if entry is None:
+            return None
+        return CachedToken(*entry)
+
+    def save(self, key: TokenKey, token: CachedToken) -> None:
+        """Writes `token` for `key`. Callers should hold `lock()`."""
+        tokens = self._read()
+        tokens[self.key_to_str(key)] = list(token)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(tokens, fh)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read(self) -> Dict[str, list]:
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+class TokenCache:
+    """
+    Process-wide cache of IAM access tokens keyed by (service account, scopes).
+    Tokens are handed back until `expiry_margin` seconds before their
+    `expire_time`, and a single IAMCredentialsClient is shared by every mint.
+    Once a token is within `refresh_margin` seconds of expiry async callers
+    start refreshing it in the background while still being handed the old one.
+    With a `store` tokens are shared with the other processes on the host and
+    only one process mints a given key at a time.
+    """
+    def __init__(
+            self,
+            expiry_margin: float = 60.0,
+            refresh_margin: float = 300.0,
+            store: Optional[FileTokenStore] = None
+        ) -> None:
+        self.expiry_margin = expiry_margin
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self._tokens: Dict[TokenKey, CachedToken] = {}
+        self._locks: Dict[TokenKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._client: Optional[IAMCredentialsClient] = None
+
+    @property
+    def client(self) -> IAMCredentialsClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google.cloud.iam_credentials import IAMCredentialsClient
+                    self._client = IAMCredentialsClient()
+        return self._client
+
+    @staticmethod
+    def make_key(
+            scopes: Union[str, Iterable[str]],
+            service_account: str = DEFAULT_SERVICE_ACCOUNT
+        ) -> TokenKey:
+        if isinstance(scopes, str):
+            scopes = [scopes]
+        return service_account, frozenset(scopes)
+
+    def is_fresh(self, token: CachedToken) -> bool:
+        return token.expires_at - self.expiry_margin > time.time()
+
+    def needs_refresh(self, token: CachedToken) -> bool:
+        return token.expires_at - self.refresh_margin <= time.time()
+
+    def peek(self, key: TokenKey) -> Optional[CachedToken]:
+        """Returns the cached token for `key` if it is still fresh."""
+        cached = self._tokens.get(key)
+        if cached is not None and self.is_fresh(cached):
+            return cached
+        return None
+
+    def get(
+            self,
+            scopes: Union[str, Iterable[str]],
+            service_account: str = DEFAULT_SERVICE_ACCOUNT
+        ) -> str:
+        return self.get_token(self.make_key(scopes, service_account)).access_token
+
+    def get_token(self, key: TokenKey, stale: Optional[CachedToken] = None) -> CachedToken:
+        """
+        Returns a fresh token for `key`, minting one if needed.
+        :param stale: A token the caller knows to be bad or about to expire.
+            It is replaced unless another caller already did so.
+        """
+        cached = self.peek(key)
+        if cached is not None and cached != stale:
+            return cached
+        with self._key_lock(key):
+            cached = self.peek(key)
+            if cached is None or cached == stale:
+                cached = self._from_store(key, stale)
+            if cached is None:
+                cached = self._mint_shared(key, stale)
+        return cached
+
+    def mint(self, key: TokenKey) -> CachedToken:
+        """Generates a new token for `key` and stores it, ignoring the cache."""
+        service_account, scopes = key
+        start = time.perf_counter()
+        response = self.client.generate_access_token(
+            name=f'projects/-/serviceAccounts/{service_account}',
+            scope=sorted(scopes)
+        )
+        metrics.observe_auth_refresh(time.perf_counter() - start)
+        token = CachedToken(
+            access_token=response.access_token,
+            expires_at=response.expire_time.timestamp()
+        )
+        self._tokens[key] = token
+        return token
+
+    def _from_store(self, key: TokenKey, stale: Optional[CachedToken]) -> Optional[CachedToken]:
+        if self.store is None:
+            return None
+        stored = self.store.load(key)
+        if stored is None or stored == stale or not self.is_fresh(stored):
+            return None
+        if stale is None and self.needs_refresh(stored):
+            return None
+        self._tokens[key] = stored
+        return stored
+
+    def _mint_shared(self, key: TokenKey, stale: Optional[CachedToken]) -> CachedToken:
+        if self.store is None:
+            return self.mint(key)
+        with self.store.lock():
+            # Another process may have refreshed while we waited on the lock.
+            cached = self._from_store(key, stale)
+            if cached is None:
+                cached = self.mint(key)
+                self.store.save(key, cached)
+        return cached
+
+    def put(self, key: TokenKey, token: CachedToken) -> None:
+        """Caches a token obtained elsewhere, it isn't written to the store."""
+        self._tokens[key] = token
+
+    def invalidate(
+            self,
+            scopes: Union[str, Iterable[str]],
+            service_account: str = DEFAULT_SERVICE_ACCOUNT
+        ) -> None:
+        self._tokens.pop(self.make_key(scopes, service_account), None)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    def _key_lock(self, key: TokenKey) -> threading.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+
+class AsyncTokenProvider:
+    """
+    Async front for a TokenCache. Minting runs in a worker thread so the event
+    loop never blocks on IAM, and concurrent callers for the same key await a
+    single in-flight mint instead of each starting their own.
+    Tokens close to expiry are refreshed in the background so requests never
+    wait on a mint once the first token exists.
+    """
+    def __init__(self, cache: TokenCache) -> None:
+        self.cache = cache
+        self._flights = Coalescer()
+
+    async def get(
+            self,
+            scopes: Union[str, Iterable[str]],
+            service_account: str = DEFAULT_SERVICE_ACCOUNT
+        ) -> str:
+        token = await self.get_token(self.cache.make_key(scopes, service_account))
+        return token.access_token
+
+    async def get_token(self, key: TokenKey) -> CachedToken:
+        cached = self.cache.peek(key)
+        if cached is None:
+            return await self.refresh(key)
+        if self.cache.needs_refresh(cached):
+            self._single_flight(key, cached)
+        return cached
+
+    async def refresh(self, key: TokenKey, stale: Optional[CachedToken] = None) -> CachedToken:
+        """Replaces `stale` (or a missing/expired token) and waits for the result."""
+        return await asyncio.shield(self._single_flight(key, stale))
+
+    def _single_flight(self, key: TokenKey, stale: Optional[CachedToken]) -> asyncio.Task:
+        return self._flights.start(key, lambda: asyncio.to_thread(self.cache.get_token, key, stale))
+
+
+def _default_store() -> Optional[FileTokenStore]:
+    path = os.environ.get("GCLOUD_JSON_TOKEN_STORE", None)
+    return FileTokenStore(path) if path else None
+
+
+token_cache = TokenCache(store=_default_store())
+async_token_provider = AsyncTokenProvider(token_cache)
+
+
+class BearerAuth(httpx.Auth):
+    """
+    Sets a bearer token on every request.
+    A fixed `token` is used as is, otherwise a token for `scopes` is taken from
+    the shared cache, off the event loop when used from an AsyncClient.
+    Subclasses may override the `token` property to supply their own tokens,
+    returning None falls back to the cache.
+    Cached tokens rejected with a 401 are refreshed once and the request replayed.
+    Requests carry the `identity` they are sent with as the "credential" extension.
+    """
+    scopes: Sequence[str] = ()
+    service_account: str = DEFAULT_SERVICE_ACCOUNT
+
+    def __init__(
+            self,
+            token: Optional[str] = None,
+            scopes: Optional[Iterable[str]] = None,
+            provider: Optional[AsyncTokenProvider] = None
+        ) -> None:
+        # Not through `token`, which subclasses may have made a read-only property.
+        self._token = token
+        if scopes is not None:
+            self.scopes = tuple(scopes)
+        self.provider = provider or async_token_provider
+
+    @property
+    def token(self) -> Optional[str]:
+        return self._token
+
+    @token.setter
+    def token(self, value: Optional[str]) -> None:
+        self._token = value
+
+    @property
+    def token_key(self) -> TokenKey:
+        return self.provider.cache.make_key(self.scopes, self.service_account)
+
+    @property
+    def identity(self) -> Tuple[str, ...]:
+        """The credential requests are sent with, without the token itself."""
+        if self.token is not None:
+            return "token", hashlib.sha256(self.token.encode()).hexdigest()
+        service_account, scopes = self.token_key
+        return ("service_account", service_account, *sorted(scopes))
+
+    def sync_get_token(self) -> str:
+        if self.token is not None:
+            return self.token
+        return self.provider.cache.get_token(self.token_key).access_token
+
+    async def async_get_token(self) -> str:
+        if self.token is not None:
+            return self.token
+        token = await self.provider.get_token(self.token_key)
+        return token.access_token
+
+    def sync_auth_flow(self, request: Request) -> Generator[Request, Response, None]:
+        token = self.sync_get_token()
+        request.headers['Authorization'] = f"Bearer {token}"
+        request.extensions["credential"] = self.identity
+        response = yield request
+        if response.status_code == 401 and self.token is None:
+            refreshed = self.provider.cache.get_token(self.token_key, self._cached(token))
+            request.headers['Authorization'] = f"Bearer {refreshed.access_token}"
+            yield request
+
+    async def async_auth_flow(self, request: Request) -> AsyncGenerator[Request, Response]:
+        token = await self.async_get_token()
+        request.headers['Authorization'] = f"Bearer {token}"
+        request.extensions["credential"] = self.identity
+        response = yield request
+        if response.status_code == 401 and self.token is None:
+            refreshed = await self.provider.refresh(self.token_key, self._cached(token))
+            request.headers['Authorization'] = f"Bearer {refreshed.access_token}"
+            yield request
+
+    def _cached(self, access_token: str) -> Optional[CachedToken]:
+        cached = self.provider.cache.peek(self.token_key)
+        if cached is not None and cached.access_token == access_token:
+            return cached
+        return None
 
 
 async def get_creds():
-    creds, project = google.auth.default()
+    import google.auth
+    creds, project = await asyncio.to_thread(google.auth.default)
     return creds, project
 
 
 def get_oauth_token(scope: str):
-    client = IAMCredentialsClient()
-    service_account = 'colndev-405100@appspot.gserviceaccount.com'
-    iam_sa_name = f'projects/-/serviceAccounts/{service_account}'
-    request = client.generate_access_token(
-        name=iam_sa_name,
-        scope=[scope]
-    )
-    return request.access_token
+    return token_cache.get(scope)
 
 
 async def async_get_oauth_token():
-    client = IAMCredentialsClient()
-    service_account = 'colndev-405100@appspot.gserviceaccount.com'
-    iam_sa_name = f'projects/-/serviceAccounts/{service_account}'
-    request = client.generate_access_token(
-        name=iam_sa_name,
-        scope=['https://www.googleapis.com/auth/sqlservice.login']
-    )
-    return request.access_token
+    return await async_token_provider.get('https://www.googleapis.com/auth/sqlservice.login')
 
 
 def get_sql_oauth_token():
-    client = IAMCredentialsClient()
-    service_account = 'colndev-405100@appspot.gserviceaccount.com'
-    iam_sa_name = f'projects/-/serviceAccounts/{service_account}'
-    request = client.generate_access_token(
-        name=iam_sa_name,
-        scope=['https://www.googleapis.com/auth/sqlservice.admin']
-    )
-    return request.access_token
+    return get_oauth_token('https://www.googleapis.com/auth/sqlservice.admin')
 
 
 def get_drive_oauth_token():
-    client = IAMCredentialsClient()
-    service_account = 'colndev-405100@appspot.gserviceaccount.com'
-    iam_sa_name = f'projects/-/serviceAccounts/{service_account}'
-    request = client.generate_access_token(
-        name=iam_sa_name,
-        scope=['https://www.googleapis.com/auth/drive']
-    )
-    return request.access_token
+    return get_oauth_token('https://www.googleapis.com/auth/drive')
 
 
 def get_pubsub_oath_token():
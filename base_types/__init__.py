@@ -1 +1,4 @@
 from .google_api_types import *
+from .zulu import *
+from .decoding import *
+from .streaming import *
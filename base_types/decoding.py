@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import (
+    SHAPE_DICT, SHAPE_LIST, SHAPE_MAPPING, SHAPE_SEQUENCE, SHAPE_SET, SHAPE_SINGLETON, ModelField
+)
+from pydantic.validators import bool_validator, bytes_validator, float_validator, int_validator, str_validator
+
+from .zulu import zulu_decode
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+Decoder = Callable[[Any], Any]
+
+
+class DecodeSettings:
+    """
+    trusted: Build models from server JSON without running pydantic validation.
+    debug: Always validate, even when `trusted` is on.
+    Both default from the GCLOUD_JSON_TRUSTED_DECODE / GCLOUD_JSON_DEBUG env vars.
+    """
+    def __init__(self) -> None:
+        self.trusted = bool(os.environ.get("GCLOUD_JSON_TRUSTED_DECODE", None))
+        self.debug = bool(os.environ.get("GCLOUD_JSON_DEBUG", None))
+
+
+decode_settings = DecodeSettings()
+
+FieldDecoder = Tuple[Optional[Decoder], Optional[type]]
+"""The conversion a JSON value needs, and the type of values needing none."""
+
+_alias_maps: Dict[Type[BaseModel], Dict[str, Tuple[str, Optional[Decoder], Optional[type]]]] = {}
+
+# Checked in order: str and int enums are handled as enums before these, bools aren't ints.
+_SCALARS: Tuple[Tuple[type, Decoder], ...] = (
+    (bool, bool_validator),
+    (int, int_validator),
+    (float, float_validator),
+    (str, str_validator),
+    (bytes, bytes_validator),
+)
+
+
+def _decode_datetime(val: Any) -> Any:
+    return zulu_decode(val) if isinstance(val, str) else val
+
+
+def _item_decoder(type_: Any) -> FieldDecoder:
+    if not isinstance(type_, type):
+        return None, None
+    if issubclass(type_, BaseModel):
+        return lambda val: trusted_parse(type_, val), None
+    if issubclass(type_, datetime):
+        return _decode_datetime, None
+    if issubclass(type_, Enum):
+        return type_, None
+    for scalar, validator in _SCALARS:
+        if issubclass(type_, scalar):
+            # pydantic's own conversion, e.g. int64 values Google sends as strings.
+            return validator, scalar
+    return None, None
+
+
+def _validating_decoder(cls: Type[BaseModel], field: ModelField) -> Decoder:
+    """Full pydantic validation of one field, for what has no cheap conversion."""
+    def decode(val: Any) -> Any:
+        value, errors = field.validate(val, {}, loc=field.alias, cls=cls)
+        if errors:
+            raise ValidationError([errors], cls)
+        return value
+    return decode
+
+
+def _union_decoder(cls: Type[BaseModel], field: ModelField) -> Decoder:
+    """
+    Tries the members left to right like pydantic does. Only enums and scalars
+    are tried cheaply, as a trusted model or timestamp would never fail over
+    to the next member.
+    """
+    validate = _validating_decoder(cls, field)
+    members = []
+    for member in get_args(field.type_):
+        if member is type(None):
+            continue
+        decoder, exact = _item_decoder(member)
+        if exact is None and not (isinstance(member, type) and issubclass(member, Enum)):
+            return validate
+        members.append((decoder, exact))
+
+    def decode(val: Any) -> Any:
+        for decoder, exact in members:
+            if type(val) is exact:
+                return val
+            try:
+                return decoder(val)
+            except (ValueError, TypeError):
+                pass
+        return validate(val)
+    return decode
+
+
+def _field_decoder(cls: Type[BaseModel], field: ModelField) -> FieldDecoder:
+    if set(field.class_validators) - {"_decode_zulu"}:
+        # Field validators may reshape the value.
+        return _validating_decoder(cls, field), None
+    if get_origin(field.type_) is Union:
+        if field.shape == SHAPE_SINGLETON:
+            return _union_decoder(cls, field), None
+        return _validating_decoder(cls, field), None
+    item, exact = _item_decoder(field.type_)
+    if item is None or field.shape == SHAPE_SINGLETON:
+        return item, exact
+    if field.shape in (SHAPE_LIST, SHAPE_SEQUENCE):
+        return lambda val: [v if type(v) is exact else item(v) for v in val], None
+    if field.shape == SHAPE_SET:
+        return lambda val: {v if type(v) is exact else item(v) for v in val}, None
+    if field.shape in (SHAPE_DICT, SHAPE_MAPPING):
+        return lambda val: {k: v if type(v) is exact else item(v) for k, v in val.items()}, None
+    return _validating_decoder(cls, field), None
+
+
+def compile_alias_map(cls: Type[BaseModel]) -> Dict[str, Tuple[str, Optional[Decoder], Optional[type]]]:
+    """
+    Maps every json key (alias and field name) of `cls` to its field name,
+    the minimal conversion its value needs and the type needing none.
+    Runs once per class.
+    """
+    alias_map = _alias_maps.get(cls)
+    if alias_map is None:
+        alias_map = {}
+        for name, field in cls.__fields__.items():
+            entry = (name, *_field_decoder(cls, field))
+            alias_map[name] = entry
+            alias_map[field.alias] = entry
+        _alias_maps[cls] = alias_map
+    return alias_map
+
+
+def trusted_parse(cls: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """
+    Builds `cls` from trusted JSON with `construct`, converting only what
+    differs from the JSON types: nested models, enums, timestamps and scalars
+    such as int64 values sent as strings. Unions of enums and scalars are
+    tried member by member, other unions, fields with validators and other
+    shapes get pydantic's full validation. Unknown keys are dropped.
+    """
+    alias_map = compile_alias_map(cls)
+    values = {}
+    for key, val in data.items():
+        entry = alias_map.get(key)
+        if entry is None:
+            continue
+        name, decoder, exact = entry
+        if decoder is not None and val is not None and type(val) is not exact:
+            val = decoder(val)
+        values[name] = val
+    return cls.construct(_fields_set=set(values), **values)
+
+
+def parse_response(cls: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    if decode_settings.trusted and not decode_settings.debug:
+        return trusted_parse(cls, data)
+    return cls.parse_obj(data)
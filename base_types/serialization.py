@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+import json
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+from pydantic.json import pydantic_encoder
+
+from .zulu import zulu_encode
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is used without it
+    orjson = None
+
+_SCALARS = (str, int, float, bool)
+
+CompiledField = Tuple[str, str, bool]
+"""(field name, json key, value needs no conversion)"""
+
+_compiled: Dict[Type[BaseModel], Tuple[CompiledField, ...]] = {}
+
+
+def compile_model(cls: Type[BaseModel]) -> Tuple[CompiledField, ...]:
+    """
+    Precomputes the camelCase key and conversion needs of every field of `cls`.
+    Runs once per class, on first use so forward refs are already resolved.
+    """
+    compiled = _compiled.get(cls)
+    if compiled is None:
+        compiled = tuple(
+            (
+                name,
+                field.alias,
+                field.shape == SHAPE_SINGLETON and field.type_ in _SCALARS,
+            )
+            for name, field in cls.__fields__.items()
+        )
+        _compiled[cls] = compiled
+    return compiled
+
+
+def model_to_primitive(
+        model: BaseModel,
+        exclude_unset: bool = False,
+        exclude_none: bool = False,
+        exclude: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+    """Equivalent of `model.dict(by_alias=True)` with values already JSON ready."""
+    out: Dict[str, Any] = {}
+    values = model.__dict__
+    fields_set = model.__fields_set__ if exclude_unset else None
+    for name, key, scalar in compile_model(type(model)):
+        if exclude is not None and name in exclude:
+            continue
+        if fields_set is not None and name not in fields_set:
+            continue
+        value = values.get(name)
+        if value is None:
+            if not exclude_none:
+                out[key] = None
+            continue
+        out[key] = value if scalar else to_primitive(value, exclude_unset, exclude_none)
+    return out
+
+
+def to_primitive(value: Any, exclude_unset: bool = False, exclude_none: bool = False) -> Any:
+    if value is None or type(value) in _SCALARS:
+        return value
+    if isinstance(value, BaseModel):
+        return model_to_primitive(value, exclude_unset, exclude_none)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_primitive(item, exclude_unset, exclude_none) for item in value]
+    if isinstance(value, dict):
+        return {key: to_primitive(item, exclude_unset, exclude_none) for key, item in value.items()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return zulu_encode(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    return pydantic_encoder(value)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=pydantic_encoder).encode()
+
+
+dumps: Callable[[Any], bytes] = orjson.dumps if orjson is not None else _stdlib_dumps
+"""Serialises already primitive data to JSON bytes, using orjson when installed."""
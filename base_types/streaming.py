@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+from json.decoder import WHITESPACE
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, TypeVar
+
+from httpx import AsyncClient, Response
+
+from ..transport import raise_for_status
+from .decoding import parse_response
+
+ModelT = TypeVar("ModelT")
+
+_decoder = json.JSONDecoder()
+
+_NEXT_STRUCTURAL = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*[\[\]{}"]', re.DOTALL)
+"""Skips text and whole strings up to the next bracket, or the quote of a string that hasn't fully arrived."""
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+"""String content up to its closing quote, stopping short of a trailing backslash."""
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for list responses shaped like `{"<field>": [...], ...}`.
+    Text is fed in chunks and elements of `field` are returned as soon as they
+    are complete, so only one element is buffered at a time. Every other top
+    level value (e.g. `nextPageToken`) is collected in `extra`.
+    A value split across chunks is scanned once, resuming where the previous
+    chunk ended, and only decoded when all of it has arrived.
+    """
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.extra: Dict[str, Any] = {}
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        # Progress through a value that isn't complete yet, relative to `_pos`.
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, text: str) -> List[Any]:
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += text
+        items: List[Any] = []
+        while self._step(items):
+            pass
+        return items
+
+    def close(self) -> None:
+        if self._state != "done" or self._buf[self._pos:].strip():
+            raise ValueError(f"Truncated or invalid JSON list response for field {self.field!r}")
+
+    def _skip_ws(self) -> Optional[str]:
+        self._pos = WHITESPACE.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _value_end(self) -> Optional[int]:
+        """End of the value at the cursor, None until all of it has arrived."""
+        buf, start = self._buf, self._pos
+        if not self._scanned and buf[start] not in '{["':
+            # Numbers and literals end at a delimiter, "2." might be "2.5" once the next chunk is in.
+            match = _SCALAR_END.search(buf, start)
+            return match.start() if match else None
+        pos, depth, in_string = start + self._scanned, self._depth, self._in_string
+        if not self._scanned and buf[start] == '"':
+            pos, in_string = start + 1, True
+        if in_string:
+            pos = _STRING_REST.match(buf, pos).end()
+            if pos == len(buf) or buf[pos] != '"':
+                return self._suspend(pos, depth, True)
+            pos += 1
+            if not depth:
+                return self._resume_at_start(pos)
+        # Only brackets reach Python, everything between them is skipped by the regex.
+        while True:
+            match = _NEXT_STRUCTURAL.match(buf, pos)
+            if match is None:
+                return self._suspend(len(buf), depth, False)
+            pos = match.end()
+            char = buf[pos - 1]
+            if char == '"':
+                return self._suspend(_STRING_REST.match(buf, pos).end(), depth, True)
+            if char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if not depth:
+                    return self._resume_at_start(pos)
+
+    def _suspend(self, pos: int, depth: int, in_string: bool) -> None:
+        """Remembers how far an incomplete value has been scanned, to resume from there."""
+        self._scanned, self._depth, self._in_string = pos - self._pos, depth, in_string
+
+    def _resume_at_start(self, end: int) -> int:
+        self._scanned, self._depth, self._in_string = 0, 0, False
+        return end
+
+    def _decode(self) -> tuple:
+        """Decodes the value at the cursor, (False, None) until it is complete."""
+        end = self._value_end()
+        if end is None:
+            return False, None
+        value, stop = _decoder.raw_decode(self._buf, self._pos)
+        if stop != end:
+            raise ValueError(f"Invalid JSON value at {self._buf[self._pos:end]!r}")
+        self._pos = end
+        return True, value
+
+    def _step(self, items: List[Any]) -> bool:
+        char = self._skip_ws()
+        if char is None or self._state == "done":
+            return False
+        if self._state == "start":
+            if char != "{":
+                raise ValueError(f"Expected a JSON object, got {char!r}")
+            self._pos += 1
+            self._state = "key"
+        elif self._state == "key":
+            if char == ",":
+                self._pos += 1
+            elif char == "}":
+                self._pos += 1
+                self._state = "done"
+            else:
+                done, key = self._decode()
+                if not done:
+                    return False
+                self._key = key
+                self._state = "colon"
+        elif self._state == "colon":
+            if char != ":":
+                raise ValueError(f"Expected ':' after key {self._key!r}")
+            self._pos += 1
+            self._state = "array_start" if self._key == self.field else "value"
+        elif self._state == "array_start":
+            if char != "[":
+                raise ValueError(f"Expected {self.field!r} to be a JSON array")
+            self._pos += 1
+            self._state = "items"
+        elif self._state == "value":
+            done, value = self._decode()
+            if not done:
+                return False
+            self.extra[self._key] = value
+            self._state = "key"
+        elif self._state == "items":
+            if char == ",":
+                self._pos += 1
+            elif char == "]":
+                self._pos += 1
+                self._state = "key"
+            else:
+                done, item = self._decode()
+                if not done:
+                    return False
+                items.append(item)
+        return True
+
+
+async def _iter_items(response: Response, parser: JsonArrayStream, model: Optional[Type[ModelT]]) -> AsyncIterator[ModelT]:
+    if not response.is_success:
+        await response.aread()
+        raise_for_status(response, "Error listing resources")
+    async for chunk in response.aiter_text():
+        for item in parser.feed(chunk):
+            yield parse_response(model, item) if model is not None else item
+    parser.close()
+
+
+async def stream_response_items(
+        response: Response,
+        field: str,
+        model: Optional[Type[ModelT]] = None
+    ) -> AsyncIterator[ModelT]:
+    """
+    Yields the elements of `field` from a streamed response one at a time,
+    built into `model` with `parse_response` when given.
+    Non-2xx responses raise GoogleApiError.
+    """
+    async for item in _iter_items(response, JsonArrayStream(field), model):
+        yield item
+
+
+async def stream_list(
+        client: AsyncClient,
+        url: str,
+        field: str,
+        model: Optional[Type[ModelT]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[ModelT]:
+    """
+    Streams every element of a paginated Google list endpoint, following
+    `nextPageToken` until the last page.
+    """
+    params = dict(params or {})
+    while True:
+        parser = JsonArrayStream(field)
+        async with client.stream("GET", url, params=params) as response:
+            async for item in _iter_items(response, parser, model):
+                yield item
+        next_page = parser.extra.get("nextPageToken")
+        if not next_page:
+            return
+        params["pageToken"] = next_page
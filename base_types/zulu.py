@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import re
+from typing import Iterable, List
+
+from pydantic.datetime_parse import parse_datetime
+
+_RFC3339 = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[Tt ](\d{2}):(\d{2}):(\d{2})"
+    r"(?:\.(\d{1,9}))?"
+    r"(?:([Zz])|([+-])(\d{2}):(\d{2}))$"
+)
+
+
+def _fraction(nanos: int) -> str:
+    # Same precision rules as protobuf's Timestamp.ToJsonString.
+    if nanos == 0:
+        return ""
+    if nanos % 1_000_000 == 0:
+        return f".{nanos // 1_000_000:03d}"
+    if nanos % 1_000 == 0:
+        return f".{nanos // 1_000:06d}"
+    return f".{nanos:09d}"
+
+
+def _encode(dt: datetime, nanos: int) -> str:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return (
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T"
+        f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+        f"{_fraction(nanos)}Z"
+    )
+
+
+@lru_cache(maxsize=4096)
+def _cached_encode(dt: datetime, fold: int) -> str:
+    # `fold` is part of the key: aware datetimes differing only in it compare equal
+    # but can fall on different sides of a DST change.
+    return _encode(dt, dt.microsecond * 1000)
+
+
+def zulu_encode(dt: datetime) -> str:
+    """
+    Formats `dt` as an RFC3339 UTC ("Zulu") string the way Google APIs expect.
+    Naive datetimes are treated as UTC.
+    Datetimes carrying a `nanosecond` attribute (proto-plus's DatetimeWithNanoseconds)
+    keep their full precision.
+    """
+    if type(dt) is datetime:
+        return _cached_encode(dt, dt.fold)
+    nanos = getattr(dt, "nanosecond", None)
+    if nanos is None:
+        nanos = dt.microsecond * 1000
+    return _encode(dt, nanos)
+
+
+def zulu_decode(value: str, keep_nanos: bool = False) -> datetime:
+    """
+    Parses an RFC3339 timestamp into an aware UTC datetime.
+    Fractions beyond microseconds are truncated, unless `keep_nanos` is set:
+    those timestamps are then returned as proto-plus's DatetimeWithNanoseconds,
+    which `zulu_encode` writes back out at full precision.
+    Anything else, e.g. a timestamp without an offset, is parsed the way
+    pydantic parses datetime fields, naive values staying naive.
+    """
+    match = _RFC3339.match(value)
+    if match is None:
+        return parse_datetime(value)
+    year, month, day, hour, minute, second, fraction, zulu, sign, off_h, off_m = match.groups()
+    microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+    dt = datetime(
+        int(year), int(month), int(day),
+        int(hour), int(minute), int(second), microsecond,
+        tzinfo=timezone.utc
+    )
+    if zulu is None:
+        offset = timedelta(hours=int(off_h), minutes=int(off_m))
+        dt = dt - offset if sign == "+" else dt + offset
+    if keep_nanos and len(fraction or "") > 6:
+        # Only imported for sub-microsecond timestamps, it pulls in google.protobuf.
+        from proto.datetime_helpers import DatetimeWithNanoseconds
+        dt = DatetimeWithNanoseconds(
+            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second,
+            nanosecond=int(fraction.ljust(9, "0")), tzinfo=timezone.utc
+        )
+    return dt
+
+
+def zulu_encode_many(values: Iterable[datetime]) -> List[str]:
+    encode = zulu_encode
+    return [encode(dt) for dt in values]
+
+
+def zulu_decode_many(values: Iterable[str]) -> List[datetime]:
+    decode = zulu_decode
+    return [decode(value) for value in values]
@@ -0,0 +1,233 @@
+"""
+Throughput, latency and allocations per call of every client against the
+in-process fake Google API, through the full transport stack (limiter,
+retries, cache, metrics hooks, auth).
+Run with `python -m google_http.benchmarks.clients [--latency 0.005 --error-rate 0.01]`,
+prints one JSON line per case.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from ..auth import BearerAuth, CachedToken
+from ..base_types import JsonBase
+from ..CloudScheduler.cloud_scheduler_client import (
+    HttpMethod, ICloudSchedulerAuth, ICloudSchedulerClient, MinimalCreateJob
+)
+from ..CloudTasks import PushQueue
+from ..CloudTasks.models import CreateHTTPTaskRequest
+from ..DriveClient import DriveClient
+from ..PubSub.clients.pub_sub_client import IPublisherClient, PubSubAuth
+from ..PubSub.models.pub_sub_subscription_functions import acknowledge
+from ..PubSub.models.pub_sub_subscriptions import AckRequest
+from ..transport import GoogleApiError, make_client, pool_settings
+from .fake_google import TIMESTAMP, FakeGoogleApi
+
+PROJECT = "bench-project"
+LOCATION = "us-central1"
+
+
+class BenchMessage(JsonBase):
+    event: str
+    user_id: int
+    payload: Dict[str, str]
+
+
+class BenchPublisher(IPublisherClient):
+    topic_id = "bench-topic"
+    project_id = PROJECT
+    location_id = LOCATION
+
+
+class BenchScheduler(ICloudSchedulerClient):
+    project_id = PROJECT
+    location_id = LOCATION
+    auth = ICloudSchedulerAuth()
+
+
+MESSAGE = BenchMessage(event="signup", user_id=42, payload={f"key{i}": "x" * 32 for i in range(8)})
+
+ACK_REQUEST = AckRequest(ack_ids=[f"ack-{i}" for i in range(100)])
+
+_ATTEMPT = {
+    "scheduleTime": TIMESTAMP,
+    "dispatchTime": TIMESTAMP,
+    "responseTime": TIMESTAMP,
+    "responseStatus": {"code": 0, "message": "", "details": []},
+}
+
+TASK = CreateHTTPTaskRequest.parse_obj({"task": {
+    "name": f"projects/{PROJECT}/locations/{LOCATION}/queues/bench-queue/tasks/bench",
+    "scheduleTime": TIMESTAMP,
+    "dispatchDeadline": "600s",
+    "dispatchCount": 0,
+    "responseCount": 0,
+    "firstAttempt": _ATTEMPT,
+    "lastAttempt": _ATTEMPT,
+    "httpRequest": {"url": "https://example.com/task", "httpMethod": "POST"},
+}})
+
+JOB = MinimalCreateJob(relative_uri="/bench", http_method=HttpMethod.post, body=MESSAGE)
+
+
+class Case(NamedTuple):
+    name: str
+    build: Callable[[], Any]
+    """Returns the client, entered with `async with` for the run."""
+    call: Callable[[Any, int], Awaitable[Any]]
+    """Makes call number i with the client."""
+
+
+async def _collect(iterator: Any) -> int:
+    return len([item async for item in iterator])
+
+
+CASES: List[Case] = [
+    Case("pubsub.publish", BenchPublisher, lambda client, i: client.publish_message(MESSAGE)),
+    Case(
+        "pubsub.acknowledge",
+        lambda: make_client(f"https://pubsub.googleapis.com/v1/projects/{PROJECT}/subscriptions", auth=PubSubAuth()),
+        lambda client, i: acknowledge(client, "bench-sub", ACK_REQUEST)
+    ),
+    Case("tasks.get_queue", lambda: PushQueue("bench-queue", PROJECT, LOCATION), lambda client, i: client.get_queue()),
+    Case("tasks.create_task", lambda: PushQueue("bench-queue", PROJECT, LOCATION), lambda client, i: client.create_task(TASK)),
+    Case("tasks.list_queues", lambda: PushQueue("bench-queue", PROJECT, LOCATION), lambda client, i: _collect(client.list_queues())),
+    Case("drive.get_file_metadata", DriveClient, lambda client, i: client.get_file_metadata(f"file-{i}")),
+    Case("drive.list_files", DriveClient, lambda client, i: _collect(client.list_files())),
+    Case("scheduler.create_job", BenchScheduler, lambda client, i: client.create_job(JOB)),
+    Case("scheduler.list_jobs", BenchScheduler, lambda client, i: _collect(client.list_jobs())),
+]
+
+
+def seed_tokens(*auths: BearerAuth) -> None:
+    """Caches a long lived token for every auth so no call reaches IAM."""
+    for auth in auths:
+        auth.provider.cache.put(auth.token_key, CachedToken("bench-token", time.time() + 86400))
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _timed(case: Case, client: Any, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    calls = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in calls:
+            start = time.perf_counter()
+            try:
+                await case.call(client, i)
+            except GoogleApiError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "errors": errors,
+    }
+
+
+async def _allocations(case: Case, client: Any, samples: int) -> Dict[str, Any]:
+    """Peak traced bytes and retained bytes per call, measured one call at a time."""
+    peak = retained = 0
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            try:
+                await case.call(client, i)
+            except GoogleApiError:
+                pass
+            current, call_peak = tracemalloc.get_traced_memory()
+            peak += call_peak - before
+            retained += current - before
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_bytes_per_call": peak // samples,
+        "alloc_retained_bytes_per_call": retained // samples,
+    }
+
+
+async def run_case(case: Case, requests: int, concurrency: int, alloc_samples: int, warmup: int = 20) -> Dict[str, Any]:
+    client = case.build()
+    seed_tokens(client.client.auth if hasattr(client, "client") else client.auth)
+    async with client:
+        for i in range(warmup):
+            try:
+                await case.call(client, i)
+            except GoogleApiError:
+                pass
+        result = await _timed(case, client, requests, concurrency)
+        if alloc_samples:
+            result.update(await _allocations(case, client, alloc_samples))
+    return result
+
+
+async def run(
+        requests: int = 2000,
+        concurrency: int = 16,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        alloc_samples: int = 200,
+        cases: Optional[List[str]] = None,
+        seed: Optional[int] = 0
+    ) -> List[Dict[str, Any]]:
+    results = []
+    previous = pool_settings.transport
+    try:
+        for case in CASES:
+            if cases and not any(case.name.startswith(name) for name in cases):
+                continue
+            fake = FakeGoogleApi(latency=latency, error_rate=error_rate, seed=seed)
+            pool_settings.transport = fake.transport()
+            result = await run_case(case, requests, concurrency, alloc_samples)
+            results.append({
+                "benchmark": "clients",
+                "case": case.name,
+                "requests": requests,
+                "concurrency": concurrency,
+                "latency_ms": latency * 1000,
+                "error_rate": error_rate,
+                **result,
+                "http_requests": fake.requests,
+                "injected_errors": fake.errors,
+            })
+    finally:
+        pool_settings.transport = previous
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per case.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Callers sharing one client.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fake response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake responses that are 503s.")
+    parser.add_argument("--alloc-samples", type=int, default=200, help="Calls traced for allocations, 0 to skip.")
+    parser.add_argument("--case", action="append", dest="cases", help="Only run cases starting with this name.")
+    args = parser.parse_args()
+    results = asyncio.run(run(
+        args.requests, args.concurrency, args.latency, args.error_rate, args.alloc_samples, args.cases
+    ))
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-response cost of validated vs trusted decoding of typical Google API responses.
+Run with `python -m google_http.benchmarks.decode`, prints one JSON line per model.
+"""
+from __future__ import annotations
+
+import json
+import timeit
+from typing import Any, Dict, List, Tuple, Type
+
+from ..base_types import JsonBase, trusted_parse
+from ..CloudSQL.models import SqlConnection
+from ..CloudScheduler.cloud_scheduler_client import CronJobRead
+from ..CloudTasks.models import JsonPushQueueOutput
+from ..PubSub.models.pub_sub_schemas import SchemaOutput
+from ..PubSub.models.pub_sub_topics import PublishToTopicResponse
+
+SAMPLES: List[Tuple[Type[JsonBase], Dict[str, Any]]] = [
+    (PublishToTopicResponse, {"messageIds": [str(i) for i in range(10)]}),
+    (JsonPushQueueOutput, {
+        "name": "projects/p/locations/us-central1/queues/q",
+        "rateLimits": {"maxDispatchesPerSecond": 500, "maxBurstSize": 100, "maxConcurrentDispatches": 1000},
+        "retryConfig": {"maxAttempts": 100, "minBackoff": "0.100s", "maxBackoff": "3600s", "maxDoublings": 16},
+        "stackdriverLoggingConfig": {"samplingRatio": 1.0},
+        "state": "RUNNING",
+        "type": "PUSH",
+    }),
+    (SchemaOutput, {
+        "name": "projects/p/schemas/s",
+        "type": "AVRO",
+        "definition": '{"type": "record", "name": "r", "fields": []}',
+        "revisionId": "abc123",
+        "revisionCreateTime": "2024-01-02T03:04:05.123456789Z",
+    }),
+    (SqlConnection, {
+        "kind": "sql#connectSettings",
+        "serverCaCert": {
+            "kind": "sql#sslCert",
+            "certSerialNumber": "0",
+            "cert": "-----BEGIN CERTIFICATE-----",
+            "createTime": "2024-01-02T03:04:05.123Z",
+            "commonName": "C=US,O=Google\\, Inc",
+            "expirationTime": "2034-01-02T03:04:05.123Z",
+            "sha1Fingerprint": "ab" * 20,
+            "instance": "db",
+        },
+        "ipAddresses": [{"type": "PRIMARY", "ipAddress": "10.0.0.1"}],
+        "region": "us-east1",
+        "databaseVersion": "POSTGRES_15",
+        "backendType": "SECOND_GEN",
+    }),
+    (CronJobRead, {
+        "name": "projects/p/locations/us-east1/jobs/j",
+        "schedule": "0 8 */10 * *",
+        "timeZone": "Etc/UTC",
+        "userUpdateTime": "2024-01-02T03:04:05Z",
+        "state": "ENABLED",
+        "scheduleTime": "2024-01-12T08:00:00Z",
+        "retryConfig": {"maxRetryDuration": "15s", "minBackoffDuration": "3.5s",
+                        "maxBackoffDuration": "3.5s", "maxDoublings": 5},
+        "appEngineHttpTarget": {"httpMethod": "POST", "relativeUri": "/print_something",
+                                "headers": {"Content-Type": "application/json"}, "body": "e30="},
+    }),
+]
+
+
+def per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def run(number: int = 2000) -> List[Dict[str, Any]]:
+    results = []
+    for model, data in SAMPLES:
+        validated = per_call_us(lambda: model.parse_obj(data), number)
+        trusted = per_call_us(lambda: trusted_parse(model, data), number)
+        results.append({
+            "benchmark": "decode",
+            "model": model.__name__,
+            "validated_us": round(validated, 3),
+            "trusted_us": round(trusted, 3),
+            "speedup": round(validated / trusted, 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(json.dumps(result))
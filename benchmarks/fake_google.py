@@ -0,0 +1,211 @@
+"""
+In-process stand-in for the Google APIs used by the clients, served through
+`httpx.MockTransport` so benchmarks measure the Python side without GCP access.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from httpx import MockTransport, Request, Response
+
+Route = Callable[[Request, "re.Match[str]"], Tuple[int, Any]]
+
+_STATUS_NAMES = {
+    408: "DEADLINE_EXCEEDED",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    502: "UNAVAILABLE",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+
+TIMESTAMP = "2024-01-02T03:04:05.123456Z"
+
+
+def _body(request: Request) -> Dict[str, Any]:
+    content = request.content
+    if request.headers.get("Content-Encoding") == "gzip":
+        content = gzip.decompress(content)
+    return json.loads(content) if content else {}
+
+
+class FakeGoogleApi:
+    """
+    Answers PubSub publish/pull/acknowledge/modifyAckDeadline, Cloud Tasks
+    queues and tasks, Drive files and Cloud Scheduler jobs with canned
+    but well formed responses. Unknown routes get a 404.
+    :param latency: Seconds every response is delayed by.
+    :param error_rate: Share of requests answered with `error_status` instead.
+    :param page_size: Default size of list pages, `pages` of them are served.
+    :param seed: Seed of the error injection, for repeatable runs.
+    """
+    def __init__(
+            self,
+            latency: float = 0.0,
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            page_size: int = 50,
+            pages: int = 2,
+            seed: Optional[int] = None
+        ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.page_size = page_size
+        self.pages = pages
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._next_id = 0
+        self.routes: List[Tuple[str, str, Pattern[str], Route]] = [
+            ("pubsub.googleapis.com", "POST", re.compile(r"/topics/[^/:]+/?:publish$"), self.publish),
+            ("pubsub.googleapis.com", "POST", re.compile(r"/subscriptions/([^/:]+)/?:pull$"), self.pull),
+            ("pubsub.googleapis.com", "POST", re.compile(r"/subscriptions/[^/:]+/?:acknowledge$"), self.empty),
+            ("pubsub.googleapis.com", "POST", re.compile(r"/subscriptions/[^/:]+/?:modifyAckDeadline$"), self.empty),
+            ("cloudtasks.googleapis.com", "GET", re.compile(r"(/projects/.+/queues)/([^/]+)$"), self.get_queue),
+            ("cloudtasks.googleapis.com", "GET", re.compile(r"(/projects/.+/queues)/?$"), self.list_queues),
+            ("cloudtasks.googleapis.com", "POST", re.compile(r"(/projects/.+/queues/[^/]+?)(?:/tasks)?$"), self.create_task),
+            ("cloudtasks.googleapis.com", "POST", re.compile(r"/queues/?$"), self.create_queue),
+            ("cloudtasks.googleapis.com", "DELETE", re.compile(r"/queues/[^/]+$"), self.empty),
+            ("www.googleapis.com", "GET", re.compile(r"/drive/v3/files/([^/]+)$"), self.get_file),
+            ("www.googleapis.com", "GET", re.compile(r"/drive/v3/files/?$"), self.list_files),
+            ("cloudscheduler.googleapis.com", "POST", re.compile(r"(/projects/.+/jobs)/?$"), self.create_job),
+            ("cloudscheduler.googleapis.com", "GET", re.compile(r"(/projects/.+/jobs)/?$"), self.list_jobs),
+        ]
+
+    def transport(self) -> MockTransport:
+        return MockTransport(self.handler)
+
+    async def handler(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return self._error(self.error_status, "Injected failure")
+        for host, method, pattern, route in self.routes:
+            if request.url.host != host or request.method != method:
+                continue
+            match = pattern.search(request.url.path)
+            if match is not None:
+                status_code, payload = route(request, match)
+                return Response(status_code, json=payload)
+        return self._error(404, f"No fake route for {request.method} {request.url.path}")
+
+    @staticmethod
+    def _error(status_code: int, message: str) -> Response:
+        status = _STATUS_NAMES.get(status_code, "NOT_FOUND" if status_code == 404 else "UNKNOWN")
+        return Response(status_code, json={"error": {"code": status_code, "message": message, "status": status}})
+
+    def _ids(self, count: int) -> List[str]:
+        start = self._next_id
+        self._next_id += count
+        return [str(i) for i in range(start, start + count)]
+
+    def _page(self, request: Request, items: Callable[[int], Dict[str, Any]], field: str) -> Dict[str, Any]:
+        page_size = int(request.url.params.get("pageSize") or self.page_size)
+        page = int(request.url.params.get("pageToken") or 0)
+        payload: Dict[str, Any] = {field: [items(page * page_size + i) for i in range(page_size)]}
+        if page + 1 < self.pages:
+            payload["nextPageToken"] = str(page + 1)
+        return payload
+
+    # PubSub
+
+    def publish(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, {"messageIds": self._ids(len(_body(request).get("messages", [])))}
+
+    def pull(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        count = int(_body(request).get("maxMessages", 1))
+        return 200, {"receivedMessages": [
+            {
+                "ackId": f"{match.group(1)}-ack-{message_id}",
+                "message": {
+                    "data": "eyJoZWxsbyI6ICJ3b3JsZCJ9",
+                    "attributes": {"source": "fake"},
+                    "messageId": message_id,
+                    "publishTime": TIMESTAMP,
+                },
+                "deliveryAttempt": 1,
+            }
+            for message_id in self._ids(count)
+        ]}
+
+    def empty(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, {}
+
+    # Cloud Tasks
+
+    @staticmethod
+    def queue(name: str) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "rateLimits": {"maxDispatchesPerSecond": 500, "maxBurstSize": 100, "maxConcurrentDispatches": 1000},
+            "retryConfig": {"maxAttempts": 100, "minBackoff": "0.100s", "maxBackoff": "3600s", "maxDoublings": 16},
+            "stackdriverLoggingConfig": {"samplingRatio": 1.0},
+            "state": "RUNNING",
+            "type": "PUSH",
+        }
+
+    def get_queue(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, self.queue(f"{match.group(1).lstrip('/')}/{match.group(2)}")
+
+    def list_queues(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        parent = match.group(1).lstrip("/")
+        return 200, self._page(request, lambda i: self.queue(f"{parent}/queue-{i}"), "queues")
+
+    def create_queue(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, {**self.queue(_body(request).get("name", "")), **_body(request), "state": "RUNNING"}
+
+    def create_task(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        task = _body(request).get("task", {})
+        return 200, {**task, "name": f"{match.group(1).lstrip('/')}/tasks/{self._ids(1)[0]}"}
+
+    # Drive
+
+    @staticmethod
+    def file(file_id: str) -> Dict[str, Any]:
+        return {
+            "kind": "drive#file",
+            "id": file_id,
+            "name": f"{file_id}.xlsx",
+            "mimeType": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "size": "48213",
+            "modifiedTime": TIMESTAMP,
+            "parents": ["root"],
+        }
+
+    def get_file(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, self.file(match.group(1))
+
+    def list_files(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        return 200, self._page(request, lambda i: self.file(f"file-{i}"), "files")
+
+    # Cloud Scheduler
+
+    @staticmethod
+    def job(name: str, created: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            "schedule": "0 8 */10 * *",
+            "retryConfig": {"retryCount": 0, "maxRetryDuration": "15s"},
+            "appEngineHttpTarget": {"httpMethod": "POST", "relativeUri": "/", "headers": {}, "body": ""},
+            **(created or {}),
+            "name": name,
+            "timeZone": "Etc/UTC",
+            "userUpdateTime": TIMESTAMP,
+            "state": "ENABLED",
+            "scheduleTime": TIMESTAMP,
+        }
+
+    def create_job(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        name = f"{match.group(1).lstrip('/')}/job-{self._ids(1)[0]}"
+        return 200, self.job(name, _body(request))
+
+    def list_jobs(self, request: Request, match: re.Match[str]) -> Tuple[int, Any]:
+        parent = match.group(1).lstrip("/")
+        return 200, self._page(request, lambda i: self.job(f"{parent}/job-{i}"), "jobs")
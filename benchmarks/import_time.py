@@ -0,0 +1,71 @@
+"""
+Import cost of the package and of each service, measured in fresh interpreters.
+Run with `python -m google_http.benchmarks.import_time`, prints one JSON line per
+case and exits non-zero if a case loads an SDK it doesn't need.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+HEAVY_MODULES = ("google.cloud.iam_credentials", "google.cloud.secretmanager", "psycopg", "google.protobuf")
+
+CASES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("package", f"import {PACKAGE}", HEAVY_MODULES),
+    ("pubsub", f"from {PACKAGE}.PubSub import IPublisherClient", HEAVY_MODULES),
+    ("tasks", f"from {PACKAGE}.CloudTasks import PushQueue", HEAVY_MODULES),
+    ("drive", f"from {PACKAGE}.DriveClient import DriveClient", HEAVY_MODULES),
+    ("scheduler", f"from {PACKAGE}.CloudScheduler import ICloudSchedulerClient", HEAVY_MODULES),
+    ("sql", f"from {PACKAGE}.CloudSQL import ICloudSQLClient", ()),
+]
+"""(name, statement, modules the statement must not load)"""
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(statement: str, repeat: int = 5) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(out.stdout))
+    return {"seconds": min(run["seconds"] for run in runs), "modules": runs[0]["modules"]}
+
+
+def run(repeat: int = 5) -> List[Dict[str, Any]]:
+    results = []
+    for name, statement, forbidden in CASES:
+        measured = measure(statement, repeat)
+        loaded = [
+            heavy for heavy in forbidden
+            if any(mod == heavy or mod.startswith(f"{heavy}.") for mod in measured["modules"])
+        ]
+        results.append({
+            "benchmark": "import_time",
+            "case": name,
+            "ms": round(measured["seconds"] * 1000, 2),
+            "modules": len(measured["modules"]),
+            "unexpected_imports": loaded,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    for result in results:
+        print(json.dumps(result))
+    sys.exit(1 if any(result["unexpected_imports"] for result in results) else 0)
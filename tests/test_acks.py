@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import httpx
+from pydantic import ValidationError
+
+from ..PubSub.clients import pub_sub_acks
+from ..PubSub.clients.pub_sub_acks import AckDispatcher, AckError, chunk_ack_ids, confirmation_from_error
+from ..transport import GoogleApiError, default_retry_policy
+
+
+def test_unexpected_send_errors_reach_on_error():
+    errors = []
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        dispatcher = AckDispatcher(client, "projects/p/subscriptions/s", on_error=errors.append)
+        # Fails while building the request, before anything is sent.
+        dispatcher.modify_ack_deadline("ack-1", "soon")
+        await dispatcher.flush()
+        await client.aclose()
+
+    asyncio.run(main())
+    assert len(errors) == 1 and isinstance(errors[0], AckError)
+    assert errors[0].ack_ids == ["ack-1"] and isinstance(errors[0].cause, ValidationError)
+
+
+def test_chunks_stay_under_the_id_limit(monkeypatch):
+    monkeypatch.setattr(pub_sub_acks, "MAX_ACK_IDS", 3)
+    ids = [str(i) for i in range(7)]
+    assert list(chunk_ack_ids(ids)) == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+    assert list(chunk_ack_ids([])) == []
+
+
+def test_chunks_stay_under_the_byte_limit(monkeypatch):
+    # Request overhead plus two ids of 10 bytes with their quotes and comma.
+    monkeypatch.setattr(pub_sub_acks, "MAX_ACK_REQUEST_BYTES", 64 + 2 * 13)
+    ids = ["a" * 10, "b" * 10, "c" * 10, "d" * 100]
+    assert list(chunk_ack_ids(ids)) == [ids[:2], ids[2:3], ids[3:]]
+
+
+def error(body, status_code=400):
+    response = httpx.Response(status_code, json=body)
+    return GoogleApiError("failed", status_code, response)
+
+
+def test_confirmation_from_error_info():
+    exc = error({"error": {"details": [
+        {"@type": "type.googleapis.com/google.rpc.BadRequest"},
+        {"@type": "type.googleapis.com/google.rpc.ErrorInfo", "metadata": {
+            "b": "TRANSIENT_FAILURE_UNORDERED_ACK_ID",
+            "c": "PERMANENT_FAILURE_INVALID_ACK_ID",
+        }},
+    ]}})
+    confirmation = confirmation_from_error(["a", "b", "c"], exc)
+    assert confirmation.ack_ids == ["a"]
+    assert confirmation.temporary_failed_ack_ids == ["b"]
+    assert confirmation.invalid_ack_ids == ["c"]
+
+
+def test_no_confirmation_without_per_id_metadata():
+    assert confirmation_from_error(["a"], GoogleApiError("failed")) is None
+    assert confirmation_from_error(["a"], error({"error": {"message": "nope"}})) is None
+    assert confirmation_from_error(["a"], error({"error": {"details": [
+        {"@type": "type.googleapis.com/google.rpc.ErrorInfo", "metadata": {}},
+    ]}})) is None
+    not_json = GoogleApiError("failed", 500, httpx.Response(500, text="<html>"))
+    assert confirmation_from_error(["a"], not_json) is None
+
+
+def per_id_failures(metadata):
+    return httpx.Response(400, json={"error": {"details": [
+        {"@type": "type.googleapis.com/google.rpc.ErrorInfo", "metadata": metadata},
+    ]}})
+
+
+def run_acks(handler, ack_ids, max_attempts=5):
+    errors = []
+
+    async def main():
+        client = httpx.AsyncClient(base_url="https://pubsub.googleapis.com/v1", transport=httpx.MockTransport(handler))
+        dispatcher = AckDispatcher(client, "projects/p/subscriptions/s", max_attempts=max_attempts, on_error=errors.append)
+        for ack_id in ack_ids:
+            dispatcher.ack(ack_id)
+        await dispatcher.flush()
+        await client.aclose()
+
+    asyncio.run(main())
+    return errors
+
+
+def test_temporary_failures_are_retried_and_permanent_ones_reported(monkeypatch):
+    monkeypatch.setattr(default_retry_policy, "backoff", lambda attempt: 0)
+    batches = []
+
+    def handler(request):
+        ack_ids = json.loads(request.content)["ackIds"]
+        batches.append(ack_ids)
+        if len(batches) == 1:
+            return per_id_failures({
+                "b": "TRANSIENT_FAILURE_UNORDERED_ACK_ID",
+                "c": "PERMANENT_FAILURE_INVALID_ACK_ID",
+            })
+        return httpx.Response(200, json={})
+
+    errors = run_acks(handler, ["a", "b", "c"])
+    assert batches == [["a", "b", "c"], ["b"]]
+    assert len(errors) == 1 and errors[0].ack_ids == ["c"]
+
+
+def test_temporary_failures_are_reported_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(default_retry_policy, "backoff", lambda attempt: 0)
+    batches = []
+
+    def handler(request):
+        batches.append(json.loads(request.content)["ackIds"])
+        return per_id_failures({"b": "TRANSIENT_FAILURE_UNORDERED_ACK_ID"})
+
+    errors = run_acks(handler, ["a", "b"], max_attempts=3)
+    assert batches == [["a", "b"], ["b"], ["b"]]
+    assert len(errors) == 1 and errors[0].ack_ids == ["b"]
+    assert isinstance(errors[0].cause, GoogleApiError)
@@ -0,0 +1,235 @@
+import asyncio
+from datetime import datetime, timezone
+import os
+import stat
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from ..auth import AsyncTokenProvider, BearerAuth, CachedToken, FileTokenStore, TokenCache
+
+KEY = TokenCache.make_key(["scope"])
+
+
+class FakeIAM:
+    """Stands in for IAMCredentialsClient, minting numbered tokens valid for `lifetime` seconds."""
+    def __init__(self, lifetime: float = 3600.0, delay: float = 0.0) -> None:
+        self.lifetime = lifetime
+        self.delay = delay
+        self.minted = 0
+        self._lock = threading.Lock()
+
+    def generate_access_token(self, name, scope):
+        time.sleep(self.delay)
+        with self._lock:
+            self.minted += 1
+            number = self.minted
+        expire_time = datetime.fromtimestamp(time.time() + self.lifetime, timezone.utc)
+        return SimpleNamespace(access_token=f"token-{number}", expire_time=expire_time)
+
+
+def make_cache(iam: FakeIAM, **kwargs) -> TokenCache:
+    cache = TokenCache(**kwargs)
+    cache._client = iam
+    return cache
+
+
+def test_tokens_are_reused_until_the_expiry_margin():
+    iam = FakeIAM()
+    cache = make_cache(iam, expiry_margin=60)
+    assert cache.get_token(KEY).access_token == "token-1"
+    assert cache.get_token(KEY).access_token == "token-1"
+    # Still valid for 30 seconds, but within the margin.
+    cache.put(KEY, CachedToken("almost-expired", time.time() + 30))
+    assert cache.peek(KEY) is None
+    assert cache.get_token(KEY).access_token == "token-2"
+    assert iam.minted == 2
+
+
+def test_stale_token_is_replaced_once():
+    iam = FakeIAM()
+    cache = make_cache(iam)
+    first = cache.get_token(KEY)
+    second = cache.get_token(KEY, stale=first)
+    # A caller holding the same stale token gets the replacement, not a new mint.
+    assert cache.get_token(KEY, stale=first) == second != first
+    assert iam.minted == 2
+
+
+def test_concurrent_threads_mint_once():
+    iam = FakeIAM(delay=0.05)
+    cache = make_cache(iam)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(cache.get_token(KEY))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert iam.minted == 1 and len(set(tokens)) == 1
+
+
+def test_401_is_replayed_once_with_a_new_token():
+    iam = FakeIAM()
+    provider = AsyncTokenProvider(make_cache(iam))
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(401)
+
+    async def main():
+        auth = BearerAuth(scopes=["scope"], provider=provider)
+        async with httpx.AsyncClient(auth=auth, transport=httpx.MockTransport(handler)) as client:
+            return await client.get("https://example.com/")
+
+    assert asyncio.run(main()).status_code == 401
+    assert seen == ["Bearer token-1", "Bearer token-2"]
+
+    seen.clear()
+    auth = BearerAuth(scopes=["scope"], provider=provider)
+    with httpx.Client(auth=auth, transport=httpx.MockTransport(handler)) as client:
+        assert client.get("https://example.com/").status_code == 401
+    assert seen == ["Bearer token-2", "Bearer token-3"]
+
+
+def test_fixed_tokens_are_not_refreshed():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(401)
+
+    with httpx.Client(auth=BearerAuth("fixed"), transport=httpx.MockTransport(handler)) as client:
+        client.get("https://example.com/")
+    assert seen == ["Bearer fixed"]
+
+
+def test_subclasses_can_supply_their_own_token():
+    from ..CloudScheduler import ICloudSchedulerAuth
+
+    class SchedulerAuth(ICloudSchedulerAuth):
+        @property
+        def token(self):
+            return "from-subclass"
+
+    class CachedAuth(BearerAuth):
+        scopes = ("scope",)
+
+        @property
+        def token(self):
+            return None
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(200)
+
+    provider = AsyncTokenProvider(make_cache(FakeIAM()))
+    for auth in (SchedulerAuth(), CachedAuth(provider=provider)):
+        with httpx.Client(auth=auth, transport=httpx.MockTransport(handler)) as client:
+            client.get("https://example.com/")
+    assert seen == ["Bearer from-subclass", "Bearer token-1"]
+
+
+def test_concurrent_async_callers_mint_once():
+    iam = FakeIAM(delay=0.05)
+    provider = AsyncTokenProvider(make_cache(iam))
+
+    async def main():
+        return await asyncio.gather(*(provider.get_token(KEY) for _ in range(20)))
+
+    tokens = asyncio.run(main())
+    assert iam.minted == 1 and len(set(tokens)) == 1
+
+
+def test_tokens_near_expiry_are_refreshed_in_the_background():
+    iam = FakeIAM(delay=0.05)
+    cache = make_cache(iam, expiry_margin=60, refresh_margin=300)
+    provider = AsyncTokenProvider(cache)
+    old = CachedToken("old", time.time() + 200)
+    cache.put(KEY, old)
+
+    async def main():
+        # Handed the old token right away while a single refresh runs.
+        during = await asyncio.gather(*(provider.get_token(KEY) for _ in range(5)))
+        assert iam.minted == 0
+        await asyncio.sleep(0.2)
+        return during, await provider.get_token(KEY)
+
+    during, after = asyncio.run(main())
+    assert during == [old] * 5
+    assert after.access_token == "token-1" and iam.minted == 1
+
+
+def test_failed_background_refresh_keeps_the_old_token():
+    class FailingIAM(FakeIAM):
+        def generate_access_token(self, name, scope):
+            self.minted += 1
+            raise RuntimeError("iam down")
+
+    iam = FailingIAM()
+    cache = make_cache(iam, refresh_margin=300)
+    provider = AsyncTokenProvider(cache)
+    old = CachedToken("old", time.time() + 200)
+    cache.put(KEY, old)
+
+    async def main():
+        assert await provider.get_token(KEY) == old
+        await asyncio.sleep(0.05)
+        # The error was retrieved and the next caller tries again.
+        assert await provider.get_token(KEY) == old
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert iam.minted == 2
+
+
+def test_file_store_shares_tokens_between_processes(tmp_path):
+    path = str(tmp_path / "tokens.json")
+    first_iam, second_iam = FakeIAM(), FakeIAM()
+    # Two caches stand in for two processes sharing the store.
+    first = make_cache(first_iam, store=FileTokenStore(path))
+    second = make_cache(second_iam, store=FileTokenStore(path))
+    token = first.get_token(KEY)
+    assert second.get_token(KEY) == token
+    assert first_iam.minted == 1 and second_iam.minted == 0
+    # A token the other process saw rejected is minted anew and shared again.
+    replaced = second.get_token(KEY, stale=token)
+    assert replaced != token and second_iam.minted == 1
+    assert make_cache(FakeIAM(), store=FileTokenStore(path)).get_token(KEY) == replaced
+
+
+def test_file_store_skips_tokens_near_expiry(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens.json"))
+    store.save(KEY, CachedToken("expiring", time.time() + 30))
+    iam = FakeIAM()
+    assert make_cache(iam, store=store).get_token(KEY).access_token == "token-1"
+    assert store.load(KEY).access_token == "token-1"
+
+
+def test_file_store_is_private_and_replaced_atomically(tmp_path):
+    path = tmp_path / "tokens.json"
+    store = FileTokenStore(str(path))
+    store.save(KEY, CachedToken("a", time.time() + 3600))
+    inode = path.stat().st_ino
+    other = TokenCache.make_key(["other"])
+    store.save(other, CachedToken("b", time.time() + 3600))
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    # Written to a new file renamed over the old one, never in place.
+    assert path.stat().st_ino != inode
+    assert sorted(os.listdir(tmp_path)) == ["tokens.json"]
+    assert store.load(KEY).access_token == "a" and store.load(other).access_token == "b"
+    with store.lock():
+        assert stat.S_IMODE(os.stat(store.lock_path).st_mode) == 0o600
+
+
+def test_file_store_ignores_a_corrupt_file(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text("{not json")
+    store = FileTokenStore(str(path))
+    assert store.load(KEY) is None
+    store.save(KEY, CachedToken("a", time.time() + 3600))
+    assert store.load(KEY).access_token == "a"
@@ -0,0 +1,173 @@
+import asyncio
+import base64
+import json
+
+import pytest
+
+from ..base_types import JsonBase
+from ..PubSub.clients import pub_sub_batching
+from ..PubSub.clients.pub_sub_batching import (
+    BatchPublisher, BatchSettings, MessageBatch, OrderedBatchPublisher, OrderingKeyPaused, encode_message
+)
+from ..PubSub.models.pub_sub_topics import PublishMessageBody, PublishToTopicResponse
+
+
+class Event(JsonBase):
+    name: str
+
+
+class FakePublisher:
+    """Records every publish body, optionally holding or failing them."""
+    def __init__(self) -> None:
+        self.batches = []
+        self.in_flight = 0
+        self.fail = set()
+        self.gate = None
+
+    async def publish_body(self, body):
+        messages = json.loads(body)["messages"]
+        self.batches.append(messages)
+        number = len(self.batches)
+        self.in_flight += 1
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            await asyncio.sleep(0)
+            if number in self.fail:
+                raise RuntimeError(f"batch {number} failed")
+            return PublishToTopicResponse(message_ids=[f"{number}-{i}" for i in range(len(messages))])
+        finally:
+            self.in_flight -= 1
+
+
+def names(batch):
+    return [json.loads(base64.b64decode(message["data"]))["name"] for message in batch]
+
+
+def test_batch_size_matches_its_body():
+    batch = MessageBatch()
+    assert batch.size == len(batch.body())
+    for name, attributes, key in (("a", None, None), ("b" * 100, {"x": "y"}, None), ("c", None, "k")):
+        batch.add(encode_message(Event(name=name), attributes, key), None)
+        assert batch.size == len(batch.body())
+    body = PublishMessageBody.parse_raw(batch.body())
+    assert [message.ordering_key for message in body.messages] == [None, None, "k"]
+    assert body.messages[1].attributes == {"x": "y"}
+
+
+def test_encode_message_rejects_messages_over_the_publish_limit(monkeypatch):
+    part = encode_message(Event(name="a"))
+    monkeypatch.setattr(pub_sub_batching, "MAX_BYTES", len(part) + len(b'{"messages":[]}'))
+    assert encode_message(Event(name="a")) == part
+    with pytest.raises(ValueError):
+        encode_message(Event(name="ab"))
+
+
+def test_sent_when_max_messages_is_reached():
+    publisher = FakePublisher()
+
+    async def main():
+        batcher = BatchPublisher(publisher, BatchSettings(max_messages=3, max_latency=60))
+        futures = [batcher.publish(Event(name=str(i))) for i in range(4)]
+        await asyncio.wait(futures[:3])
+        assert len(publisher.batches) == 1 and not futures[3].done()
+        await batcher.aclose()
+        return [future.result() for future in futures]
+
+    ids = asyncio.run(main())
+    assert ids == ["1-0", "1-1", "1-2", "2-0"]
+    assert [len(batch) for batch in publisher.batches] == [3, 1]
+
+
+def test_sent_before_max_bytes_is_exceeded():
+    publisher = FakePublisher()
+    part = encode_message(Event(name="0"))
+    # Room for two messages, not three.
+    settings = BatchSettings(max_bytes=len(b'{"messages":[]}') + 3 * len(part) + 1, max_latency=60)
+
+    async def main():
+        async with BatchPublisher(publisher, settings) as batcher:
+            for i in range(5):
+                batcher.publish(Event(name=str(i)))
+
+    asyncio.run(main())
+    assert [names(batch) for batch in publisher.batches] == [["0", "1"], ["2", "3"], ["4"]]
+
+
+def test_sent_after_max_latency():
+    publisher = FakePublisher()
+
+    async def main():
+        batcher = BatchPublisher(publisher, BatchSettings(max_latency=0.01))
+        future = batcher.publish(Event(name="a"))
+        await asyncio.sleep(0.005)
+        assert not publisher.batches
+        assert await asyncio.wait_for(future, 1) == "1-0"
+
+    asyncio.run(main())
+
+
+def test_one_publish_in_flight_per_ordering_key():
+    publisher = FakePublisher()
+
+    async def main():
+        publisher.gate = asyncio.Event()
+        batcher = OrderedBatchPublisher(publisher, BatchSettings(max_messages=1))
+        futures = [batcher.publish(Event(name=str(i)), ordering_key="k") for i in range(3)]
+        other = batcher.publish(Event(name="x"), ordering_key="other")
+        await asyncio.sleep(0.01)
+        # The first batch of each key is in flight, the rest of "k" waits.
+        assert publisher.in_flight == 2
+        publisher.gate.set()
+        await batcher.aclose()
+        return [future.result() for future in futures], other.result()
+
+    ids, other = asyncio.run(main())
+    sent = [name for batch in publisher.batches for name in names(batch)]
+    assert [name for name in sent if name != "x"] == ["0", "1", "2"]
+    assert len(set(ids + [other])) == 4
+
+
+def test_failed_ordering_key_pauses_until_resumed():
+    publisher = FakePublisher()
+    publisher.fail = {1}
+
+    async def main():
+        publisher.gate = asyncio.Event()
+        batcher = OrderedBatchPublisher(publisher, BatchSettings(max_messages=1))
+        first = batcher.publish(Event(name="0"), ordering_key="k")
+        queued = batcher.publish(Event(name="1"), ordering_key="k")
+        unordered = batcher.publish(Event(name="2"))
+        publisher.gate.set()
+        await asyncio.wait([first, queued, unordered])
+        with pytest.raises(OrderingKeyPaused) as paused:
+            batcher.publish(Event(name="3"), ordering_key="k")
+        batcher.resume_publish("k")
+        resumed = batcher.publish(Event(name="4"), ordering_key="k")
+        await batcher.aclose()
+        return first, queued, unordered, paused.value, resumed
+
+    first, queued, unordered, paused, resumed = asyncio.run(main())
+    assert isinstance(first.exception(), RuntimeError)
+    assert queued.exception() is first.exception()
+    assert unordered.result() and resumed.result()
+    assert paused.ordering_key == "k" and paused.cause is first.exception()
+    # The queued batch is failed without being sent.
+    assert len(publisher.batches) == 3
+
+
+def test_unkeyed_flushes_leave_keyed_batches_open():
+    publisher = FakePublisher()
+
+    async def main():
+        batcher = OrderedBatchPublisher(publisher, BatchSettings(max_messages=2, max_latency=60))
+        keyed = batcher.publish(Event(name="k0"), ordering_key="k")
+        for i in range(2):
+            batcher.publish(Event(name=str(i)))
+        await asyncio.sleep(0.01)
+        assert [names(batch) for batch in publisher.batches] == [["0", "1"]] and not keyed.done()
+        batcher.publish(Event(name="k1"), ordering_key="k")
+        await batcher.aclose()
+
+    asyncio.run(main())
+    assert [names(batch) for batch in publisher.batches] == [["0", "1"], ["k0", "k1"]]
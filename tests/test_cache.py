@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import httpx
+
+from ..auth import AsyncTokenProvider, BearerAuth, CachedToken, TokenCache
+from ..transport.cache import CacheTransport, ResponseCache
+
+QUEUE = "https://cloudtasks.googleapis.com/v2/projects/p/locations/l/queues/q"
+
+
+def _client(handler, cache):
+    return httpx.AsyncClient(transport=CacheTransport(httpx.MockTransport(handler), cache))
+
+
+def test_entries_are_per_credential():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("Authorization"))
+        return httpx.Response(200, json={"who": request.headers.get("Authorization")})
+
+    async def main():
+        cache = ResponseCache()
+        cache.enabled = True
+        async with _client(handler, cache) as client:
+            first = await client.get(QUEUE, headers={"Authorization": "Bearer a"})
+            again = await client.get(QUEUE, headers={"Authorization": "Bearer a"})
+            other = await client.get(QUEUE, headers={"Authorization": "Bearer b"})
+        return first.json(), again.json(), other.json()
+
+    first, again, other = asyncio.run(main())
+    assert first == again == {"who": "Bearer a"}
+    assert other == {"who": "Bearer b"}
+    assert seen == ["Bearer a", "Bearer b"]
+
+
+
+def test_entries_outlive_token_refreshes():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(200, json={})
+
+    async def main():
+        cache = ResponseCache()
+        cache.enabled = True
+        provider = AsyncTokenProvider(TokenCache())
+        auth = BearerAuth(scopes=["scope"], provider=provider)
+        other = BearerAuth(scopes=["other"], provider=provider)
+        provider.cache.put(other.token_key, CachedToken("other", time.time() + 3600))
+        async with _client(handler, cache) as client:
+            for token in ("first", "refreshed"):
+                provider.cache.put(auth.token_key, CachedToken(token, time.time() + 3600))
+                await client.get(QUEUE, auth=auth)
+            await client.get(QUEUE, auth=other)
+
+    asyncio.run(main())
+    assert seen == ["Bearer first", "Bearer other"]
+
+
+def test_mutation_drops_resource_and_collection():
+    def handler(request):
+        return httpx.Response(200, json={})
+
+    async def main():
+        cache = ResponseCache()
+        async with _client(handler, cache) as client:
+            for url in (QUEUE, QUEUE + "/tasks/t", QUEUE.rpartition("/")[0], QUEUE + "2"):
+                await client.get(url, extensions={"cache_ttl": 60})
+            assert len(cache) == 4
+            await client.post(QUEUE + ":pause")
+        return cache
+
+    cache = asyncio.run(main())
+    assert [key[0] for key in cache._entries] == [QUEUE + "2"]
+
+
+def test_read_racing_a_mutation_is_not_stored():
+    async def main():
+        cache = ResponseCache()
+        gate = asyncio.Event()
+
+        async def handler(request):
+            if request.method == "GET":
+                await gate.wait()
+                return httpx.Response(200, json={"state": "old"})
+            return httpx.Response(200, json={})
+
+        async with _client(handler, cache) as client:
+            read = asyncio.create_task(client.get(QUEUE, extensions={"cache_ttl": 60}))
+            await asyncio.sleep(0)
+            await client.patch(QUEUE, json={})
+            gate.set()
+            await read
+        return cache
+
+    assert len(asyncio.run(main())) == 0
+
+
+def test_unrelated_mutations_leave_reads_cached():
+    reads = []
+
+    async def handler(request):
+        if request.method == "GET":
+            reads.append(request.url.path)
+        await asyncio.sleep(0)
+        return httpx.Response(200, json={})
+
+    async def main():
+        cache = ResponseCache()
+        async with _client(handler, cache) as client:
+            async def publish():
+                for _ in range(20):
+                    await client.post("https://pubsub.googleapis.com/v1/projects/p/topics/t:publish")
+                    await client.post(QUEUE + "2:pause")
+
+            async def read():
+                for _ in range(20):
+                    await client.get(QUEUE, extensions={"cache_ttl": 60})
+
+            await asyncio.gather(publish(), read())
+        return cache
+
+    cache = asyncio.run(main())
+    assert len(reads) == 1 and len(cache) == 1
+    assert not cache._read_index._under
+
+
+def test_children_and_lru_eviction_keep_the_index_in_step():
+    def handler(request):
+        return httpx.Response(200, json={})
+
+    async def main():
+        cache = ResponseCache(max_entries=2)
+        async with _client(handler, cache) as client:
+            for url in (QUEUE + "/tasks/a", QUEUE + "/tasks/b", QUEUE + "/tasks/c"):
+                await client.get(url, extensions={"cache_ttl": 60})
+            assert [key[0] for key in cache._entries] == [QUEUE + "/tasks/b", QUEUE + "/tasks/c"]
+            await client.delete(QUEUE)
+        return cache
+
+    cache = asyncio.run(main())
+    assert len(cache) == 0 and not cache._entry_index._under and not cache._entry_index._at
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from ..benchmarks.clients import seed_tokens
+from ..PubSub.clients.pub_sub_client import PubSubAuth
+from ..transport import make_client, pool_settings
+from ..transport.cassette import CassetteEntry, CassetteMiss, RecordingTransport, ReplayTransport, load_cassette
+
+URL = "https://pubsub.googleapis.com/v1/projects/p/topics/t"
+
+
+def test_recording_keeps_the_response_extensions(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+
+    def handler(request):
+        return httpx.Response(200, json={"name": "t"}, extensions={"http_version": b"HTTP/2"})
+
+    async def main():
+        transport = RecordingTransport(path, httpx.MockTransport(handler))
+        response = await transport.handle_async_request(httpx.Request("GET", URL))
+        transport.close()
+        return response
+
+    response = asyncio.run(main())
+    assert response.extensions["http_version"] == b"HTTP/2"
+    assert response.json() == {"name": "t"}
+    [entry] = load_cassette(path)
+    assert entry.key == ("GET", URL) and entry.body == b'{"name":"t"}'
+
+
+def entry(at, elapsed):
+    return CassetteEntry(at, elapsed, "GET", URL, [], b"", 200, [], b"{}")
+
+
+def test_replay_follows_the_recorded_schedule():
+    async def main():
+        transport = ReplayTransport([entry(0.0, 0.0), entry(1.0, 0.5)], time_scale=0.1, loop=True)
+        started = time.monotonic()
+        timings = []
+        for _ in range(3):
+            await transport.handle_async_request(httpx.Request("GET", URL))
+            timings.append(time.monotonic() - started)
+        return timings
+
+    first, second, third = asyncio.run(main())
+    assert first < 0.05
+    # Arrived 1.5s after the first request in the recording.
+    assert 0.14 <= second < 0.3
+    # The schedule has passed, only the latency is waited for.
+    assert third - second < 0.05
+
+
+def pubsub_client():
+    client = make_client("https://pubsub.googleapis.com/v1/projects/p", auth=PubSubAuth())
+    seed_tokens(client.auth)
+    return client
+
+
+async def publish_twice(client):
+    bodies = []
+    for data in (b'{"n":1}', b'{"n":2}'):
+        response = await client.post("/topics/t:publish", content=data, headers={"Content-Type": "application/json"})
+        bodies.append(response.json())
+    return bodies
+
+
+def test_recorded_traffic_replays_through_make_client(tmp_path, monkeypatch):
+    path = str(tmp_path / "traffic.jsonl")
+    served = []
+
+    def handler(request):
+        served.append(request.content)
+        return httpx.Response(200, json={"messageIds": [str(len(served))]})
+
+    recorder = RecordingTransport(path, httpx.MockTransport(handler))
+    monkeypatch.setattr(pool_settings, "transport", recorder)
+
+    async def record():
+        async with pubsub_client() as client:
+            return await publish_twice(client)
+
+    recorded = asyncio.run(record())
+    recorder.close()
+
+    monkeypatch.setattr(pool_settings, "transport", ReplayTransport(path, loop=False))
+
+    async def replay():
+        async with pubsub_client() as client:
+            replayed = await publish_twice(client)
+            with pytest.raises(CassetteMiss):
+                await client.post("/topics/t:publish", content=b'{"n":3}')
+            with pytest.raises(CassetteMiss):
+                await client.get("/topics/unrecorded")
+        return replayed
+
+    assert asyncio.run(replay()) == recorded == [{"messageIds": ["1"]}, {"messageIds": ["2"]}]
+    assert len(served) == 2
+    entries = load_cassette(path)
+    assert [entry.request_body for entry in entries] == [b'{"n":1}', b'{"n":2}']
+    assert entries[0].request_headers == [("content-type", "application/json")]
+
+
+def test_authorization_is_never_written_to_the_cassette(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.jsonl"
+
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer bench-token"
+        return httpx.Response(200, json={}, headers={"Set-Cookie": "session=secret"})
+
+    recorder = RecordingTransport(str(path), httpx.MockTransport(handler))
+    monkeypatch.setattr(pool_settings, "transport", recorder)
+
+    async def main():
+        async with pubsub_client() as client:
+            await client.get("/topics/t")
+
+    asyncio.run(main())
+    recorder.close()
+    text = path.read_text()
+    assert "bench-token" not in text and "session=secret" not in text
+    assert "authorization" not in text.lower()
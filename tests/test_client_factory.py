@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from ..ClientFactory import ClientCloseError, ClientFactory, ClientKey
+
+
+class FakeClient:
+    def __init__(self, name, fail_enter=False, fail_exit=False):
+        self.name = name
+        self.fail_enter = fail_enter
+        self.fail_exit = fail_exit
+        self.entered = False
+        self.closed = False
+
+    async def __aenter__(self):
+        self.entered = True
+        if self.fail_enter:
+            raise RuntimeError(f"{self.name} failed to start")
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        self.closed = True
+        if self.fail_exit:
+            raise RuntimeError(f"{self.name} failed to close")
+
+
+def key(name):
+    return ClientKey("pubsub", "p", resource=name)
+
+
+def test_leased_clients_are_not_evicted():
+    async def main():
+        factory = ClientFactory(max_size=1)
+        a, b = FakeClient("a"), FakeClient("b")
+        async with factory.lease(key("a"), lambda: a) as leased:
+            await factory.get(key("b"), lambda: b)
+            assert leased is a and not a.closed
+            assert len(factory) == 2
+        await factory.get(key("c"), lambda: FakeClient("c"))
+        return a, b
+
+    a, b = asyncio.run(main())
+    assert a.closed and b.closed
+
+
+def test_idle_eviction_skips_leased_clients():
+    async def main():
+        factory = ClientFactory(idle_ttl=0)
+        a = FakeClient("a")
+        async with factory.lease(key("a"), lambda: a):
+            assert await factory.evict_idle() == 0
+            assert not a.closed
+        assert await factory.evict_idle() == 1
+        return a
+
+    assert asyncio.run(main()).closed
+
+
+def test_explicit_eviction_waits_for_the_last_lease():
+    async def main():
+        factory = ClientFactory()
+        a = FakeClient("a")
+        async with factory.lease(key("a"), lambda: a):
+            async with factory.lease(key("a"), lambda: a):
+                await factory.aclose()
+            assert not a.closed
+        return a
+
+    assert asyncio.run(main()).closed
+
+
+def test_close_all_closes_every_client_then_raises():
+    async def main():
+        factory = ClientFactory()
+        clients = [FakeClient("a", fail_exit=True), FakeClient("b"), FakeClient("c", fail_exit=True)]
+        for client in clients:
+            await factory.get(key(client.name), lambda client=client: client)
+        with pytest.raises(ClientCloseError) as raised:
+            await factory.aclose()
+        return clients, raised.value
+
+    clients, group = asyncio.run(main())
+    assert all(client.closed for client in clients)
+    assert len(group.exceptions) == 2
+
+
+def test_client_failing_to_start_is_closed():
+    async def main():
+        factory = ClientFactory()
+        client = FakeClient("a", fail_enter=True)
+        with pytest.raises(RuntimeError):
+            await factory.get(key("a"), lambda: client)
+        return factory, client
+
+    factory, client = asyncio.run(main())
+    assert client.closed and len(factory) == 0
+
+
+def test_concurrent_builds_never_evict_a_client_being_leased():
+    async def main():
+        factory = ClientFactory(max_size=1)
+
+        async def build(name):
+            await asyncio.sleep(0)
+            return FakeClient(name)
+
+        async def use(name):
+            async with factory.lease(key(name), lambda: build(name)) as client:
+                await asyncio.sleep(0)
+                return client.name, client.entered, not client.closed
+
+        return await asyncio.gather(use("a"), use("b"))
+
+    assert asyncio.run(main()) == [("a", True, True), ("b", True, True)]
+
+
+def test_cancelled_lease_on_a_pending_build_is_released():
+    async def main():
+        factory = ClientFactory(max_size=1)
+        started = asyncio.Event()
+
+        async def build():
+            started.set()
+            await asyncio.sleep(0.01)
+            return FakeClient("a")
+
+        waiter = asyncio.ensure_future(factory.get(key("a"), build))
+        leaser = asyncio.ensure_future(factory.lease(key("a"), build).__aenter__())
+        await started.wait()
+        leaser.cancel()
+        a = await waiter
+        await factory.get(key("b"), lambda: FakeClient("b"))
+        return a
+
+    assert asyncio.run(main()).closed
+
+
+def test_failing_eviction_still_hands_out_the_new_client(caplog):
+    async def main():
+        factory = ClientFactory(max_size=1)
+        a, b = FakeClient("a", fail_exit=True), FakeClient("b")
+        await factory.get(key("a"), lambda: a)
+        async with factory.lease(key("b"), lambda: b) as leased:
+            assert leased is b and a.closed
+        await factory.aclose()
+        return factory, b
+
+    factory, b = asyncio.run(main())
+    assert b.closed and len(factory) == 0
+    assert "a failed to close" in caplog.text
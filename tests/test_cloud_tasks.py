@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+
+from ..benchmarks.clients import seed_tokens
+from ..CloudTasks import PushQueue
+from ..transport import pool_settings
+
+TASK = {
+    "name": "projects/p/locations/l/queues/q/tasks/1",
+    "scheduleTime": "2024-01-02T03:04:05Z",
+    "dispatchDeadline": "600s",
+    "view": "BASIC",
+}
+
+
+def test_list_tasks_streams_every_page(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.url.params.get("pageToken")))
+        if request.url.params.get("pageToken"):
+            dispatched = {**TASK, "name": TASK["name"][:-1] + "2", "dispatchCount": 1, "firstAttempt": {
+                "scheduleTime": "2024-01-02T03:04:05Z", "dispatchTime": "2024-01-02T03:04:06Z",
+                "responseTime": "2024-01-02T03:04:07Z", "responseStatus": {"code": 0, "message": "", "details": []},
+            }}
+            return httpx.Response(200, json={"tasks": [dispatched]})
+        return httpx.Response(200, json={"tasks": [TASK], "nextPageToken": "t1"})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+
+    async def main():
+        queue = PushQueue("q", project_id="p", location_id="l")
+        seed_tokens(queue.client.auth)
+        tasks = [task async for task in queue.list_tasks(page_size=1)]
+        await queue.close()
+        return tasks
+
+    first, second = asyncio.run(main())
+    assert first.dispatch_count == 0 and first.first_attempt is None
+    assert second.dispatch_count == 1 and second.first_attempt.dispatch_time == "2024-01-02T03:04:06Z"
+    assert seen == [
+        ("/v2beta3/projects/p/locations/l/queues/q/tasks", None),
+        ("/v2beta3/projects/p/locations/l/queues/q/tasks", "t1")
+    ]
@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+
+from ..auth import BearerAuth
+from ..transport.coalesce import Coalescer, coalesce_key
+
+
+def test_key_includes_the_credential():
+    alice = httpx.AsyncClient(auth=BearerAuth("alice"), base_url="https://pubsub.googleapis.com")
+    bob = httpx.AsyncClient(auth=BearerAuth("bob"), base_url="https://pubsub.googleapis.com")
+    alice_again = httpx.AsyncClient(auth=BearerAuth("alice"), base_url="https://pubsub.googleapis.com")
+    scoped = httpx.AsyncClient(auth=BearerAuth(scopes=["a", "b"]), base_url="https://pubsub.googleapis.com")
+    scoped_again = httpx.AsyncClient(auth=BearerAuth(scopes=["b", "a"]), base_url="https://pubsub.googleapis.com")
+    assert coalesce_key(alice, "GET", "/x") != coalesce_key(bob, "GET", "/x")
+    assert coalesce_key(alice, "GET", "/x") == coalesce_key(alice_again, "GET", "/x")
+    assert coalesce_key(scoped, "GET", "/x") == coalesce_key(scoped_again, "GET", "/x")
+    assert coalesce_key(scoped, "GET", "/x") != coalesce_key(alice, "GET", "/x")
+    assert "alice" not in repr(coalesce_key(alice, "GET", "/x"))
+
+
+def test_waiters_get_their_own_copy():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return {"items": [1]}
+
+    async def main():
+        coalescer = Coalescer()
+        first, second = await asyncio.gather(coalescer.run("k", fetch), coalescer.run("k", fetch))
+        first["items"].append(2)
+        alone = await coalescer.run("k", fetch)
+        return first, second, alone
+
+    first, second, alone = asyncio.run(main())
+    assert len(calls) == 2
+    assert first == {"items": [1, 2]} and second == {"items": [1]} and alone == {"items": [1]}
+
+
+def test_started_failures_are_retrieved():
+    async def fetch():
+        raise ValueError("boom")
+
+    async def main():
+        coalescer = Coalescer()
+        task = coalescer.start("k", fetch)
+        await asyncio.wait([task])
+        return coalescer
+
+    coalescer = asyncio.run(main())
+    assert not coalescer._inflight
@@ -0,0 +1,68 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from ..base_types import JsonBase, trusted_parse
+from ..benchmarks.decode import SAMPLES
+from ..CloudSQL.models import SqlConnection
+from ..PubSub.models.pub_sub_topics import PubSubMessageRequest
+
+
+class Color(Enum):
+    red = "RED"
+
+
+class Scalars(JsonBase):
+    count: int
+    size: Optional[int] = None
+    ratio: float = 0.0
+    flag: bool = False
+    label: str = ""
+    blob: Optional[bytes] = None
+    ids: List[int] = []
+    sizes: Dict[str, int] = {}
+    either: Union[Color, int, str, None] = None
+    anything: Any = None
+
+
+EXTRA = [
+    (PubSubMessageRequest, {"data": "aGVsbG8=", "attributes": {"a": "b"}, "orderingKey": "k"}),
+    (Scalars, {
+        "count": "9007199254740993", "size": 3, "ratio": 2, "flag": "true", "label": 5,
+        "blob": "YQ==", "ids": ["1", 2], "sizes": {"a": "10"}, "either": "RED", "anything": {"x": [1]},
+    }),
+    (Scalars, {"count": 1, "either": "7"}),
+    (Scalars, {"count": 1, "either": "blue"}),
+    (SqlConnection, {**dict(SAMPLES)[SqlConnection], "databaseVersion": "POSTGRES_16", "pscEnabled": "false"}),
+]
+
+
+def _typed(value):
+    """Plain values with their exact types, so 1, 1.0 and True don't compare equal."""
+    if isinstance(value, BaseModel):
+        return type(value), {name: _typed(getattr(value, name)) for name in value.__fields__}
+    if isinstance(value, dict):
+        return {key: _typed(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_typed(item) for item in value]
+    return type(value), value
+
+
+@pytest.mark.parametrize("model,data", SAMPLES + EXTRA, ids=lambda value: getattr(value, "__name__", ""))
+def test_trusted_matches_validated(model, data):
+    assert _typed(trusted_parse(model, data)) == _typed(model.parse_obj(data))
+
+
+def test_int64_strings_and_bytes():
+    parsed = trusted_parse(Scalars, EXTRA[1][1])
+    assert parsed.count == 9007199254740993
+    assert parsed.blob == b"YQ=="
+    assert parsed.either is Color.red
+    assert trusted_parse(PubSubMessageRequest, EXTRA[0][1]).data == b"aGVsbG8="
+
+
+def test_unions_still_raise_on_invalid_values():
+    with pytest.raises(ValidationError):
+        trusted_parse(Scalars, {"count": 1, "either": [1]})
@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+
+from ..auth import TokenCache
+from ..transport import (
+    Histogram, InMemorySink, PrometheusSink, RequestObservation, compression_settings, default_retry_policy,
+    endpoint_name, make_client, metrics, pool_settings
+)
+from .test_auth import FakeIAM
+
+
+def test_request_bytes_are_counted_after_compression(monkeypatch):
+    sent = []
+
+    def handler(request):
+        sent.append(len(request.content))
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(metrics, "sink", InMemorySink())
+    monkeypatch.setattr(compression_settings, "hosts", {"pubsub.googleapis.com"})
+    body = b"a" * 100_000
+
+    async def main():
+        async with make_client("https://pubsub.googleapis.com") as client:
+            await client.post("/v1/projects/p/topics/t:publish", content=body)
+            await client.post("/v1/projects/p/topics/t:publish", content=b"small")
+
+    asyncio.run(main())
+    compressed, small = metrics.sink.requests
+    assert compressed.request_bytes == sent[0] < len(body)
+    assert small.request_bytes == 5
+
+
+def test_retries_of_compressed_requests_are_counted(monkeypatch):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.headers.get("Content-Encoding"))
+        if len(attempts) % 2:
+            return httpx.Response(503, json={})
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(metrics, "sink", InMemorySink())
+    monkeypatch.setattr(default_retry_policy, "initial_backoff", 0.0)
+    monkeypatch.setattr(compression_settings, "hosts", {"pubsub.googleapis.com"})
+
+    async def main():
+        async with make_client("https://pubsub.googleapis.com") as client:
+            for body in (b"a" * 100_000, b"small"):
+                await client.post("/v1/projects/p/topics/t:publish", content=body, extensions={"idempotent": True})
+
+    asyncio.run(main())
+    assert attempts == ["gzip", "gzip", None, None]
+    assert [observation.retries for observation in metrics.sink.requests] == [1, 1]
+
+
+
+def test_requests_are_not_compressed_unless_the_host_is_added(monkeypatch):
+    encodings = []
+
+    def handler(request):
+        encodings.append(request.headers.get("Content-Encoding"))
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+
+    async def main():
+        async with make_client("https://pubsub.googleapis.com") as client:
+            await client.post("/v1/projects/p/topics/t:publish", content=b"a" * 100_000)
+
+    asyncio.run(main())
+    assert encodings == [None]
+
+def test_endpoint_names_collapse_ids_after_the_api_version():
+    queue = httpx.Request("GET", "https://cloudtasks.googleapis.com/v2beta3/projects/p/locations/l/queues/q")
+    assert endpoint_name(queue) == "GET cloudtasks.googleapis.com/v2beta3/projects/{}/locations/{}/queues/{}"
+    publish = httpx.Request("POST", "https://pubsub.googleapis.com/v1/projects/p/topics/t:publish")
+    assert endpoint_name(publish) == "POST pubsub.googleapis.com/v1/projects/{}/topics/{}:publish"
+    topics = httpx.Request("GET", "https://pubsub.googleapis.com/v1/projects/p/topics")
+    assert endpoint_name(topics) == "GET pubsub.googleapis.com/v1/projects/{}/topics"
+    named = httpx.Request("GET", "https://pubsub.googleapis.com/v1/projects/p", extensions={"endpoint": "project"})
+    assert endpoint_name(named) == "project"
+
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = Histogram(buckets=(1.0, 2.0, 5.0))
+    assert histogram.percentile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 10.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 0, 1]
+    assert histogram.percentile(0.25) == 1.0
+    assert histogram.percentile(0.5) == histogram.percentile(0.75) == 2.0
+    assert histogram.percentile(1.0) == float("inf")
+
+
+def test_requests_are_counted_per_endpoint_and_status(monkeypatch):
+    def handler(request):
+        return httpx.Response(404 if request.url.path.endswith("missing") else 200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(metrics, "sink", PrometheusSink())
+
+    async def main():
+        async with make_client("https://pubsub.googleapis.com") as client:
+            for topic in ("a", "b", "missing"):
+                await client.get(f"/v1/projects/p/topics/{topic}")
+
+    asyncio.run(main())
+    endpoint = "GET pubsub.googleapis.com/v1/projects/{}/topics/{}"
+    assert dict(metrics.sink.status_counts) == {(endpoint, 200): 2, (endpoint, 404): 1}
+    assert metrics.sink.latency[endpoint].count == 3
+
+
+def test_prometheus_text_output():
+    sink = PrometheusSink()
+    sink.observe_request(RequestObservation("GET host/v1/x", 200, 0.02, 10, 100, 0))
+    sink.observe_request(RequestObservation("GET host/v1/x", 503, 0.3, 10, 5, 2))
+    sink.observe_auth_refresh(0.2)
+    lines = sink.render().splitlines()
+    labels = 'endpoint="GET host/v1/x"'
+    assert "# TYPE gcloud_json_request_latency_seconds histogram" in lines
+    assert f'gcloud_json_request_latency_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+    assert f'gcloud_json_request_latency_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"gcloud_json_request_latency_seconds_count{{{labels}}} 2" in lines
+    assert f'gcloud_json_requests_total{{{labels},status="200"}} 1' in lines
+    assert f'gcloud_json_requests_total{{{labels},status="503"}} 1' in lines
+    assert f"gcloud_json_request_bytes_total{{{labels}}} 20" in lines
+    assert f"gcloud_json_response_bytes_total{{{labels}}} 105" in lines
+    assert f"gcloud_json_retries_total{{{labels}}} 2" in lines
+    assert 'gcloud_json_auth_refresh_seconds_bucket{le="0.25"} 1' in lines
+    assert "gcloud_json_auth_refresh_seconds_count{} 1" in lines
+
+
+def test_token_mints_are_recorded_as_auth_refreshes(monkeypatch):
+    monkeypatch.setattr(metrics, "sink", InMemorySink())
+    cache = TokenCache()
+    cache._client = FakeIAM()
+    cache.get(["scope"])
+    cache.get(["scope"])
+    cache.get(["other"])
+    assert len(metrics.sink.auth_refreshes) == 2
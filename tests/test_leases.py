@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ..PubSub.clients import pub_sub_leases
+from ..PubSub.clients.pub_sub_leases import LeaseManager
+
+
+class FakeAcks:
+    def __init__(self) -> None:
+        self.extended = []
+
+    def modify_ack_deadlines(self, ack_ids, seconds):
+        self.extended.append((list(ack_ids), seconds))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(pub_sub_leases, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_extended_lead_seconds_before_the_deadline(clock):
+    acks = FakeAcks()
+    leases = LeaseManager(acks, lead=5.0)
+    leases.add("a", ack_deadline=10)
+    clock.now += 4
+    assert leases.extend_due() == 0
+    clock.now += 1
+    assert leases.extend_due() == 1
+    assert acks.extended == [(["a"], 10)]
+    # Next due 5 seconds before the new deadline, not again right away.
+    clock.now += 1
+    assert leases.extend_due() == 0
+    clock.now += 4
+    assert leases.extend_due() == 1
+
+
+def test_removed_leases_are_not_extended(clock):
+    acks = FakeAcks()
+    leases = LeaseManager(acks)
+    leases.add("a")
+    leases.add("b")
+    leases.remove("a")
+    clock.now += 10
+    assert leases.extend_due() == 1
+    assert acks.extended == [(["b"], 10)] and len(leases) == 1
+
+
+def test_deadline_follows_handler_times(clock):
+    acks = FakeAcks()
+    leases = LeaseManager(acks)
+    for i in range(100):
+        leases.add(str(i))
+    clock.now += 30
+    for i in range(99):
+        leases.remove(str(i))
+    assert leases.deadline == 30
+    leases.remove("99", handled=False)
+    assert leases.handler_times.count == 99
+
+
+def test_leases_expire_after_max_lease_duration(clock):
+    acks = FakeAcks()
+    leases = LeaseManager(acks, max_lease_duration=20)
+    leases.add("a")
+    for _ in range(4):
+        clock.now += 5
+        leases.extend_due()
+    assert len(acks.extended) == 3 and len(leases) == 0
+    clock.now += 600
+    assert leases.extend_due() == 0
+
+
+def test_stalled_loop_catches_up(clock):
+    acks = FakeAcks()
+    leases = LeaseManager(acks)
+    leases.add("a", ack_deadline=10)
+    leases.add("b", ack_deadline=300)
+    clock.now += 400
+    assert leases.extend_due() == 2
@@ -0,0 +1,173 @@
+import asyncio
+
+import httpx
+
+from ..transport.limiter import AdaptiveLimiter, LimiterTransport, get_limiter
+
+URL = "https://pubsub.googleapis.com/v1/projects/p/topics/t"
+
+
+def test_cancelled_waiter_dropped_by_wake():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=1)
+        held = await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        # Drops the cancelled waiter and grants the slot to the next one before `waiting` resumes.
+        limiter.release(held, 200)
+        results = await asyncio.gather(waiting, queued, return_exceptions=True)
+        return limiter, results
+
+    limiter, (cancelled, started) = asyncio.run(main())
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert isinstance(started, float)
+    assert limiter.in_flight == 1 and not limiter._waiters
+
+
+def test_slot_granted_to_cancelled_waiter_is_handed_on():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=1)
+        held = await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release(held, 200)
+        first.cancel()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        return limiter, results
+
+    limiter, (cancelled, started) = asyncio.run(main())
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert isinstance(started, float)
+    assert limiter.in_flight == 1
+
+
+def test_cancelled_during_rate_wait_returns_the_slot():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=4, max_rate=1)
+        limiter._tokens = 0
+        task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return limiter.in_flight
+
+    assert asyncio.run(main()) == 0
+
+
+def test_fractional_rates_let_requests_through():
+    async def main():
+        limiter = AdaptiveLimiter(max_rate=0.5)
+        first = await asyncio.wait_for(limiter.acquire(), 0.1)
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.05)
+        assert not second.done()
+        second.cancel()
+        # Two seconds later, a whole token has been refilled.
+        limiter._tokens_at -= 2
+        await asyncio.wait_for(limiter.acquire(), 0.1)
+        return first
+
+    assert isinstance(asyncio.run(main()), float)
+
+
+def test_streamed_body_holds_its_slot_until_closed():
+    async def body():
+        yield b"a"
+        yield b"b"
+
+    def handler(request):
+        return httpx.Response(200, content=body())
+
+    async def main():
+        transport = LimiterTransport(httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            limiter = get_limiter("p", "pubsub.googleapis.com")
+            async with client.stream("GET", URL) as response:
+                during = limiter.in_flight
+                assert await response.aread() == b"ab"
+            after_stream = limiter.in_flight
+            await client.get(URL)
+            return during, after_stream, limiter.in_flight
+
+    assert asyncio.run(main()) == (1, 0, 0)
+
+
+def test_in_memory_responses_release_right_away():
+    async def main():
+        transport = LimiterTransport(httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.send(client.build_request("GET", URL), stream=True)
+            return get_limiter("p", "pubsub.googleapis.com").in_flight, response
+
+    in_flight, _ = asyncio.run(main())
+    assert in_flight == 0
+
+
+def test_long_polls_bypass_the_limiter():
+    seen = []
+
+    def handler(request):
+        seen.append(get_limiter("lp", "pubsub.googleapis.com").in_flight)
+        return httpx.Response(200, json={})
+
+    async def main():
+        transport = LimiterTransport(httpx.MockTransport(handler))
+        url = "https://pubsub.googleapis.com/v1/projects/lp/subscriptions/s:pull"
+        await transport.handle_async_request(httpx.Request("POST", url, extensions={"long_poll": True}))
+        await transport.handle_async_request(httpx.Request("POST", url))
+
+    asyncio.run(main())
+    assert seen == [0, 1]
+
+
+def test_successes_grow_the_limit_by_about_one_per_window():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=6)
+        starts = [await limiter.acquire() for _ in range(4)]
+        for started in starts:
+            limiter.release(started, 200)
+        after_window = limiter.limit
+        for _ in range(100):
+            limiter.release(await limiter.acquire(), 200)
+        return after_window, limiter.limit
+
+    after_window, capped = asyncio.run(main())
+    assert 4.9 < after_window < 5.0
+    assert capped == 6
+
+
+def test_congestion_halves_the_limit_once_per_window_down_to_the_floor():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=16, min_limit=2, backoff=0.5)
+        starts = [await limiter.acquire() for _ in range(8)]
+        # A burst of 429s from one window only counts once.
+        for started in starts:
+            limiter.release(started, 429)
+        after_burst = limiter.limit
+        limits = []
+        for _ in range(5):
+            limiter.release(await limiter.acquire(), 503)
+            limits.append(limiter.limit)
+        return after_burst, limits
+
+    after_burst, limits = asyncio.run(main())
+    assert after_burst == 8
+    assert limits == [4, 2, 2, 2, 2]
+
+
+def test_errors_and_slow_responses():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=8, latency_target=0.5)
+        limiter.release(await limiter.acquire(), 500)
+        limiter.release(await limiter.acquire(), None)
+        unchanged = limiter.limit
+        limiter.release(await limiter.acquire(), 200, latency=1.0)
+        return unchanged, limiter.limit
+
+    unchanged, slow = asyncio.run(main())
+    # Server errors and failed requests neither grow nor shrink the limit.
+    assert unchanged == 8
+    assert slow == 4
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Runs code in a fresh interpreter with the package imported as `pkg`, returns what it prints as JSON."""
+    (tmp_path / "google_http").symlink_to(ROOT, target_is_directory=True)
+
+    def _run(code: str):
+        script = f"import json, sys\nimport google_http as pkg\n{code}"
+        result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+    return _run
+
+
+def test_probes_import_no_service(run):
+    loaded = run(
+        "hasattr(pkg, '__wrapped__'), hasattr(pkg, '__all__'), hasattr(pkg, 'pytest_plugins')\n"
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith(pkg.__name__ + '.'))))"
+    )
+    assert loaded == []
+
+
+def test_drive_client_is_the_class(run):
+    names = run(
+        "from importlib import import_module\n"
+        "first = pkg.DriveClient.__name__\n"
+        "import_module(pkg.__name__ + '.DriveClient.client')\n"
+        "print(json.dumps([first, pkg.DriveClient.__name__, type(pkg.DriveClient).__name__]))"
+    )
+    assert names == ["DriveClient", "DriveClient", "ABCMeta"]
+
+
+def test_star_import_exports_public_api(run):
+    names = run(
+        "ns = {}\n"
+        "exec(f'from {pkg.__name__} import *', ns)\n"
+        "print(json.dumps(sorted(ns)))"
+    )
+    for name in ("PushQueue", "IPublisherClient", "BatchPublisher", "DriveClient", "get_oauth_token"):
+        assert name in names
+
+
+def test_exports_are_the_all_of_every_service(run):
+    # Every name a service declares resolves to the object defined in that
+    # service, helpers it merely imports from base_types and transport aren't exported.
+    mismatches = run(
+        "import importlib, inspect\n"
+        "expected, leaked = {}, []\n"
+        "for sub in pkg._SUBMODULES:\n"
+        "    module = importlib.import_module(f'{pkg.__name__}.{sub}')\n"
+        "    for name in module.__all__:\n"
+        "        value = getattr(module, name)\n"
+        "        expected[name] = value\n"
+        "        origin = value if inspect.isclass(value) or inspect.isfunction(value) else type(value)\n"
+        "        defined_in = getattr(origin, '__module__', '')\n"
+        "        if defined_in.startswith(pkg.__name__ + '.') and not defined_in.startswith(f'{pkg.__name__}.{sub}'):\n"
+        "            leaked.append(name)\n"
+        "print(json.dumps({\n"
+        "    'names': sorted(expected.keys() ^ set(pkg.__all__)),\n"
+        "    'different': sorted(name for name in expected if getattr(pkg, name) is not expected[name]),\n"
+        "    'leaked': sorted(leaked),\n"
+        "}))"
+    )
+    assert mismatches == {"names": [], "different": [], "leaked": []}
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from ..transport import SharedTransport, close_shared_pools, get_pool, pool
+from ..transport.pool import _pools
+
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.hosts = []
+        self.closed = False
+
+    async def handle_async_request(self, request):
+        self.hosts.append(request.url.host)
+        return httpx.Response(200)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_one_pool_per_loop_and_host(monkeypatch):
+    monkeypatch.setattr(pool, "AsyncHTTPTransport", FakePool)
+
+    async def main():
+        first, second = SharedTransport(), SharedTransport()
+        for transport, url in ((first, "https://a.example/x"), (second, "https://a.example/y"), (first, "https://b.example/")):
+            await transport.handle_async_request(httpx.Request("GET", url))
+        await first.aclose()
+        pools = get_pool("a.example"), get_pool("b.example")
+        await close_shared_pools()
+        return pools
+
+    a, b = asyncio.run(main())
+    assert a.hosts == ["a.example", "a.example"] and b.hosts == ["b.example"]
+    assert a is not asyncio.run(main())[0]
+
+
+def test_close_shared_pools_closes_and_drops_them(monkeypatch):
+    monkeypatch.setattr(pool, "AsyncHTTPTransport", FakePool)
+
+    async def main():
+        opened = get_pool("a.example")
+        assert not opened.closed
+        await close_shared_pools()
+        assert asyncio.get_running_loop() not in _pools
+        reopened = get_pool("a.example")
+        await close_shared_pools()
+        return opened, reopened
+
+    opened, reopened = asyncio.run(main())
+    assert opened.closed and reopened.closed and reopened is not opened
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import httpx
+
+from ..auth import AsyncTokenProvider, TokenCache
+from ..PubSub.clients.pub_sub_admin_client import IPubSubAdmin
+from ..transport import pool_settings
+
+
+class Admin(IPubSubAdmin):
+    def get_project_settings(self, base_settings):
+        return SimpleNamespace(current_service="p")
+
+
+class FakeIAM:
+    def __init__(self) -> None:
+        self.minted = 0
+
+    def generate_access_token(self, name, scope):
+        self.minted += 1
+        expire_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        return SimpleNamespace(access_token=f"token-{self.minted}", expire_time=expire_time)
+
+
+def test_admin_client_refreshes_rejected_tokens(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append((str(request.url), request.headers["Authorization"]))
+        if len(seen) == 1:
+            return httpx.Response(401, json={})
+        return httpx.Response(200, json={"topics": [{"name": "projects/p/topics/t"}]})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    cache = TokenCache()
+    cache._client = FakeIAM()
+
+    async def main():
+        async with Admin() as admin:
+            admin.client.auth.provider = AsyncTokenProvider(cache)
+            return [topic.name async for topic in admin.list_topics()]
+
+    assert asyncio.run(main()) == ["projects/p/topics/t"]
+    assert seen == [
+        ("https://pubsub.googleapis.com/v1/projects/p/topics", "Bearer token-1"),
+        ("https://pubsub.googleapis.com/v1/projects/p/topics", "Bearer token-2"),
+    ]
+
+
+def test_admin_subclasses_can_supply_their_own_token(monkeypatch):
+    seen = []
+
+    class TokenAdmin(Admin):
+        def get_oauth_token(self, scopes):
+            seen.append(scopes)
+            return "own-token"
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+
+    async def main():
+        async with TokenAdmin() as admin:
+            return [topic async for topic in admin.list_topics()]
+
+    assert asyncio.run(main()) == []
+    assert seen == [["https://www.googleapis.com/auth/pubsub"], "Bearer own-token"]
+
+
+def test_list_subscriptions_streams_every_page(monkeypatch):
+    def handler(request):
+        if request.url.params.get("pageToken"):
+            return httpx.Response(200, json={"subscriptions": [{"name": "projects/p/subscriptions/b", "topic": "projects/p/topics/t"}]})
+        return httpx.Response(200, json={
+            "subscriptions": [{"name": "projects/p/subscriptions/a", "topic": "projects/p/topics/t", "ackDeadlineSeconds": 30}],
+            "nextPageToken": "t1",
+        })
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    cache = TokenCache()
+    cache._client = FakeIAM()
+
+    async def main():
+        async with Admin() as admin:
+            admin.client.auth.provider = AsyncTokenProvider(cache)
+            return [(sub.name, sub.ack_deadline_seconds) async for sub in admin.list_subscriptions()]
+
+    assert asyncio.run(main()) == [("projects/p/subscriptions/a", 30), ("projects/p/subscriptions/b", None)]
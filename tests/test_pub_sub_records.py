@@ -0,0 +1,56 @@
+import json
+
+from ..PubSub.models.pub_sub_records import MessageRecord, ReceivedMessageRecord
+from ..PubSub.models.pub_sub_types import ReceivedMessage
+
+FULL = {
+    "ackId": "ack-1",
+    "message": {
+        "data": "eyJoZWxsbyI6ICJ3b3JsZCJ9",
+        "attributes": {"origin": "test"},
+        "messageId": "1",
+        "publishTime": "2024-01-02T03:04:05.123456789Z",
+        "orderingKey": "key",
+    },
+    "deliveryAttempt": 3,
+}
+
+
+def test_full_message_round_trips_through_the_model():
+    record = ReceivedMessageRecord.from_json(FULL)
+    assert record.message.decoded_data == b'{"hello": "world"}'
+    assert record.message.publish_time.microsecond == 123456
+    model = record.to_model()
+    assert model.message.publish_time.nanosecond == 123456789
+    assert json.loads(model.json_bytes()) == FULL
+    again = ReceivedMessageRecord.from_model(model)
+    assert again.to_model() == model
+    assert again.message._publish_time == FULL["message"]["publishTime"]
+    assert again.message.attributes == {"origin": "test"} and again.delivery_attempt == 3
+
+
+def test_absent_optional_fields_stay_absent():
+    record = ReceivedMessageRecord.from_json({"ackId": "ack-1", "message": {"data": "YQ==", "messageId": "1"}})
+    assert record.delivery_attempt == 0
+    message = record.message
+    assert message.attributes is None and message.ordering_key is None and message.publish_time is None
+    model = record.to_model()
+    assert model.message.attributes is None and model.message.publish_time is None
+    again = ReceivedMessageRecord.from_model(model)
+    assert again.message.attributes is None and again.message.ordering_key is None
+    assert again.message.decoded_data == b"a" and again.to_model() == model
+
+
+def test_model_round_trips_through_the_record():
+    model = ReceivedMessage.parse_response(FULL)
+    assert ReceivedMessageRecord.from_model(model).to_model() == model
+    empty = MessageRecord()
+    assert empty.decoded_data == b"" and empty.size == 0
+    assert MessageRecord.from_model(empty.to_model()).to_model() == empty.to_model()
+
+
+def test_nanosecond_publish_times_with_an_offset():
+    record = MessageRecord(publish_time="2024-01-02T04:04:05.123456789+01:00")
+    publish_time = record.to_model().publish_time
+    assert publish_time.nanosecond == 123456789
+    assert MessageRecord.from_model(record.to_model())._publish_time == "2024-01-02T03:04:05.123456789Z"
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from ..transport import retry
+from ..transport.retry import RetryPolicy, RetryTransport
+
+URL = "https://pubsub.googleapis.com/v1/projects/p/topics/t"
+UNAVAILABLE = {"error": {"code": 503, "status": "UNAVAILABLE"}}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(retry, "asyncio", SimpleNamespace(sleep=sleep))
+    return slept
+
+
+def send(responses, method="GET", policy=None, **extensions):
+    """Sends one request through a RetryTransport answering with `responses` in turn."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        result = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    if policy is not None:
+        extensions["retry_policy"] = policy
+
+    async def main():
+        transport = RetryTransport(httpx.MockTransport(handler))
+        request = httpx.Request(method, URL, extensions=extensions)
+        response = await transport.handle_async_request(request)
+        return response, request
+
+    response, request = asyncio.run(main())
+    return response, request, calls
+
+
+def test_unavailable_is_retried(sleeps):
+    response, request, calls = send([httpx.Response(503, json=UNAVAILABLE), httpx.Response(200, json={})])
+    assert response.status_code == 200 and len(calls) == 2
+    assert request.extensions["retry_count"] == 1 and len(sleeps) == 1
+
+
+def test_non_idempotent_post_is_not_retried_on_503(sleeps):
+    response, request, calls = send([httpx.Response(503, json=UNAVAILABLE), httpx.Response(200)], "POST")
+    assert response.status_code == 503 and len(calls) == 1
+    assert "retry_count" not in request.extensions and not sleeps
+
+
+def test_marked_idempotent_post_is_retried(sleeps):
+    response, _, calls = send([httpx.Response(503), httpx.Response(200)], "POST", idempotent=True)
+    assert response.status_code == 200 and len(calls) == 2
+
+
+def test_429_is_retried_for_any_method(sleeps):
+    response, request, calls = send([httpx.Response(429), httpx.Response(429), httpx.Response(200)], "POST")
+    assert response.status_code == 200 and len(calls) == 3
+    assert request.extensions["retry_count"] == 2
+
+
+def test_connect_errors_are_retried_for_any_method(sleeps):
+    response, _, calls = send([httpx.ConnectError("refused"), httpx.Response(200)], "POST")
+    assert response.status_code == 200 and len(calls) == 2
+    with pytest.raises(httpx.ReadError):
+        send([httpx.ReadError("reset"), httpx.Response(200)], "POST")
+
+
+def test_retry_after_is_honored(sleeps):
+    send([httpx.Response(429, headers={"Retry-After": "7"}), httpx.Response(200)])
+    assert sleeps == [7.0]
+
+
+def test_retry_info_is_honored(sleeps):
+    body = {"error": {"status": "RESOURCE_EXHAUSTED", "details": [
+        {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "2.5s"},
+    ]}}
+    send([httpx.Response(429, json=body), httpx.Response(200)])
+    assert sleeps == [2.5]
+
+
+def test_backoff_grows_up_to_max_attempts(sleeps, monkeypatch):
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(max_attempts=4, initial_backoff=0.5, multiplier=2.0, max_backoff=1.5)
+    response, request, calls = send([httpx.Response(503)], policy=policy)
+    assert response.status_code == 503 and len(calls) == 4
+    assert sleeps == [0.5, 1.0, 1.5]
+    assert request.extensions["retry_count"] == 3
+
+
+def test_deadline_stops_retries(sleeps):
+    policy = RetryPolicy(deadline=5.0)
+    response, _, calls = send([httpx.Response(503, headers={"Retry-After": "10"}), httpx.Response(200)], policy=policy)
+    assert response.status_code == 503 and len(calls) == 1 and not sleeps
+    # Long polls aren't bound by the deadline.
+    response, _, calls = send(
+        [httpx.Response(503, headers={"Retry-After": "10"}), httpx.Response(200)], policy=policy, long_poll=True
+    )
+    assert response.status_code == 200 and sleeps == [10.0]
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+import json
+from typing import Dict, List, Optional
+
+import pytest
+
+from ..base_types import JsonBase
+from ..benchmarks.decode import SAMPLES
+from ..CloudTasks.models.PushQueue import JsonPushQueueOutput, JsonRetryConfig, State
+from ..PubSub.models.pub_sub_topics import PubSubMessageRequest
+
+
+class Inner(JsonBase):
+    created_at: Optional[datetime] = None
+    state: Optional[State] = None
+    note: Optional[str] = None
+
+
+class Outer(JsonBase):
+    display_name: str
+    inner: Inner = Inner()
+    inners: List[Inner] = []
+    by_key: Dict[str, Inner] = {}
+    labels: Optional[Dict[str, str]] = None
+    blob: Optional[bytes] = None
+
+
+NOW = datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+
+MODELS = [model.parse_obj(data) for model, data in SAMPLES] + [
+    PubSubMessageRequest(data=b"aGVsbG8=", ordering_key="k"),
+    JsonPushQueueOutput.parse_obj({**dict(SAMPLES)[JsonPushQueueOutput], "retryConfig": {"maxAttempts": 3}}),
+    JsonRetryConfig(),
+    Outer(display_name="x"),
+    Outer(
+        display_name="y",
+        inner=Inner(created_at=NOW, state=State.running),
+        inners=[Inner(note="a"), Inner(created_at=NOW.astimezone(timezone(timedelta(hours=2))))],
+        by_key={"k": Inner(state=State.paused)},
+        labels={"a": "b"},
+        blob=b"YQ==",
+    ),
+]
+
+OPTIONS = [{}, {"exclude_none": True}, {"exclude_unset": True}, {"exclude_none": True, "exclude_unset": True}]
+
+
+@pytest.mark.parametrize("options", OPTIONS, ids=lambda options: "-".join(options) or "defaults")
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: type(model).__name__)
+def test_json_bytes_matches_pydantic(model, options):
+    assert json.loads(model.json_bytes(**options)) == json.loads(model.json(by_alias=True, **options))
+
+
+def test_exclude_leaves_out_top_level_fields():
+    model = Outer(display_name="x", labels={"a": "b"})
+    expected = json.loads(model.json(by_alias=True, exclude={"labels"}))
+    assert json.loads(model.json_bytes(exclude={"labels"})) == expected
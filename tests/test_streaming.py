@@ -0,0 +1,139 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+
+from ..base_types import streaming, stream_list
+from ..base_types.streaming import JsonArrayStream
+from ..transport import GoogleApiError
+
+PAGE = {
+    "queues": [
+        {"name": "a", "rate": 2.5, "depth": -1e5, "tags": ["x", "y"], "ok": True},
+        {"name": "quote \" and \\ backslash", "nested": {"deep": [[1, 2], {"k": None}]}},
+        12345678901234567890,
+        -0.125e-3,
+        "café \\u00e9 ☃",
+        False,
+        None,
+        [],
+        {},
+    ],
+    "nextPageToken": "token-1",
+    "count": 9.75,
+}
+TEXT = json.dumps(PAGE, indent=1)
+
+
+def _parse(chunks):
+    parser = JsonArrayStream("queues")
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    parser.close()
+    return items, parser.extra
+
+
+@pytest.mark.parametrize("text", [TEXT, json.dumps(PAGE, separators=(",", ":"))])
+def test_every_split_point(text):
+    for split in range(len(text) + 1):
+        items, extra = _parse([text[:split], text[split:]])
+        assert items == PAGE["queues"], split
+        assert extra == {"nextPageToken": "token-1", "count": 9.75}, split
+
+
+def test_one_char_chunks():
+    items, extra = _parse(TEXT)
+    assert items == PAGE["queues"]
+    assert extra["count"] == 9.75
+
+
+def test_random_chunks():
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(TEXT)), rng.randint(1, 20)))
+        chunks = [TEXT[a:b] for a, b in zip([0] + cuts, cuts + [len(TEXT)])]
+        assert _parse(chunks)[0] == PAGE["queues"]
+
+
+@pytest.mark.parametrize("head,tail", [("2.", "5"), ("1e", "3"), ("-", "7"), ("1", "0"), ("tr", "ue")])
+def test_scalar_split_inside_value(head, tail):
+    parser = JsonArrayStream("items")
+    assert parser.feed('{"items": [0, ' + head) == [0]
+    assert parser.feed(tail + ", 1]}") == [json.loads(head + tail), 1]
+    parser.close()
+
+
+def test_element_is_decoded_once_complete(monkeypatch):
+    decoder = json.JSONDecoder()
+    calls = []
+
+    class CountingDecoder:
+        def raw_decode(self, s, idx=0):
+            calls.append(idx)
+            return decoder.raw_decode(s, idx)
+
+    monkeypatch.setattr(streaming, "_decoder", CountingDecoder())
+    element = json.dumps({"data": "x" * 1000, "list": list(range(100))})
+    parser = JsonArrayStream("items")
+    parser.feed('{"items": [')
+    calls.clear()
+    items = []
+    for i in range(0, len(element), 10):
+        items.extend(parser.feed(element[i:i + 10]))
+    assert items == [json.loads(element)]
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("text", [TEXT[:-1], TEXT[:len(TEXT) // 2], '{"queues": [1'])
+def test_truncated_body_raises_on_close(text):
+    parser = JsonArrayStream("queues")
+    parser.feed(text)
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_invalid_value_raises():
+    with pytest.raises(ValueError):
+        JsonArrayStream("queues").feed('{"queues": [2x, 3]}')
+
+
+def test_stream_list_follows_page_tokens_until_an_error():
+    requests = []
+    pages = {
+        None: {"queues": [{"name": "a"}, {"name": "b"}], "nextPageToken": "t1"},
+        "t1": {"nextPageToken": "t2", "queues": [{"name": "c"}]},
+    }
+
+    def handler(request):
+        requests.append(dict(request.url.params))
+        token = request.url.params.get("pageToken")
+        if token in pages:
+            return httpx.Response(200, json=pages[token])
+        return httpx.Response(403, json={"error": {"message": "denied"}})
+
+    async def main():
+        items = []
+        async with httpx.AsyncClient(base_url="https://cloudtasks.googleapis.com", transport=httpx.MockTransport(handler)) as client:
+            with pytest.raises(GoogleApiError) as raised:
+                async for item in stream_list(client, "/v2/queues", "queues", params={"pageSize": 2}):
+                    items.append(item["name"])
+        return items, raised.value
+
+    items, error = asyncio.run(main())
+    assert items == ["a", "b", "c"]
+    assert requests == [{"pageSize": "2"}, {"pageSize": "2", "pageToken": "t1"}, {"pageSize": "2", "pageToken": "t2"}]
+    assert error.status_code == 403 and "denied" in str(error)
+
+
+def test_stream_list_stops_without_a_page_token():
+    def handler(request):
+        return httpx.Response(200, json={"queues": [{"name": "a"}], "nextPageToken": ""})
+
+    async def main():
+        async with httpx.AsyncClient(base_url="https://cloudtasks.googleapis.com", transport=httpx.MockTransport(handler)) as client:
+            return [item async for item in stream_list(client, "/v2/queues", "queues")]
+
+    assert asyncio.run(main()) == [{"name": "a"}]
@@ -0,0 +1,203 @@
+import asyncio
+import json
+
+import httpx
+
+from ..benchmarks.clients import seed_tokens
+from ..PubSub import FlowControl, ISubscriberClient
+from ..transport import default_retry_policy, pool_settings
+
+MESSAGE = {
+    "ackId": "ack-1",
+    "message": {"data": "eyJoZWxsbyI6ICJ3b3JsZCJ9", "messageId": "1", "publishTime": "2024-01-02T03:04:05Z"},
+}
+
+
+class Subscriber(ISubscriberClient):
+    project_id = "p"
+    subscription_id = "s"
+
+
+class FakeSubscription:
+    """Answers every pull with as many messages as asked for, and records acks."""
+    def __init__(self):
+        self.pulls = []
+        self.acked = []
+        self.sent = 0
+
+    async def handler(self, request):
+        await asyncio.sleep(0.001)
+        path = request.url.path
+        if path.endswith(":pull"):
+            self.pulls.append(json.loads(request.content)["maxMessages"])
+            messages = []
+            for _ in range(self.pulls[-1]):
+                self.sent += 1
+                message = {**MESSAGE["message"], "messageId": str(self.sent)}
+                messages.append({"ackId": f"ack-{self.sent}", "message": message})
+            return httpx.Response(200, json={"receivedMessages": messages})
+        if path.endswith(":acknowledge"):
+            self.acked.extend(json.loads(request.content)["ackIds"])
+        return httpx.Response(200, json={})
+
+
+async def wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.002)
+    raise AssertionError("condition never held")
+
+
+MESSAGE_SIZE = 18
+
+
+def test_pull_loop_survives_malformed_responses(monkeypatch):
+    pulls = []
+    acked = []
+
+    async def handler(request):
+        await asyncio.sleep(0.001)
+        path = request.url.path
+        if path.endswith(":pull"):
+            pulls.append(request)
+            if len(pulls) == 1:
+                return httpx.Response(200, text="not json")
+            if len(pulls) == 2:
+                return httpx.Response(200, json={"receivedMessages": [MESSAGE]})
+            return httpx.Response(200, json={})
+        if path.endswith(":acknowledge"):
+            acked.extend(json.loads(request.content)["ackIds"])
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    errors = []
+    received = []
+
+    async def callback(record):
+        received.append(record.message.message_id)
+
+    async def main():
+        subscriber = Subscriber(callback, pull_loops=1, on_error=errors.append)
+        seed_tokens(subscriber.client.auth)
+        async with subscriber:
+            for _ in range(200):
+                if acked:
+                    break
+                await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert isinstance(errors[0], ValueError)
+    assert received == ["1"] and acked == ["ack-1"]
+    assert all(request.extensions.get("long_poll") for request in pulls)
+
+
+def test_flow_control_caps_outstanding_messages_across_pull_loops(monkeypatch):
+    server = FakeSubscription()
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(server.handler))
+    received = []
+    peak = []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def callback(record):
+            received.append(record.ack_id)
+            peak.append(subscriber.outstanding_messages)
+            await gate.wait()
+
+        subscriber = Subscriber(callback, FlowControl(max_outstanding_messages=5), pull_loops=3, workers=10, max_messages=2)
+        seed_tokens(subscriber.client.auth)
+        async with subscriber:
+            await wait_for(lambda: len(received) == 5)
+            await asyncio.sleep(0.05)
+            paused = len(received)
+            gate.set()
+            await wait_for(lambda: len(received) >= 15)
+        return paused, subscriber.outstanding_messages
+
+    paused, outstanding = asyncio.run(main())
+    assert paused == 5 and max(peak) <= 5
+    assert all(requested <= 2 for requested in server.pulls)
+    assert outstanding == 0 and sorted(server.acked) == sorted(received)
+
+
+def test_flow_control_caps_outstanding_bytes_to_one_response_per_loop(monkeypatch):
+    server = FakeSubscription()
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(server.handler))
+    received = []
+    peak = []
+    max_bytes = 3 * MESSAGE_SIZE
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def callback(record):
+            received.append(record.ack_id)
+            peak.append(subscriber.outstanding_bytes)
+            await gate.wait()
+
+        subscriber = Subscriber(callback, FlowControl(max_outstanding_bytes=max_bytes), pull_loops=2, workers=10, max_messages=2)
+        seed_tokens(subscriber.client.auth)
+        async with subscriber:
+            await wait_for(lambda: len(received) >= 3)
+            await asyncio.sleep(0.05)
+            paused = len(received)
+            gate.set()
+            await wait_for(lambda: len(received) >= paused + 4)
+        return paused
+
+    paused = asyncio.run(main())
+    # Sizes are only known once a response arrives, each loop may overshoot by one response.
+    assert max(peak) < max_bytes + 2 * 2 * MESSAGE_SIZE
+    assert paused * MESSAGE_SIZE < max_bytes + 2 * 2 * MESSAGE_SIZE
+
+
+def test_stop_handles_and_acks_every_pulled_message(monkeypatch):
+    server = FakeSubscription()
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(server.handler))
+    started = []
+    handled = []
+
+    async def callback(record):
+        started.append(record.ack_id)
+        await asyncio.sleep(0.01)
+        handled.append(record.ack_id)
+
+    async def main():
+        subscriber = Subscriber(callback, pull_loops=1, workers=4, max_messages=8)
+        seed_tokens(subscriber.client.auth)
+        async with subscriber:
+            await wait_for(lambda: len(started) >= 4)
+            assert len(handled) < len(started)
+        return subscriber.outstanding_messages
+
+    assert asyncio.run(main()) == 0
+    assert len(handled) >= 4 and sorted(handled) == sorted(started)
+    assert sorted(server.acked) == sorted(handled)
+
+
+def test_pull_loop_outlives_long_failure_streaks(monkeypatch):
+    def handler(request):
+        return httpx.Response(403, json={"error": {"message": "denied"}})
+
+    monkeypatch.setattr(pool_settings, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(default_retry_policy, "max_backoff", 0.0)
+    errors = []
+
+    async def callback(record):
+        pass
+
+    async def main():
+        subscriber = Subscriber(callback, pull_loops=1, on_error=errors.append)
+        seed_tokens(subscriber.client.auth)
+        async with subscriber:
+            # The backoff exponent of 2 ** (failures - 1) overflows a float past 1024 failures.
+            for _ in range(2000):
+                if len(errors) > 1100:
+                    break
+                await asyncio.sleep(0.005)
+            return [task.done() for task in subscriber._pullers]
+
+    assert asyncio.run(main()) == [False]
+    assert len(errors) > 1100
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from ..base_types import JsonBase, zulu_decode, zulu_encode
+
+
+class Stamped(JsonBase):
+    at: datetime
+    maybe: Optional[datetime] = None
+    many: List[datetime] = []
+    count: int = 0
+
+
+class Child(Stamped):
+    name: str = ""
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("2023-01-01T12:00:00Z", datetime(2023, 1, 1, 12, tzinfo=timezone.utc)),
+    ("2023-01-01T12:00:00.5z", datetime(2023, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)),
+    ("2023-01-01T12:00:00.123456789+02:00", datetime(2023, 1, 1, 10, 0, 0, 123456, tzinfo=timezone.utc)),
+    ("2023-01-01T12:00:00-01:30", datetime(2023, 1, 1, 13, 30, tzinfo=timezone.utc)),
+    ("2023-01-01T12:00:00", datetime(2023, 1, 1, 12)),
+    ("2023-01-01 12:00", datetime(2023, 1, 1, 12)),
+])
+def test_decode(value, expected):
+    decoded = zulu_decode(value)
+    assert decoded == expected
+    assert decoded.tzinfo is None if expected.tzinfo is None else decoded.utcoffset() == timedelta(0)
+
+
+@pytest.mark.parametrize("value,encoded", [
+    ("2023-01-01T12:00:00.123456789Z", "2023-01-01T12:00:00.123456789Z"),
+    ("2023-01-01T12:00:00.123456789+02:00", "2023-01-01T10:00:00.123456789Z"),
+    ("2023-01-01T12:00:00.1234567z", "2023-01-01T12:00:00.123456700Z"),
+])
+def test_decode_keeping_nanoseconds(value, encoded):
+    decoded = zulu_decode(value, keep_nanos=True)
+    assert decoded.nanosecond == int(encoded[20:29])
+    assert decoded == zulu_decode(value) and type(zulu_decode(value)) is datetime
+    assert zulu_encode(decoded) == encoded
+
+
+def test_decode_keeping_nanoseconds_only_builds_them_when_needed():
+    assert type(zulu_decode("2023-01-01T12:00:00.123456Z", keep_nanos=True)) is datetime
+    assert type(zulu_decode("2023-01-01T12:00:00", keep_nanos=True)) is datetime
+
+
+@pytest.mark.parametrize("value", ["2023-01-01T12:00:00Z", "2023-01-01T12:00:00", "2023-01-01T12:00:00+05:00", 0])
+def test_model_fields_match_pydantic(value):
+    class Plain(BaseModel):
+        at: datetime
+
+    assert Stamped(at=value).at == Plain(at=value).at
+    assert Child(at=value, maybe=value).maybe == Plain(at=value).at
+
+
+def test_invalid_timestamp_is_a_validation_error():
+    with pytest.raises(ValidationError):
+        Stamped(at="not a timestamp")
+
+
+def test_fast_path_only_on_datetime_fields():
+    for model in (Stamped, Child):
+        fields = model.__fields__
+        assert "_decode_zulu" in fields["at"].class_validators
+        assert "_decode_zulu" in fields["maybe"].class_validators
+        assert fields["count"].pre_validators is None
+
+
+def test_encode():
+    assert zulu_encode(datetime(2023, 1, 1, 12, 0, 0, 120000)) == "2023-01-01T12:00:00.120Z"
+    assert zulu_encode(datetime(2023, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))) == "2023-01-01T10:00:00Z"
+
+
+def test_encode_keeps_fold_apart():
+    zone = ZoneInfo("America/New_York")
+    first = datetime(2023, 11, 5, 1, 30, tzinfo=zone)
+    second = first.replace(fold=1)
+    assert first == second
+    assert zulu_encode(first) == "2023-11-05T05:30:00Z"
+    assert zulu_encode(second) == "2023-11-05T06:30:00Z"
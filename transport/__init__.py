@@ -0,0 +1,9 @@
+from .errors import *
+from .pool import *
+from .retry import *
+from .instrumentation import *
+from .limiter import *
+from .coalesce import *
+from .cache import *
+from .compression import *
+from .cassette import *
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import re
+import time
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Pattern, Set, Tuple
+
+from httpx import AsyncBaseTransport, Headers, Request, Response
+
+CACHEABLE_METHODS = frozenset({"GET", "HEAD"})
+
+CacheKey = Tuple[str, str, Hashable]
+"""(scheme://host/path, query, credential)"""
+
+
+def cache_key(request: Request) -> CacheKey:
+    """
+    Entries are keyed on the credential as well as the url, so a response is
+    only ever served back to the credential that fetched it. That is the
+    identity BearerAuth puts in the "credential" extension, the same the
+    coalescer keys on, so refreshing a token keeps its entries. Requests
+    authorized some other way fall back to a hash of their Authorization header.
+    """
+    url = request.url
+    credential = request.extensions.get("credential")
+    if credential is None:
+        authorization = request.headers.get("Authorization", "")
+        credential = hashlib.sha256(authorization.encode()).hexdigest() if authorization else ""
+    return f"{url.scheme}://{url.host}{url.path}", url.query.decode(), credential
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: Headers
+    raw: bytes
+    """Body as received, still content-encoded."""
+    stored_at: float
+    ttl: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("ETag")
+
+    def to_response(self, request: Request) -> Response:
+        return Response(self.status_code, headers=self.headers, content=self.raw, request=request)
+
+
+def _prefixes(resource: str) -> Iterator[str]:
+    """`resource` and each of its parent paths, down to the bare origin."""
+    path_start = resource.find("://") + 3
+    while True:
+        yield resource
+        cut = resource.rfind("/", path_start)
+        if cut < 0:
+            return
+        resource = resource[:cut]
+
+
+class _PrefixIndex:
+    """Items by the resource they belong to, found by exact resource or by any parent path."""
+    __slots__ = ("_at", "_under")
+
+    def __init__(self) -> None:
+        self._at: Dict[str, Set[Hashable]] = {}
+        self._under: Dict[str, Set[Hashable]] = {}
+
+    def add(self, resource: str, item: Hashable) -> None:
+        self._at.setdefault(resource, set()).add(item)
+        for prefix in _prefixes(resource):
+            self._under.setdefault(prefix, set()).add(item)
+
+    def discard(self, resource: str, item: Hashable) -> None:
+        self._discard(self._at, resource, item)
+        for prefix in _prefixes(resource):
+            self._discard(self._under, prefix, item)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Hashable]], resource: str, item: Hashable) -> None:
+        items = index.get(resource)
+        if items is not None:
+            items.discard(item)
+            if not items:
+                del index[resource]
+
+    def touched_by(self, resource: str) -> Set[Hashable]:
+        """Items of `resource`, of everything below it and of its collection."""
+        collection = resource.rpartition("/")[0]
+        return self._under.get(resource, set()) | self._at.get(collection, set())
+
+
+class _PendingRead:
+    """A cacheable read in flight, not stored once a mutation touched its resource meanwhile."""
+    __slots__ = ("key", "stale")
+
+    def __init__(self, key: CacheKey) -> None:
+        self.key = key
+        self.stale = False
+
+
+class ResponseCache:
+    """
+    Opt-in, size bounded LRU cache for rarely changing resource reads.
+    A GET whose path matches one of `ttl_rules` is served from the cache for
+    its ttl, then revalidated with If-None-Match when the response had an ETag.
+    Entries are per credential. Any other method invalidates the resource it
+    touched, its children and its collection, both before it is sent and
+    once it has returned, and reads of those in flight meanwhile aren't stored.
+    Mutations of unrelated resources leave entries and reads alone.
+    Turn on with `response_cache.enabled = True`, or per call with
+    `extensions={"cache_ttl": seconds}`.
+    """
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.enabled = False
+        self.max_entries = max_entries
+        self.ttl_rules: List[Tuple[Pattern[str], float]] = [
+            (re.compile(r"/queues/[^/:]+$"), 60.0),
+            (re.compile(r"/schemas/[^/:]+$"), 300.0),
+            (re.compile(r"/connectSettings$"), 300.0),
+            (re.compile(r"/drive/v3/files/[^/:]+$"), 60.0),
+        ]
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        self._entry_index = _PrefixIndex()
+        self._read_index = _PrefixIndex()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, request: Request) -> Optional[float]:
+        ttl = request.extensions.get("cache_ttl")
+        if ttl is not None:
+            return ttl
+        if not self.enabled or request.url.params.get("alt") == "media":
+            return None
+        for pattern, rule_ttl in self.ttl_rules:
+            if pattern.search(request.url.path):
+                return rule_ttl
+        return None
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: CacheKey, entry: CachedResponse) -> None:
+        if key not in self._entries:
+            self._entry_index.add(key[0], key)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._entry_index.discard(evicted[0], evicted)
+
+    def begin_read(self, key: CacheKey) -> _PendingRead:
+        read = _PendingRead(key)
+        self._read_index.add(key[0], read)
+        return read
+
+    def end_read(self, read: _PendingRead) -> None:
+        self._read_index.discard(read.key[0], read)
+
+    def invalidate(self, request: Request) -> None:
+        """Drops entries for the touched resource, its children and its collection."""
+        path = request.url.path.partition(":")[0].rstrip("/")
+        resource = f"{request.url.scheme}://{request.url.host}{path}"
+        for read in self._read_index.touched_by(resource):
+            read.stale = True
+        for key in self._entry_index.touched_by(resource):
+            del self._entries[key]
+            self._entry_index.discard(key[0], key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._entry_index = _PrefixIndex()
+
+
+response_cache = ResponseCache()
+
+
+class CacheTransport(AsyncBaseTransport):
+    def __init__(self, transport: AsyncBaseTransport, cache: Optional[ResponseCache] = None) -> None:
+        self._transport = transport
+        self.cache = cache if cache is not None else response_cache
+
+    async def handle_async_request(self, request: Request) -> Response:
+        cache = self.cache
+        if request.method not in CACHEABLE_METHODS:
+            cache.invalidate(request)
+            try:
+                return await self._transport.handle_async_request(request)
+            finally:
+                # A read racing the mutation may have stored the old state meanwhile.
+                cache.invalidate(request)
+        ttl = cache.ttl_for(request)
+        if ttl is None:
+            return await self._transport.handle_async_request(request)
+        key = cache_key(request)
+        entry = cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry.stored_at + entry.ttl:
+            return entry.to_response(request)
+        if entry is not None and entry.etag:
+            request.headers["If-None-Match"] = entry.etag
+        read = cache.begin_read(key)
+        try:
+            response = await self._transport.handle_async_request(request)
+            if response.status_code == 304 and entry is not None:
+                await response.aclose()
+                if not read.stale:
+                    cache.put(key, entry._replace(stored_at=now, ttl=ttl))
+                return entry.to_response(request)
+            if response.status_code != 200:
+                return response
+            raw = b"".join([chunk async for chunk in response.stream])
+            await response.aclose()
+            entry = CachedResponse(response.status_code, response.headers, raw, now, ttl)
+            if not read.stale:
+                cache.put(key, entry)
+            return entry.to_response(request)
+        finally:
+            cache.end_read(read)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+from base64 import b64decode, b64encode
+from collections import defaultdict, deque
+import json
+import threading
+import time
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from httpx import AsyncBaseTransport, Request, Response
+
+from .pool import SharedTransport
+
+RECORDED_REQUEST_HEADERS = frozenset({"content-type", "content-encoding"})
+"""Everything else, Authorization included, is left out of cassettes."""
+
+DROPPED_RESPONSE_HEADERS = frozenset({"set-cookie"})
+
+
+class CassetteMiss(LookupError):
+    ...
+
+
+class CassetteEntry(NamedTuple):
+    """One request/response pair, bodies as sent on the wire (still gzipped if they were)."""
+    at: float
+    """Seconds since the first recorded request."""
+    elapsed: float
+    method: str
+    url: str
+    request_headers: List[Tuple[str, str]]
+    request_body: bytes
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.method, self.url
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "at": round(self.at, 6),
+            "elapsed": round(self.elapsed, 6),
+            "method": self.method,
+            "url": self.url,
+            "request_headers": self.request_headers,
+            "request_body": b64encode(self.request_body).decode(),
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "body": b64encode(self.body).decode(),
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> CassetteEntry:
+        data: Dict[str, Any] = json.loads(line)
+        return cls(
+            at=data["at"],
+            elapsed=data["elapsed"],
+            method=data["method"],
+            url=data["url"],
+            request_headers=[tuple(pair) for pair in data["request_headers"]],
+            request_body=b64decode(data["request_body"]),
+            status_code=data["status_code"],
+            headers=[tuple(pair) for pair in data["headers"]],
+            body=b64decode(data["body"]),
+        )
+
+
+def load_cassette(path: str) -> List[CassetteEntry]:
+    with open(path, encoding="utf-8") as file:
+        return [CassetteEntry.from_json(line) for line in file if line.strip()]
+
+
+class RecordingTransport(AsyncBaseTransport):
+    """
+    Appends every request/response pair going through it to a JSON lines cassette.
+    Install as the innermost transport of every client with
+    `pool_settings.transport = RecordingTransport("traffic.jsonl")` so each
+    attempt is recorded as it went over the wire, and replay the file with
+    `pool_settings.transport = ReplayTransport("traffic.jsonl")`.
+    """
+    def __init__(self, path: str, transport: Optional[AsyncBaseTransport] = None) -> None:
+        self.path = path
+        self._transport = transport or SharedTransport()
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._origin: Optional[float] = None
+
+    async def handle_async_request(self, request: Request) -> Response:
+        request_body = await request.aread()
+        started = time.monotonic()
+        if self._origin is None:
+            self._origin = started
+        response = await self._transport.handle_async_request(request)
+        try:
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        elapsed = time.monotonic() - started
+        entry = CassetteEntry(
+            at=started - self._origin,
+            elapsed=elapsed,
+            method=request.method,
+            url=str(request.url),
+            request_headers=[
+                (name, value) for name, value in request.headers.items()
+                if name in RECORDED_REQUEST_HEADERS
+            ],
+            request_body=request_body,
+            status_code=response.status_code,
+            headers=[
+                (name, value) for name, value in response.headers.multi_items()
+                if name not in DROPPED_RESPONSE_HEADERS
+            ],
+            body=body,
+        )
+        await asyncio.to_thread(self._write, entry.to_json() + "\n")
+        return Response(
+            response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request,
+            extensions=response.extensions
+        )
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    async def aclose(self) -> None:
+        """Left open, every client shares it. Call `close` once recording is done."""
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(AsyncBaseTransport):
+    """
+    Serves recorded responses instead of sending requests.
+    Requests are matched on method and url, repeated requests get the
+    recorded responses in order and start over once all have been served
+    when `loop` is set, otherwise they raise CassetteMiss.
+    :param time_scale: Multiplier of the recorded timing, 0 replays at full
+        speed and 1 as recorded: each response takes at least its recorded
+        latency and, counted from the first replayed request, isn't served
+        before it arrived in the recording.
+    """
+    def __init__(
+            self,
+            cassette: Union[str, Iterable[CassetteEntry]],
+            time_scale: float = 0.0,
+            loop: bool = True
+        ) -> None:
+        entries = load_cassette(cassette) if isinstance(cassette, str) else list(cassette)
+        self.time_scale = time_scale
+        self.loop = loop
+        self._recorded: Dict[Tuple[str, str], List[CassetteEntry]] = defaultdict(list)
+        for entry in entries:
+            self._recorded[entry.key].append(entry)
+        self._pending: Dict[Tuple[str, str], Deque[CassetteEntry]] = {
+            key: deque(recorded) for key, recorded in self._recorded.items()
+        }
+        self._origin: Optional[float] = None
+
+    def _next(self, key: Tuple[str, str]) -> CassetteEntry:
+        pending = self._pending.get(key)
+        if not pending:
+            if not self.loop or key not in self._recorded:
+                raise CassetteMiss(f"No recorded response left for {key[0]} {key[1]}")
+            pending = self._pending[key] = deque(self._recorded[key])
+        return pending.popleft()
+
+    async def handle_async_request(self, request: Request) -> Response:
+        await request.aread()
+        entry = self._next((request.method, str(request.url)))
+        if self.time_scale:
+            await asyncio.sleep(self._delay(entry))
+        return Response(entry.status_code, headers=entry.headers, content=entry.body, request=request)
+
+    def _delay(self, entry: CassetteEntry) -> float:
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = now
+        arrived = self._origin + (entry.at + entry.elapsed) * self.time_scale
+        return max(entry.elapsed * self.time_scale, arrived - now)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional, Tuple, TypeVar
+
+from httpx import AsyncClient
+
+T = TypeVar("T")
+
+
+def credential_key(client: AsyncClient) -> Hashable:
+    """
+    Identifies the credential `client` sends: the auth's `identity` when it has
+    one (as BearerAuth does), the auth object itself otherwise, plus a hash of
+    any Authorization header set on the client directly.
+    """
+    auth = client.auth
+    identity = getattr(auth, "identity", auth)
+    authorization = client.headers.get("Authorization", "")
+    header = hashlib.sha256(authorization.encode()).hexdigest() if authorization else ""
+    return identity, header
+
+
+def coalesce_key(
+        client: AsyncClient,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None
+    ) -> Tuple[Hashable, ...]:
+    """Calls only share a result when they are for the same request made with the same credential."""
+    params_key = tuple(sorted((k, str(v)) for k, v in params.items())) if params else ()
+    return method, str(client.base_url), url, params_key, credential_key(client)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class Coalescer:
+    """
+    Single-flight for idempotent reads.
+    Concurrent `run`s with the same key share one call of the first caller's
+    `fetch`. When several callers shared a call each gets its own copy of the
+    result, so they can't see each other's changes; exceptions are shared.
+    A caller being cancelled doesn't cancel the others.
+    """
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flight(key, fetch)
+        flight.waiters += 1
+        result = await asyncio.shield(flight.task)
+        # No one can join a finished flight, so `waiters` is final here.
+        return result if flight.waiters == 1 else copy.deepcopy(result)
+
+    def start(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        """Starts `fetch` unless a call for `key` is in flight, without waiting for it."""
+        return self._flight(key, fetch).task
+
+    def _flight(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> _Flight:
+        loop = asyncio.get_running_loop()
+        flight = self._inflight.get(key)
+        if flight is None or flight.task.get_loop() is not loop:
+            flight = _Flight(loop.create_task(fetch()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, done))
+        return flight
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._inflight.get(key)
+        if flight is not None and flight.task is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieved here for calls that were only `start`ed or whose
+            # waiters were all cancelled, so it's not reported as unhandled.
+            task.exception()
+
+
+request_coalescer = Coalescer()
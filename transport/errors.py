@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from httpx import Response
+
+
+class GoogleApiError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None, response: Optional[Response] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+def raise_for_status(response: Response, message: str = "Google API error") -> Response:
+    """Raises GoogleApiError for any non-2xx response, once retries are exhausted."""
+    if not response.is_success:
+        raise GoogleApiError(
+            f"{message}: {response.status_code} {response.text}",
+            status_code=response.status_code,
+            response=response
+        )
+    return response
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from httpx import AsyncByteStream, Request, Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_VERSION = re.compile(r"v\d+\w*$")
+
+
+class RequestObservation(NamedTuple):
+    endpoint: str
+    status_code: int
+    latency: float
+    """Seconds until response headers, retries included."""
+    request_bytes: int
+    """Body size as sent, after compression."""
+    response_bytes: int
+    retries: int
+
+
+class MetricsSink(ABC):
+    @abstractmethod
+    def observe_request(self, observation: RequestObservation) -> None:
+        ...
+
+    @abstractmethod
+    def observe_auth_refresh(self, seconds: float) -> None:
+        ...
+
+
+class InMemorySink(MetricsSink):
+    """Keeps every observation, meant for tests and benchmarks."""
+    def __init__(self) -> None:
+        self.requests: List[RequestObservation] = []
+        self.auth_refreshes: List[float] = []
+
+    def observe_request(self, observation: RequestObservation) -> None:
+        self.requests.append(observation)
+
+    def observe_auth_refresh(self, seconds: float) -> None:
+        self.auth_refreshes.append(seconds)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the `q` quantile, inf past the last bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def render(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregates observations and renders them in the Prometheus text format."""
+    prefix = "gcloud_json"
+
+    def __init__(self) -> None:
+        self.latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.status_counts: Dict[Tuple[str, int], int] = defaultdict(int)
+        self.request_bytes: Dict[str, int] = defaultdict(int)
+        self.response_bytes: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.auth_refresh = Histogram()
+
+    def observe_request(self, observation: RequestObservation) -> None:
+        endpoint = observation.endpoint
+        self.latency[endpoint].observe(observation.latency)
+        self.status_counts[(endpoint, observation.status_code)] += 1
+        self.request_bytes[endpoint] += observation.request_bytes
+        self.response_bytes[endpoint] += observation.response_bytes
+        self.retries[endpoint] += observation.retries
+
+    def observe_auth_refresh(self, seconds: float) -> None:
+        self.auth_refresh.observe(seconds)
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [f"# TYPE {p}_request_latency_seconds histogram"]
+        for endpoint, histogram in self.latency.items():
+            lines += histogram.render(f"{p}_request_latency_seconds", f'endpoint="{endpoint}"')
+        lines.append(f"# TYPE {p}_requests_total counter")
+        for (endpoint, status), count in self.status_counts.items():
+            lines.append(f'{p}_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        for metric, values in (
+                ("request_bytes_total", self.request_bytes),
+                ("response_bytes_total", self.response_bytes),
+                ("retries_total", self.retries)):
+            lines.append(f"# TYPE {p}_{metric} counter")
+            for endpoint, value in values.items():
+                lines.append(f'{p}_{metric}{{endpoint="{endpoint}"}} {value}')
+        lines.append(f"# TYPE {p}_auth_refresh_seconds histogram")
+        lines += self.auth_refresh.render(f"{p}_auth_refresh_seconds", "")
+        return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """Holds the active sink, nothing is recorded while it is None."""
+    def __init__(self) -> None:
+        self.sink: Optional[MetricsSink] = None
+
+    def observe_auth_refresh(self, seconds: float) -> None:
+        if self.sink is not None:
+            self.sink.observe_auth_refresh(seconds)
+
+
+metrics = Metrics()
+
+
+def endpoint_name(request: Request) -> str:
+    """
+    Low cardinality label for a request, e.g. "GET cloudtasks.googleapis.com
+    /v2beta3/projects/{}/locations/{}/queues/{}". Ids following a collection
+    name are replaced after the api version segment. Override with
+    `extensions={"endpoint": ...}`.
+    """
+    endpoint = request.extensions.get("endpoint")
+    if endpoint:
+        return endpoint
+    path, _, verb = request.url.path.partition(":")
+    parts = path.split("/")
+    for index, part in enumerate(parts):
+        if _VERSION.match(part):
+            parts[index + 2::2] = ["{}"] * len(parts[index + 2::2])
+            break
+    template = "/".join(parts) + (f":{verb}" if verb else "")
+    return f"{request.method} {request.url.host}{template}"
+
+
+class _CountingStream(AsyncByteStream):
+    def __init__(self, stream: AsyncByteStream, on_close: Callable[[int], None]) -> None:
+        self._stream = stream
+        self._on_close = on_close
+        self._size = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        self._on_close(self._size)
+
+
+async def _on_request(request: Request) -> None:
+    if metrics.sink is not None:
+        request.extensions["metrics_start"] = time.perf_counter()
+
+
+async def _on_response(response: Response) -> None:
+    sink = metrics.sink
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if sink is None or start is None:
+        return
+    latency = time.perf_counter() - start
+    endpoint = endpoint_name(request)
+    request_bytes = request.extensions.get("wire_bytes")
+    if request_bytes is None:
+        request_bytes = int(request.headers.get("Content-Length", 0))
+    retries = request.extensions.get("retry_count", 0)
+
+    def observe(response_bytes: int) -> None:
+        sink.observe_request(RequestObservation(
+            endpoint, response.status_code, latency, request_bytes, response_bytes, retries
+        ))
+
+    if response.is_closed:
+        # Already read, e.g. responses built by a MockTransport or a cache.
+        observe(len(response.content))
+    else:
+        response.stream = _CountingStream(response.stream, observe)
+
+
+def metrics_event_hooks() -> Dict[str, List[Callable[[Any], Any]]]:
+    """httpx event hooks recording every request to `metrics.sink`."""
+    return {"request": [_on_request], "response": [_on_response]}
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import re
+import time
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from httpx import AsyncBaseTransport, AsyncByteStream, Request, Response
+
+CONGESTION_STATUS = frozenset({429, 503})
+
+_PROJECT = re.compile(r"/projects/([^/:]+)")
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency governor for one (project, service).
+    Every fast success grows the in-flight limit by 1/limit (about +1 per round
+    trip of a full window), a 429/503 or a response slower than
+    `latency_target` multiplies it by `backoff`. Only one decrease happens per
+    round trip, so a burst of 429s from one window doesn't collapse the limit.
+    :param max_rate: Optional ceiling on requests started per second, in
+        bursts of up to `max_rate` requests and at least one, so fractional
+        rates still let a request through every 1 / `max_rate` seconds.
+    """
+    def __init__(
+            self,
+            initial_limit: float = 16,
+            min_limit: float = 1,
+            max_limit: float = 512,
+            backoff: float = 0.5,
+            latency_target: Optional[float] = None,
+            max_rate: Optional[float] = None
+        ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.max_rate = max_rate
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._burst = max(1.0, max_rate) if max_rate else 0.0
+        self._tokens = self._burst
+        self._tokens_at = time.monotonic()
+
+    async def acquire(self) -> float:
+        """Waits for a slot, returns the start time to hand back to `release`."""
+        if self.in_flight >= int(self.limit) or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken just as we were cancelled, hand the slot on.
+                    self._give_back()
+                elif waiter in self._waiters:
+                    # `_wake` may have dropped it already, as it was cancelled with us.
+                    self._waiters.remove(waiter)
+                raise
+        else:
+            self.in_flight += 1
+        if self.max_rate:
+            try:
+                await self._take_token()
+            except BaseException:
+                self._give_back()
+                raise
+        return time.monotonic()
+
+    def _give_back(self) -> None:
+        """Returns a slot that was never used, without counting it as a response."""
+        self.in_flight -= 1
+        self._wake()
+
+    def release(self, started: float, status_code: Optional[int], latency: Optional[float] = None) -> None:
+        """
+        :param status_code: None when the request failed without a response.
+        :param latency: Time to the response headers, when the slot was held past them.
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        if latency is None:
+            latency = now - started
+        congested = status_code in CONGESTION_STATUS or (
+            self.latency_target is not None and latency > self.latency_target
+        )
+        if congested:
+            if started > self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif status_code is not None and status_code < 500:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _take_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._tokens_at) * self.max_rate)
+            self._tokens_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.max_rate)
+
+
+class LimiterSettings:
+    """
+    Keyword arguments for new AdaptiveLimiters, `per_service` (keyed by api
+    host, e.g. "pubsub.googleapis.com") overrides `default`.
+    Set `enabled` to False to send requests ungoverned.
+    """
+    def __init__(self) -> None:
+        self.enabled = True
+        self.default: Dict[str, float] = {}
+        self.per_service: Dict[str, Dict[str, float]] = {}
+
+
+limiter_settings = LimiterSettings()
+
+_limiters: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AdaptiveLimiter]] = WeakKeyDictionary()
+
+
+def get_limiter(project: str, service: str) -> AdaptiveLimiter:
+    """The limiter shared by every client of `service` for `project` on the running loop."""
+    limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    limiter = limiters.get((project, service))
+    if limiter is None:
+        kwargs = {**limiter_settings.default, **limiter_settings.per_service.get(service, {})}
+        limiter = AdaptiveLimiter(**kwargs)
+        limiters[(project, service)] = limiter
+    return limiter
+
+
+class _SlotStream(AsyncByteStream):
+    """Response body holding its limiter slot until it has been read or closed."""
+    def __init__(self, stream: AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        release, self._release = self._release, None
+        try:
+            await self._stream.aclose()
+        finally:
+            if release is not None:
+                release()
+
+
+class LimiterTransport(AsyncBaseTransport):
+    """
+    Runs every attempt through the limiter of its (project, api host).
+    The slot is held until the response body is closed, so streamed
+    downloads count against the limit for as long as they run. Latency for
+    the AIMD adjustment is still measured to the response headers.
+    Responses sent with `stream=True` must be closed to give their slot back.
+    Long polls (`extensions={"long_poll": True}`) bypass the limiter: they
+    would hold slots other calls to the same api need while idle, and their
+    latency says nothing about congestion.
+    """
+    def __init__(self, transport: AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: Request) -> Response:
+        if not limiter_settings.enabled or request.extensions.get("long_poll"):
+            return await self._transport.handle_async_request(request)
+        match = _PROJECT.search(request.url.path)
+        limiter = get_limiter(match.group(1) if match else "", request.url.host)
+        started = await limiter.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            limiter.release(started, None)
+            raise
+        if response.is_closed:
+            # Built from content already in memory (mocks, replays), nothing left to read.
+            limiter.release(started, response.status_code)
+            return response
+        latency = time.monotonic() - started
+        status_code = response.status_code
+        response.stream = _SlotStream(response.stream, lambda: limiter.release(started, status_code, latency))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
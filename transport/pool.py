@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+from httpx import AsyncBaseTransport, AsyncClient, AsyncHTTPTransport, Request, Response
+
+from .cache import CacheTransport
+from .compression import CompressionTransport
+from .instrumentation import metrics_event_hooks
+from .limiter import LimiterTransport
+from .retry import RetryTransport
+
+try:
+    import h2
+except ImportError:  # http/2 needs the optional `h2` package (httpx[http2])
+    h2 = None
+
+
+class PoolSettings:
+    """
+    Limits for the shared connection pools, one pool per host.
+    Change before the first request is made, existing pools keep their limits.
+    """
+    def __init__(self) -> None:
+        self.http2 = h2 is not None
+        self.max_connections = 100
+        self.max_keepalive_connections = 20
+        self.keepalive_expiry = 30.0
+        # Connect retries done by httpcore itself.
+        self.retries = 0
+        # Innermost transport of new clients in place of the shared pools,
+        # e.g. an in-process fake api for benchmarks.
+        self.transport: Optional[AsyncBaseTransport] = None
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+pool_settings = PoolSettings()
+
+# Connections are bound to the event loop that opened them, so pools are kept per loop.
+_pools: WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncHTTPTransport]] = WeakKeyDictionary()
+
+
+def get_pool(host: str) -> AsyncHTTPTransport:
+    """Returns the pool for `host` on the running event loop, creating it on first use."""
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get(host)
+    if pool is None:
+        pool = AsyncHTTPTransport(
+            http2=pool_settings.http2,
+            limits=pool_settings.limits,
+            retries=pool_settings.retries,
+        )
+        pools[host] = pool
+    return pool
+
+
+async def close_shared_pools() -> None:
+    """Closes every pool opened on the running loop, call on application shutdown."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.aclose()
+
+
+class SharedTransport(AsyncBaseTransport):
+    """
+    Routes requests through the process-wide pool of their host.
+    Closing it leaves the pool open so short lived clients can be closed freely.
+    """
+    async def handle_async_request(self, request: Request) -> Response:
+        return await get_pool(request.url.host).handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+def make_client(base_url: str, auth: Optional[httpx.Auth] = None, **kwargs: Any) -> AsyncClient:
+    """
+    Builds a service client borrowing connections from the shared pools.
+    Every attempt is governed by the adaptive limiter of its project and api,
+    transient failures are retried by the RetryTransport, large bodies are
+    gzipped once before the first attempt, metadata reads can be served by
+    the response cache and every request is reported to the metrics sink.
+    Base url and auth stay per client.
+    """
+    base = pool_settings.transport or SharedTransport()
+    kwargs.setdefault("transport", CacheTransport(CompressionTransport(RetryTransport(LimiterTransport(base)))))
+    kwargs.setdefault("event_hooks", metrics_event_hooks())
+    return AsyncClient(base_url=base_url, auth=auth, **kwargs)
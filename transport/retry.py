@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from email.utils import parsedate_to_datetime
+import json
+import random
+import time
+from typing import Optional
+
+import httpx
+from httpx import AsyncBaseTransport, Request, Response
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+REJECTED_STATUS = frozenset({429})
+"""Statuses meaning the request was not processed, safe to retry whatever the method."""
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+"""Transport errors raised before the request reached the server."""
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    Override per call with `extensions={"retry_policy": RetryPolicy(...)}`, and mark
+    a non-idempotent call safe to retry with `extensions={"idempotent": True}`.
+    :param deadline: Total seconds budget for all attempts and sleeps of one call.
+        Not applied to long polls (`extensions={"long_poll": True}`), a single
+        attempt of which can take as long as the whole budget.
+    """
+    def __init__(
+            self,
+            max_attempts: int = 5,
+            initial_backoff: float = 0.1,
+            max_backoff: float = 32.0,
+            multiplier: float = 2.0,
+            deadline: Optional[float] = 60.0
+        ) -> None:
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        try:
+            ceiling = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        except OverflowError:
+            # Callers retrying indefinitely, e.g. a pull loop, get far past max_backoff.
+            ceiling = self.max_backoff
+        return random.uniform(0, ceiling)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+default_retry_policy = RetryPolicy()
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parses a google.protobuf.Duration json string such as "1.5s"."""
+    try:
+        return float(value.rstrip("s"))
+    except ValueError:
+        return None
+
+
+def server_retry_delay(response: Response) -> Optional[float]:
+    """Delay asked for by the server through Retry-After or a google.rpc.RetryInfo detail."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    try:
+        details = json.loads(response.content)["error"]["details"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    for detail in details if isinstance(details, list) else []:
+        if isinstance(detail, dict) and detail.get("@type", "").endswith("google.rpc.RetryInfo"):
+            return _parse_duration(str(detail.get("retryDelay", "")))
+    return None
+
+
+class RetryTransport(AsyncBaseTransport):
+    """
+    Retries transient failures under a RetryPolicy.
+    Idempotent methods retry on RETRYABLE_STATUS and transport errors, other
+    methods only when the request provably wasn't processed (429, connect errors).
+    Server requested delays win over the computed backoff, and a call never
+    sleeps past its deadline, the last response or error is returned instead.
+    """
+    def __init__(self, transport: AsyncBaseTransport, policy: Optional[RetryPolicy] = None) -> None:
+        self._transport = transport
+        self.policy = policy
+
+    async def handle_async_request(self, request: Request) -> Response:
+        policy: RetryPolicy = request.extensions.get("retry_policy") or self.policy or default_retry_policy
+        idempotent = request.extensions.get("idempotent", request.method in IDEMPOTENT_METHODS)
+        if policy.deadline is None or request.extensions.get("long_poll"):
+            deadline = None
+        else:
+            deadline = time.monotonic() + policy.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as exc:
+                if not (idempotent or isinstance(exc, NOT_SENT_ERRORS)):
+                    raise
+                delay = self._next_delay(policy, attempt, deadline, None)
+                if delay is None:
+                    raise
+            else:
+                status = response.status_code
+                if status not in RETRYABLE_STATUS or not (idempotent or status in REJECTED_STATUS):
+                    return response
+                await response.aread()
+                delay = self._next_delay(policy, attempt, deadline, server_retry_delay(response))
+                if delay is None:
+                    return response
+                await response.aclose()
+            request.extensions["retry_count"] = attempt
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _next_delay(
+            policy: RetryPolicy,
+            attempt: int,
+            deadline: Optional[float],
+            server_delay: Optional[float]
+        ) -> Optional[float]:
+        """Seconds to wait before the next attempt, None when the budget is spent."""
+        if attempt >= policy.max_attempts:
+            return None
+        delay = server_delay if server_delay is not None else policy.backoff(attempt)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()